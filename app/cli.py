@@ -0,0 +1,124 @@
+# Command line entry points
+#   python -m app.cli import-products products.csv --warehouse-id 1
+#   python -m app.cli snapshot-ledger
+#   python -m app.cli migrate [--check]
+#   python -m app.cli rebuild-low-stock
+
+import argparse
+import json
+import sys
+from dataclasses import asdict
+from datetime import datetime
+
+from sqlmodel import Session
+
+
+def import_products_command(args):
+    from app.models.create_db import engine
+    from app.services.product_import import import_products, iter_records
+
+    fmt = args.format or (
+        "ndjson" if args.path.endswith((".ndjson", ".jsonl")) else "csv"
+    )
+
+    def progress(report):
+        print(
+            f"processed={report.processed} "
+            f"upserted={report.products_upserted} "
+            f"seeded={report.stock_rows_seeded} "
+            f"rejected={report.rejected_count}",
+            file=sys.stderr,
+        )
+
+    with open(args.path, encoding="utf-8-sig", newline="") as stream:
+        with Session(engine) as session:
+            report = import_products(
+                session,
+                iter_records(stream, fmt),
+                default_warehouse_id=args.warehouse_id,
+                chunk_size=args.chunk_size,
+                on_progress=progress,
+            )
+    print(json.dumps(asdict(report), indent=2, default=str))
+    return 0 if report.rejected_count == 0 else 1
+
+
+def snapshot_ledger_command(args):
+    from app.models.create_db import engine
+    from app.services.stock_history import take_checkpoint
+
+    with Session(engine) as session:
+        checkpoint = take_checkpoint(session, cutoff=args.cutoff)
+        if checkpoint is None:
+            print("Nothing to roll up.", file=sys.stderr)
+            return 0
+        print(
+            json.dumps(
+                {"checkpoint_id": checkpoint.id, "taken_at": checkpoint.taken_at},
+                default=str,
+            )
+        )
+    return 0
+
+
+def migrate_command(args):
+    from app.models.create_db import engine
+    from app.models.migrations import HEAD, current_version, migrate
+
+    applied = [] if args.check else migrate(engine)
+    with engine.connect() as conn:
+        version = current_version(conn)
+    print(json.dumps({"applied": applied, "version": version, "head": HEAD}))
+    return 0 if version >= HEAD else 1
+
+
+def rebuild_low_stock_command(args):
+    from app.models.create_db import engine
+    from app.services.low_stock import rebuild_flags
+
+    with Session(engine) as session:
+        rebuild_flags(session)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    importer = commands.add_parser(
+        "import-products", help="Upsert products and seed stock from a file"
+    )
+    importer.add_argument("path")
+    importer.add_argument("--warehouse-id", type=int, default=None)
+    importer.add_argument("--format", choices=["csv", "ndjson"], default=None)
+    importer.add_argument("--chunk-size", type=int, default=1000)
+    importer.set_defaults(handler=import_products_command)
+
+    snapshot = commands.add_parser(
+        "snapshot-ledger", help="Roll the stock ledger up into a checkpoint"
+    )
+    snapshot.add_argument(
+        "--cutoff", type=datetime.fromisoformat, default=None, help="UTC, ISO 8601"
+    )
+    snapshot.set_defaults(handler=snapshot_ledger_command)
+
+    migrator = commands.add_parser("migrate", help="Apply pending schema migrations")
+    migrator.add_argument(
+        "--check",
+        action="store_true",
+        help="only report the version, exit 1 when migrations are pending",
+    )
+    migrator.set_defaults(handler=migrate_command)
+
+    rebuild = commands.add_parser(
+        "rebuild-low-stock",
+        help="Recompute low-stock flags, e.g. after a bulk load outside the app",
+    )
+    rebuild.set_defaults(handler=rebuild_low_stock_command)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,20 @@
-from fastapi import FastAPI
-from app.models.create_db import create_db_and_tables
+import logging
+import time
+
+# start of the cold-start budget (COLD_START_BUDGET_MS)
+_import_started = time.perf_counter()
+
+from fastapi import FastAPI, Request
+from fastapi.responses import ORJSONResponse
+from app.models.create_db import prepare_schema
+from app.services import instrumentation, scheduler
+from app.services.auto_validation import auto_validate
+from app.services.kpi_snapshot import reconcile_kpis
+from app.services.logging_config import configure_logging
+from app.services.read_routing import WRITE_METHODS, mark_write
+from app.services.reservations import expire_reservations
+from app.services.stock_history import snapshot_ledger
+from app.settings import get_settings
 
 # enable cors
 from fastapi.middleware.cors import CORSMiddleware
@@ -8,7 +23,10 @@ from fastapi.middleware.cors import CORSMiddleware
 origins = ["*"]
 
 
-app = FastAPI()
+settings = get_settings()
+configure_logging(settings.LOG_LEVEL, settings.LOG_FORMAT)
+logger = logging.getLogger("app")
+app = FastAPI(default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,13 +34,75 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Link", "X-Next-Cursor", "Server-Timing"],
 )
 
 
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    response = await call_next(request)
+    if request.method in WRITE_METHODS and response.status_code < 400:
+        mark_write(response, settings.READ_YOUR_WRITES_SECONDS)
+    return response
+
+
+# registered last, so it is the outermost middleware and times everything
+@app.middleware("http")
+async def instrument_requests(request: Request, call_next):
+    stats, token = instrumentation.start_request()
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        seconds = time.perf_counter() - started
+        route = request.scope.get("route")
+        instrumentation.finish_request(
+            token,
+            stats,
+            request.method,
+            route.path if route is not None else "unmatched",
+            status,
+            seconds,
+        )
+    response.headers["Server-Timing"] = instrumentation.server_timing(stats, seconds)
+    return response
+
+
 @app.on_event("startup")
 def on_startup():
-    create_db_and_tables()
-    print("Startup complete.")
+    prepare_schema()
+    cold_start_ms = (time.perf_counter() - _import_started) * 1000
+    budget_ms = settings.COLD_START_BUDGET_MS
+    if budget_ms and cold_start_ms > budget_ms:
+        logger.warning(
+            "Startup took %.0f ms, over the %.0f ms budget", cold_start_ms, budget_ms
+        )
+    else:
+        logger.info("Startup complete in %.0f ms.", cold_start_ms)
+
+
+@app.on_event("startup")
+async def start_background_jobs():
+    scheduler.register_periodic(
+        "kpi_reconcile", settings.KPI_RECONCILE_SECONDS, reconcile_kpis
+    )
+    scheduler.register_periodic(
+        "ledger_snapshot", settings.LEDGER_SNAPSHOT_SECONDS, snapshot_ledger
+    )
+    scheduler.register_periodic(
+        "reservation_expiry", settings.RESERVATION_SWEEP_SECONDS, expire_reservations
+    )
+    scheduler.register_periodic(
+        "auto_validate", settings.AUTO_VALIDATE_SECONDS, auto_validate
+    )
+    scheduler.start()
+
+
+@app.on_event("shutdown")
+async def stop_background_jobs():
+    await scheduler.stop()
 
 
 @app.get("/")
@@ -48,3 +128,11 @@ from app.routes import warehouseManager
 app.include_router(warehouseManager.router)
 app.include_router(dashboardManager.router)
 app.include_router(navigationManager.router)
+
+from app.routes import eventsManager
+from app.routes import metricsManager
+from app.routes import reportsManager
+
+app.include_router(metricsManager.router)
+app.include_router(eventsManager.router)
+app.include_router(reportsManager.router)
@@ -1,23 +1,127 @@
-from fastapi import FastAPI, Depends
-from sqlmodel import SQLModel, Session, create_engine
+import logging
+from functools import lru_cache
+
+from fastapi import Depends, Request
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel import Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.services.db_pool import engine_options
+from app.services.read_routing import wants_primary
 from app.settings import get_settings
 from typing import Annotated
 
-app = FastAPI()
-settings = get_settings()
+logger = logging.getLogger("app.db")
+
+# async drivers for the same database, PG_DB keeps using the sync URL
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def async_url(url: str):
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}")
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+
+
+# Engines and session factories are built on first use, not at import: the
+# CLI, the worker and every uvicorn worker only pay for (and only load the
+# drivers of) what they actually touch.
+@lru_cache
+def get_engine():
+    settings = get_settings()
+    return create_engine(settings.PG_DB, **engine_options(settings, settings.PG_DB))
+
+
+@lru_cache
+def get_async_engine():
+    settings = get_settings()
+    return create_async_engine(
+        async_url(settings.PG_DB),
+        **engine_options(settings, settings.PG_DB, is_async=True),
+    )
+
+
+@lru_cache
+def get_replica_engine():
+    settings = get_settings()
+    if not settings.PG_DB_REPLICA:
+        return get_async_engine()
+    return create_async_engine(
+        async_url(settings.PG_DB_REPLICA),
+        **engine_options(settings, settings.PG_DB_REPLICA, is_async=True),
+    )
+
+
+@lru_cache
+def _session_factories():
+    return {
+        # objects stay readable after commit without an implicit (sync) reload
+        "AsyncSessionLocal": async_sessionmaker(
+            get_async_engine(), class_=AsyncSession, expire_on_commit=False
+        ),
+        # for endpoints that only read: nothing to flush, nothing to expire
+        "AsyncReadSessionLocal": async_sessionmaker(
+            get_async_engine(),
+            class_=AsyncSession,
+            autoflush=False,
+            expire_on_commit=False,
+        ),
+        "ReplicaSessionLocal": async_sessionmaker(
+            get_replica_engine(),
+            class_=AsyncSession,
+            autoflush=False,
+            expire_on_commit=False,
+        ),
+    }
 
-DATABASE_URL = settings.PG_DB
-engine = create_engine(DATABASE_URL)
 
+_LAZY_ENGINES = {
+    "engine": get_engine,
+    "async_engine": get_async_engine,
+    "replica_engine": get_replica_engine,
+}
 
-def create_db_and_tables():
-    SQLModel.metadata.create_all(engine)
-    print("Database and tables created.")
+
+def __getattr__(name):
+    # `from app.models.create_db import engine` keeps working, lazily
+    if name in _LAZY_ENGINES:
+        return _LAZY_ENGINES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def prepare_schema():
+    """Startup check that the schema is at the current migration (see
+    app/models/migrations.py); migrates first if MIGRATE_ON_STARTUP is set."""
+    from app.models.migrations import ensure_current
+
+    ensure_current(get_engine(), migrate_pending=get_settings().MIGRATE_ON_STARTUP)
 
 
 def get_session():
-    with Session(engine) as session:
+    with Session(get_engine()) as session:
+        yield session
+
+
+async def get_async_session():
+    async with _session_factories()["AsyncSessionLocal"]() as session:
+        yield session
+
+
+def read_session_factory(request: Request):
+    # the replica, unless the client asked to read its own writes
+    factories = _session_factories()
+    if wants_primary(request):
+        return factories["AsyncReadSessionLocal"]
+    return factories["ReplicaSessionLocal"]
+
+
+async def get_async_read_session(request: Request):
+    async with read_session_factory(request)() as session:
         yield session
 
 
 SessionDep = Annotated[Session, Depends(get_session)]
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_session)]
+AsyncReadSessionDep = Annotated[AsyncSession, Depends(get_async_read_session)]
@@ -0,0 +1,251 @@
+# Versioned schema migrations
+# The schema is owned by the migrations below, not by application startup.
+# `python -m app.cli migrate` applies the ones a database has not seen yet,
+# in order, each in its own transaction, and records the version reached in
+# the one-row schemaversion table. A worker starting up then only reads that
+# row (`ensure_current`) instead of reflecting every table with create_all.
+#
+# An empty database is created straight from the models and stamped with
+# the latest version. Migration 1 adopts databases created by create_all
+# before migrations existed. It brings them up to the current models, so
+# every later migration must also be safe on a schema that already has its
+# change (create with checkfirst, IF NOT EXISTS).
+#
+# To change the schema, append a migration; never edit an applied one. On
+# Postgres, concurrent `migrate` runs (e.g. several workers starting with
+# MIGRATE_ON_STARTUP) queue on an advisory lock and re-read the version.
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable
+
+from sqlalchemy import (
+    Connection,
+    DateTime,
+    Engine,
+    UniqueConstraint,
+    and_,
+    delete,
+    func,
+    insert,
+    inspect,
+    literal,
+    select,
+    text,
+)
+from sqlmodel import Session, SQLModel
+
+from app.models.schemas import (
+    LedgerCheckpoint,
+    SchemaVersion,
+    Stock,
+    StockLedger,
+    StockSnapshot,
+    Transaction,
+)
+
+logger = logging.getLogger("app.migrations")
+
+# pg_advisory_lock key, any constant shared by every process
+_LOCK_ID = 7_310_443_001
+
+_version = SchemaVersion.__table__
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    apply: Callable[[Connection], None]
+
+
+class SchemaOutOfDate(RuntimeError):
+    pass
+
+
+def _create_unique_index(conn: Connection, table, constraint: UniqueConstraint):
+    quote = conn.dialect.identifier_preparer.quote
+    columns = [column.name for column in constraint.columns]
+    name = constraint.name or f"uq_{table.name}_{'_'.join(columns)}"
+    conn.execute(
+        text(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {quote(name)} ON {quote(table.name)}"
+            f" ({', '.join(quote(column) for column in columns)})"
+        )
+    )
+
+
+def _adopt_create_all_schema(conn: Connection):
+    # create_all only ever created missing tables: add those, and the
+    # indexes and unique constraints existing tables gained since
+    SQLModel.metadata.create_all(conn)
+    inspector = inspect(conn)
+    for table in SQLModel.metadata.sorted_tables:
+        indexes = inspector.get_indexes(table.name)
+        names = {index["name"] for index in indexes}
+        for index in table.indexes:
+            if index.name not in names:
+                index.create(conn)
+        unique = {
+            frozenset(constraint["column_names"])
+            for constraint in inspector.get_unique_constraints(table.name)
+        } | {frozenset(index["column_names"]) for index in indexes if index["unique"]}
+        for constraint in table.constraints:
+            columns = frozenset(column.name for column in constraint.columns)
+            if isinstance(constraint, UniqueConstraint) and columns not in unique:
+                # fails on duplicate rows: those need fixing by hand first
+                _create_unique_index(conn, table, constraint)
+
+    # LowStockFlag is maintained incrementally from here on
+    from app.services.low_stock import rebuild_flags
+
+    with Session(bind=conn) as session:
+        rebuild_flags(session)
+
+
+def _add_due_transactions_index(conn: Connection):
+    # auto-validation claims due transactions by (status, scheduled_date)
+    for index in Transaction.__table__.indexes:
+        if index.name == "ix_transaction_status_scheduled":
+            index.create(conn, checkfirst=True)
+
+
+def _add_transaction_unit_cost(conn: Connection):
+    table = Transaction.__table__
+    if "unit_cost" in {
+        column["name"] for column in inspect(conn).get_columns(table.name)
+    }:
+        return
+    quote = conn.dialect.identifier_preparer.quote
+    column_type = table.c.unit_cost.type.compile(conn.dialect)
+    conn.execute(
+        text(f"ALTER TABLE {quote(table.name)} ADD COLUMN unit_cost {column_type}")
+    )
+
+
+def _add_opening_balances(conn: Connection):
+    # stock that predates StockLedger has no movements explaining it: give each
+    # row an opening balance (on_hand minus what the ledger already sums to),
+    # dated just before the first recorded movement
+    ledger, stock = StockLedger.__table__, Stock.__table__
+    recorded = (
+        select(
+            ledger.c.warehouse_id,
+            ledger.c.product_id,
+            func.sum(ledger.c.quantity_change).label("quantity"),
+        )
+        .group_by(ledger.c.warehouse_id, ledger.c.product_id)
+        .subquery()
+    )
+    first_movement = conn.execute(select(func.min(ledger.c.created_at))).scalar()
+    opened_at = (
+        first_movement - timedelta(seconds=1) if first_movement else datetime.utcnow()
+    )
+    unexplained = stock.c.on_hand - func.coalesce(recorded.c.quantity, 0)
+    openings = (
+        select(
+            stock.c.warehouse_id,
+            stock.c.product_id,
+            unexplained,
+            literal(opened_at, DateTime),
+        )
+        .select_from(
+            stock.outerjoin(
+                recorded,
+                and_(
+                    recorded.c.warehouse_id == stock.c.warehouse_id,
+                    recorded.c.product_id == stock.c.product_id,
+                ),
+            )
+        )
+        .where(func.abs(unexplained) > 1e-9)
+    )
+    written = conn.execute(
+        insert(ledger).from_select(
+            ["warehouse_id", "product_id", "quantity_change", "created_at"], openings
+        )
+    ).rowcount
+    if written:
+        # checkpoints rolled up without the openings; the next one is rebuilt
+        # from the whole ledger
+        conn.execute(delete(StockSnapshot.__table__))
+        conn.execute(delete(LedgerCheckpoint.__table__))
+
+
+MIGRATIONS = [
+    Migration(1, "adopt a schema created by create_all", _adopt_create_all_schema),
+    Migration(2, "index due transactions", _add_due_transactions_index),
+    Migration(3, "receipt unit cost", _add_transaction_unit_cost),
+    Migration(4, "opening ledger balances", _add_opening_balances),
+]
+HEAD = MIGRATIONS[-1].version
+
+
+def current_version(conn: Connection) -> int:
+    """Version the database is at; 0 before any migration ran."""
+    if not inspect(conn).has_table(_version.name):
+        return 0
+    return conn.execute(select(_version.c.version)).scalar() or 0
+
+
+def _stamp(conn: Connection, version: int):
+    if conn.execute(_version.update().values(version=version)).rowcount == 0:
+        conn.execute(_version.insert().values(id=1, version=version))
+
+
+def migrate(engine: Engine) -> list[int]:
+    """Apply pending migrations; returns the versions applied (just HEAD when
+    an empty database was created at it)."""
+    applied = []
+    with engine.connect() as conn:
+        postgres = conn.dialect.name == "postgresql"
+        if postgres:
+            conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": _LOCK_ID})
+            conn.commit()
+        try:
+            empty = not inspect(conn).get_table_names()
+            version = current_version(conn)
+            conn.rollback()
+            if empty:
+                with conn.begin():
+                    SQLModel.metadata.create_all(conn)
+                    _stamp(conn, HEAD)
+                logger.info("Created an empty schema at version %d", HEAD)
+                return [HEAD]
+            for migration in MIGRATIONS:
+                if migration.version <= version:
+                    continue
+                with conn.begin():
+                    migration.apply(conn)
+                    _version.create(conn, checkfirst=True)
+                    _stamp(conn, migration.version)
+                logger.info(
+                    "Applied migration %d: %s",
+                    migration.version,
+                    migration.description,
+                )
+                applied.append(migration.version)
+        finally:
+            if postgres:
+                conn.rollback()
+                conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": _LOCK_ID})
+                conn.commit()
+    return applied
+
+
+def ensure_current(engine: Engine, migrate_pending: bool = False) -> int:
+    """Fail fast unless the schema is at HEAD (or migrate when allowed)."""
+    with engine.connect() as conn:
+        version = current_version(conn)
+    if version > HEAD:
+        # a newer release already migrated; migrations only add things
+        logger.warning("Schema is at version %d, this code knows %d", version, HEAD)
+    elif version < HEAD:
+        if not migrate_pending:
+            raise SchemaOutOfDate(
+                f"Schema is at version {version}, expected {HEAD}: "
+                "run `python -m app.cli migrate`"
+            )
+        migrate(engine)
+    return max(version, HEAD)
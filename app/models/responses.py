@@ -0,0 +1,56 @@
+# Read-only response schemas
+# Lean models for what listing endpoints return. They are declared as the
+# routes' response_model for the OpenAPI docs, while the routes themselves
+# select exactly these columns and hand the row tuples to orjson
+# (`rows_response`), skipping both ORM object construction and FastAPI's
+# generic encoder.
+
+from datetime import datetime
+from typing import Optional
+
+from fastapi.responses import ORJSONResponse
+from sqlmodel import SQLModel
+
+from app.models.schemas import StockLedger, Transaction, TxnStatus, TxnType
+
+
+class TransactionRead(SQLModel):
+    id: int
+    type: TxnType
+    status: TxnStatus
+    reference_number: Optional[str] = None
+    scheduled_date: Optional[datetime] = None
+    completion_date: Optional[datetime] = None
+    product_id: Optional[int] = None
+    quantity: Optional[float] = None
+    unit_cost: Optional[float] = None
+    from_warehouse: Optional[int] = None
+    to_warehouse: Optional[int] = None
+    supplier: Optional[str] = None
+    delivery_address: Optional[str] = None
+    contact: Optional[str] = None
+    created_by: Optional[int] = None
+    created_at: datetime
+
+
+class LedgerEntryRead(SQLModel):
+    id: int
+    transaction_id: Optional[int] = None
+    warehouse_id: int
+    product_id: int
+    quantity_change: float
+    created_at: datetime
+
+
+def columns_for(schema: type[SQLModel], table: type[SQLModel]) -> list:
+    """The columns of `table` named by the fields of `schema`, in order."""
+    return [getattr(table, name) for name in schema.model_fields]
+
+
+TRANSACTION_COLUMNS = columns_for(TransactionRead, Transaction)
+LEDGER_COLUMNS = columns_for(LedgerEntryRead, StockLedger)
+
+
+def rows_response(rows, **kwargs) -> ORJSONResponse:
+    """Serialize result rows (named tuples) straight to a JSON array."""
+    return ORJSONResponse([row._asdict() for row in rows], **kwargs)
@@ -1,6 +1,6 @@
 import enum
 from sqlmodel import SQLModel, Field, Column
-from sqlalchemy import Enum
+from sqlalchemy import Enum, Index, UniqueConstraint
 from typing import Optional
 from datetime import datetime
 
@@ -24,6 +24,12 @@ class TxnStatus(str, enum.Enum):
     canceled = "canceled"
 
 
+class ReservationStatus(str, enum.Enum):
+    active = "active"
+    consumed = "consumed"
+    released = "released"
+
+
 class User(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     full_name: str
@@ -44,14 +50,25 @@ class Warehouse(SQLModel, table=True):
 
 
 class Product(SQLModel, table=True):
+    __table_args__ = (Index("ix_product_category", "category"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str
-    sku: str
+    sku: str = Field(unique=True)
     category: Optional[str] = None
     uom: str
 
 
 class Stock(SQLModel, table=True):
+    __table_args__ = (
+        # one row per (warehouse, product): stock movements upsert on it
+        UniqueConstraint(
+            "warehouse_id", "product_id", name="uq_stock_warehouse_product"
+        ),
+        # product-first lookups used by the catalog endpoint
+        Index("ix_stock_product_warehouse", "product_id", "warehouse_id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     warehouse_id: int = Field(foreign_key="warehouse.id")
     product_id: int = Field(foreign_key="product.id")
@@ -62,6 +79,16 @@ class Stock(SQLModel, table=True):
 
 
 class Transaction(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_transaction_type_status", "type", "status"),
+        Index("ix_transaction_from_warehouse_type", "from_warehouse", "type"),
+        Index("ix_transaction_to_warehouse_type", "to_warehouse", "type"),
+        # keyset pagination order of /dashboard/transactions
+        Index("ix_transaction_created_at_id", "created_at", "id"),
+        # due transactions for auto-validation, most overdue first
+        Index("ix_transaction_status_scheduled", "status", "scheduled_date"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
 
     type: TxnType = Field(sa_column=Column(Enum(TxnType)))
@@ -71,9 +98,11 @@ class Transaction(SQLModel, table=True):
 
     scheduled_date: Optional[datetime] = None
     completion_date: Optional[datetime] = None
-    reference_number: Optional[str] = None
+    reference_number: Optional[str] = Field(default=None, unique=True)
     product_id: Optional[int] = Field(foreign_key="product.id")
     quantity: Optional[float] = None
+    # receipts: folded into Stock.product_unit_cost when validated
+    unit_cost: Optional[float] = Field(default=None, ge=0)
     from_warehouse: Optional[int] = Field(foreign_key="warehouse.id")
     to_warehouse: Optional[int] = Field(foreign_key="warehouse.id")
     supplier: Optional[str] = None
@@ -84,6 +113,10 @@ class Transaction(SQLModel, table=True):
 
 
 class TransactionLine(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_transactionline_transaction_product", "transaction_id", "product_id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
 
     transaction_id: int = Field(foreign_key="transaction.id")
@@ -97,6 +130,12 @@ class TransactionLine(SQLModel, table=True):
 
 
 class StockLedger(SQLModel, table=True):
+    # append-only, see app/services/ledger.py
+    __table_args__ = (
+        Index("ix_stockledger_warehouse_created", "warehouse_id", "created_at", "id"),
+        Index("ix_stockledger_product_created", "product_id", "created_at", "id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
 
     transaction_id: Optional[int] = Field(foreign_key="transaction.id")
@@ -105,3 +144,88 @@ class StockLedger(SQLModel, table=True):
 
     quantity_change: float
     created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class ReferenceSequence(SQLModel, table=True):
+    # last reference number handed out per (warehouse, operation type)
+    warehouse_id: int = Field(foreign_key="warehouse.id", primary_key=True)
+    txn_type: TxnType = Field(sa_column=Column(Enum(TxnType), primary_key=True))
+    last_value: int = 0
+
+
+class LedgerCheckpoint(SQLModel, table=True):
+    # a roll-up of StockLedger up to and including `taken_at`
+    id: Optional[int] = Field(default=None, primary_key=True)
+    taken_at: datetime = Field(unique=True)
+
+
+class StockSnapshot(SQLModel, table=True):
+    # on-hand balance per (warehouse, product) at a checkpoint
+    __table_args__ = (
+        UniqueConstraint(
+            "checkpoint_id",
+            "warehouse_id",
+            "product_id",
+            name="uq_stocksnapshot_checkpoint_warehouse_product",
+        ),
+        Index("ix_stocksnapshot_checkpoint_product", "checkpoint_id", "product_id"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    checkpoint_id: int = Field(foreign_key="ledgercheckpoint.id")
+    warehouse_id: int = Field(foreign_key="warehouse.id")
+    product_id: int = Field(foreign_key="product.id")
+    on_hand: float
+
+
+class Reservation(SQLModel, table=True):
+    # quantity set aside for an open delivery / scheduled transfer, see
+    # app/services/reservations.py; Stock.free_to_use already excludes it
+    __table_args__ = (
+        Index("ix_reservation_transaction_status", "transaction_id", "status"),
+        # expiry sweep
+        Index("ix_reservation_status_expires", "status", "expires_at"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    transaction_id: int = Field(foreign_key="transaction.id")
+    warehouse_id: int = Field(foreign_key="warehouse.id")
+    product_id: int = Field(foreign_key="product.id")
+
+    quantity: float
+    status: ReservationStatus = Field(
+        default=ReservationStatus.active, sa_column=Column(Enum(ReservationStatus))
+    )
+    expires_at: Optional[datetime] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class ReorderRule(SQLModel, table=True):
+    # min/max replenishment levels per (warehouse, product), see
+    # app/services/low_stock.py
+    __table_args__ = (
+        UniqueConstraint(
+            "warehouse_id", "product_id", name="uq_reorderrule_warehouse_product"
+        ),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    warehouse_id: int = Field(foreign_key="warehouse.id")
+    product_id: int = Field(foreign_key="product.id")
+    min_qty: float = Field(ge=0)
+    max_qty: Optional[float] = Field(default=None, ge=0)
+
+
+class LowStockFlag(SQLModel, table=True):
+    # stock rows at or below their minimum, kept current on every commit
+    warehouse_id: int = Field(foreign_key="warehouse.id", primary_key=True)
+    product_id: int = Field(foreign_key="product.id", primary_key=True)
+    free_to_use: float
+    min_qty: float
+    max_qty: Optional[float] = None
+
+
+class SchemaVersion(SQLModel, table=True):
+    # one row: the last migration applied, see app/models/migrations.py
+    id: int = Field(default=1, primary_key=True)
+    version: int
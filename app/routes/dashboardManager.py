@@ -1,84 +1,142 @@
-from fastapi import APIRouter, Depends
-from sqlmodel import Session, select
-from app.models.schemas import Product, Stock, Transaction, TxnType, TxnStatus
-from app.models.create_db import get_session
+from datetime import datetime
+from typing import Literal
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import exists, tuple_
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.models.schemas import (
+    Product,
+    Transaction,
+    TransactionLine,
+    TxnType,
+    TxnStatus,
+)
+from app.models.create_db import get_async_read_session, read_session_factory
+from app.models.responses import TRANSACTION_COLUMNS, TransactionRead, rows_response
+from app.services.kpi_snapshot import kpi_snapshot
+from app.services.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    decode_cursor,
+    encode_cursor,
+    set_next_cursor,
+)
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
+
 @router.get("/kpis")
-def get_dashboard_kpis(session: Session = Depends(get_session)):
-    total_products = len(session.exec(select(Product)).all())
-
-    low_stock_items = len(
-        session.exec(
-            select(Stock).where(Stock.free_to_use <= 5)
-        ).all()
-    )
-
-    pending_receipts = len(
-        session.exec(
-            select(Transaction).where(
-                Transaction.type == TxnType.receipt,
-                Transaction.status.in_([TxnStatus.waiting, TxnStatus.ready])
-            )
-        ).all()
-    )
-
-    pending_deliveries = len(
-        session.exec(
-            select(Transaction).where(
-                Transaction.type == TxnType.delivery,
-                Transaction.status.in_([TxnStatus.waiting, TxnStatus.ready])
-            )
-        ).all()
-    )
-
-    internal_transfers = len(
-        session.exec(
-            select(Transaction).where(
-                Transaction.type == TxnType.internal_adjustment,
-                Transaction.status == TxnStatus.waiting
-            )
-        ).all()
-    )
-
-    return {
-        "total_products": total_products,
-        "low_stock_items": low_stock_items,
-        "pending_receipts": pending_receipts,
-        "pending_deliveries": pending_deliveries,
-        "internal_transfers": internal_transfers,
-    }
-    
-@router.get("/transactions")
-def filter_transactions(
-    txn_type: TxnType | None = None,
-    status: TxnStatus | None = None,
-    warehouse_id: int | None = None,
-    category: str | None = None,
-    session: Session = Depends(get_session)
+async def get_dashboard_kpis(
+    request: Request, session: AsyncSession = Depends(get_async_read_session)
+):
+    # served from the materialized snapshot, see app/services/kpi_snapshot.py
+    values, etag = await session.run_sync(kpi_snapshot.get)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return ORJSONResponse(values, headers=headers)
+
+
+_NEWEST_FIRST = (Transaction.created_at.desc(), Transaction.id.desc())
+
+
+def _transaction_filters(
+    txn_type: TxnType | None,
+    status: TxnStatus | None,
+    warehouse_id: int | None,
+    category: str | None,
 ):
-    query = select(Transaction)
+    # every filter is ANDed onto the query, each one backed by an index
+    # declared on Transaction / TransactionLine in app/models/schemas.py
+    filters = []
 
     if txn_type:
-        query = query.where(Transaction.type == txn_type)
+        filters.append(Transaction.type == txn_type)
 
     if status:
-        query = query.where(Transaction.status == status)
+        filters.append(Transaction.status == status)
 
     if warehouse_id:
-        query = query.where(
-            (Transaction.from_warehouse == warehouse_id) |
-            (Transaction.to_warehouse == warehouse_id)
+        filters.append(
+            (Transaction.from_warehouse == warehouse_id)
+            | (Transaction.to_warehouse == warehouse_id)
         )
 
     if category:
-        from app.models.schemas import TransactionLine, Product
-        query = (
-            select(Transaction)
-            .join(TransactionLine)
-            .join(Product)
-            .where(Product.category == category)
+        # single-product transactions carry product_id on the header,
+        # multi-line ones through TransactionLine
+        category_products = select(Product.id).where(Product.category == category)
+        filters.append(
+            Transaction.product_id.in_(category_products)
+            | exists().where(
+                TransactionLine.transaction_id == Transaction.id,
+                TransactionLine.product_id.in_(category_products),
+            )
+        )
+
+    return filters
+
+
+async def _stream_transactions_ndjson(filters, after: tuple | None, session_factory):
+    # the export runs after the request handler returned, so it owns its session
+    async with session_factory() as session:
+        query = select(*TRANSACTION_COLUMNS).where(*filters).order_by(*_NEWEST_FIRST)
+        if after:
+            query = query.where(tuple_(Transaction.created_at, Transaction.id) < after)
+        result = await session.stream(query.execution_options(yield_per=1000))
+        # one chunk per fetched batch instead of one write per row
+        async for rows in result.partitions():
+            yield b"".join(orjson.dumps(row._asdict()) + b"\n" for row in rows)
+
+
+@router.get("/transactions", response_model=list[TransactionRead])
+async def filter_transactions(
+    request: Request,
+    txn_type: TxnType | None = None,
+    status: TxnStatus | None = None,
+    warehouse_id: int | None = None,
+    category: str | None = None,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    format: Literal["json", "ndjson"] = "json",
+    session: AsyncSession = Depends(get_async_read_session),
+):
+    """List transactions newest first, keyset-paginated on (created_at, id).
+
+    The next page's cursor is returned in the `X-Next-Cursor` header.
+    `format=ndjson` streams every matching row (from `cursor` on) for exports.
+    """
+    filters = _transaction_filters(txn_type, status, warehouse_id, category)
+    after = decode_cursor(cursor, datetime, int) if cursor else None
+
+    if format == "ndjson":
+        return StreamingResponse(
+            _stream_transactions_ndjson(filters, after, read_session_factory(request)),
+            media_type="application/x-ndjson",
         )
 
-    return session.exec(query).all()
\ No newline at end of file
+    query = select(*TRANSACTION_COLUMNS).where(*filters).order_by(*_NEWEST_FIRST)
+    if after:
+        query = query.where(tuple_(Transaction.created_at, Transaction.id) < after)
+
+    # fetch one extra row to know whether there is a next page
+    rows = (await session.execute(query.limit(limit + 1))).all()
+    page = rows[:limit]
+    response = rows_response(page)
+    if len(rows) > limit:
+        last = page[-1]
+        set_next_cursor(request, response, encode_cursor(last.created_at, last.id))
+    return response
+
+
+@router.get("/transactions/{transaction_id}")
+async def read_transaction(
+    transaction_id: int, session: AsyncSession = Depends(get_async_read_session)
+):
+    transaction = await session.get(Transaction, transaction_id)
+    if not transaction:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+    return transaction
@@ -0,0 +1,75 @@
+# Live change feed (see app/services/events.py)
+# Both endpoints take `warehouse_id` (repeatable) to narrow the feed, and
+# send one JSON array of events per committed change. A `[{"type": "resync"}]`
+# batch means the client fell behind and should re-fetch what it displays.
+
+import asyncio
+
+import orjson
+from fastapi import APIRouter, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from app.services.events import broker
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+# idle connections get a keep-alive so proxies don't drop them
+HEARTBEAT_SECONDS = 15
+
+
+@router.websocket("/ws")
+async def events_websocket(
+    websocket: WebSocket, warehouse_id: list[int] | None = Query(None)
+):
+    await websocket.accept()
+    subscription = broker.subscribe(warehouse_id)
+    # the client never has to send anything; reading just notices disconnects
+    disconnected = asyncio.ensure_future(websocket.receive_text())
+    try:
+        while True:
+            next_batch = asyncio.ensure_future(subscription.next_batch())
+            done, _ = await asyncio.wait(
+                {next_batch, disconnected},
+                timeout=HEARTBEAT_SECONDS,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if disconnected in done:
+                next_batch.cancel()
+                break
+            if next_batch in done:
+                await websocket.send_text(orjson.dumps(next_batch.result()).decode())
+            else:
+                next_batch.cancel()
+                await websocket.send_text("[]")
+    except WebSocketDisconnect:
+        pass
+    finally:
+        broker.unsubscribe(subscription)
+        disconnected.cancel()
+
+
+@router.get("/stream")
+async def events_stream(request: Request, warehouse_id: list[int] | None = Query(None)):
+    """Server-sent events: one `data:` line per committed batch."""
+    subscription = broker.subscribe(warehouse_id)
+
+    async def stream():
+        try:
+            yield b"retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    batch = await asyncio.wait_for(
+                        subscription.next_batch(), HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                yield b"data: " + orjson.dumps(batch) + b"\n\n"
+        finally:
+            broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,55 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.create_db import (
+    get_async_engine,
+    get_async_session,
+    get_engine,
+    get_replica_engine,
+)
+from app.services import auto_validation, instrumentation
+from app.services.db_pool import pool_status
+from app.services.ref_cache import REFERENCE_CACHES
+from app.services.reports import report_cache
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+@router.get("", response_class=PlainTextResponse)
+async def get_prometheus_metrics():
+    # request latency / query counts per route, see app/services/instrumentation.py
+    return PlainTextResponse(
+        instrumentation.render_prometheus(),
+        media_type="text/plain; version=0.0.4",
+    )
+
+
+@router.get("/pool")
+async def get_pool_metrics():
+    # per uvicorn worker: each worker process has its own pools
+    async_engine, replica_engine = get_async_engine(), get_replica_engine()
+    pools = {
+        "async": pool_status(async_engine.sync_engine),
+        "sync": pool_status(get_engine()),
+    }
+    if replica_engine is not async_engine:
+        pools["replica"] = pool_status(replica_engine.sync_engine)
+    return pools
+
+
+@router.get("/cache")
+async def get_cache_metrics():
+    return {cache.name: cache.stats() for cache in (*REFERENCE_CACHES, report_cache)}
+
+
+@router.get("/auto-validation")
+async def get_auto_validation_metrics(
+    session: AsyncSession = Depends(get_async_session),
+):
+    # `worker` counts this process's runs; `backlog` is read from the database
+    # so it also covers separate `python -m app.worker` processes
+    return {
+        "worker": auto_validation.metrics.as_dict(),
+        "backlog": await session.run_sync(auto_validation.backlog),
+    }
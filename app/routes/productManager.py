@@ -1,19 +1,167 @@
 from fastapi import FastAPI
-from fastapi import APIRouter, HTTPException, Depends
-from app.models.create_db import get_session
+from fastapi import (
+    APIRouter,
+    HTTPException,
+    Depends,
+    Query,
+    Request,
+    UploadFile,
+)
+from fastapi.responses import ORJSONResponse
+from app.models.create_db import (
+    get_async_read_session,
+    get_async_session,
+    get_session,
+)
+from app.services.batch_validation import (
+    BatchValidationIn,
+    select_due,
+    validate_batch,
+)
+from app.services.bulk_transactions import (
+    TransactionLineIn,
+    UnknownProducts,
+    create_bulk_transaction,
+    parse_lines,
+)
+from app.services.events import record_stock_row_event, record_transaction_event
+from app.services.kpi_snapshot import (
+    kpi_snapshot,
+    record_kpi_delta,
+    record_status_change,
+    record_stock_change,
+    stock_state,
+)
+from app.services.ledger import append_entry
+from app.services.low_stock import list_low_stock, record_stock_level
+from app.services.pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    decode_cursor,
+    encode_cursor,
+    set_next_cursor,
+)
+from app.services.product_import import (
+    DEFAULT_CHUNK_SIZE,
+    import_products,
+    iter_records,
+)
+from app.services.ref_cache import build_payload, payload_response, product_cache
+from app.services.reports import report_cache
+from app.services.reservations import release_transaction, reserve_or_wait
+from app.services.sequences import next_reference
+from app.services.stock_history import stock_as_of
+from app.services.stock_movement import (
+    InsufficientStock,
+    adjust,
+    apply_transaction,
+    receive,
+)
 
 from app.models.schemas import *
+from app.models.responses import (
+    LEDGER_COLUMNS,
+    TRANSACTION_COLUMNS,
+    LedgerEntryRead,
+    TransactionRead,
+    rows_response,
+)
+import io
+import logging
+from datetime import datetime, timezone
+from sqlalchemy import exists, tuple_
 from sqlmodel import Session, select
-from typing import List
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import List, Literal
 
 router = APIRouter(prefix="/products", tags=["products"])
+logger = logging.getLogger("app.products")
+
+
+PRODUCT_FIELDS = ("id", "name", "sku", "category", "uom")
+STOCK_FIELDS = ("id", "warehouse_id", "on_hand", "free_to_use", "product_unit_cost")
 
 
 @router.get("/")
-def read_products(session: Session = Depends(get_session)):
-    products = session.exec(select(Product)).all()
-    stock = session.exec(select(Stock)).all()
-    return products, stock
+async def read_products(
+    request: Request,
+    category: str | None = None,
+    warehouse_id: int | None = None,
+    low_stock: float | None = None,
+    ids: list[int] | None = Query(None, max_length=MAX_PAGE_SIZE),
+    fields: str | None = None,
+    cursor: str | None = None,
+    page: int | None = Query(None, ge=1),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    session: AsyncSession = Depends(get_async_read_session),
+):
+    """Product catalog with per-warehouse stock joined server-side.
+
+    - `category` / `warehouse_id` narrow the products (and their stock rows).
+    - `ids` (repeatable) fetches just those products, e.g. the ones a page of
+      transactions refers to.
+    - `low_stock` keeps products with a stock row whose free_to_use is at or
+      below the threshold.
+    - `fields` is a comma separated subset of product fields plus `stock`.
+    - Pages are keyed on product id: pass the `X-Next-Cursor` header back as
+      `cursor`, or use `page` for simple numbered pages.
+    """
+    selected = fields.split(",") if fields else [*PRODUCT_FIELDS, "stock"]
+    unknown = set(selected) - {*PRODUCT_FIELDS, "stock"}
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+        )
+    product_fields = [f for f in PRODUCT_FIELDS if f in selected]
+    # the id is always fetched, it joins stock and builds the cursor
+    columns = [Product.id] + [getattr(Product, f) for f in product_fields if f != "id"]
+
+    warehouse_filters = []
+    if warehouse_id is not None:
+        warehouse_filters.append(Stock.warehouse_id == warehouse_id)
+    stock_filters = list(warehouse_filters)
+    if low_stock is not None:
+        stock_filters.append(Stock.free_to_use <= low_stock)
+
+    query = select(*columns).order_by(Product.id)
+    if category is not None:
+        query = query.where(Product.category == category)
+    if ids:
+        query = query.where(Product.id.in_(ids))
+    if stock_filters:
+        query = query.where(
+            exists().where(Stock.product_id == Product.id, *stock_filters)
+        )
+    if cursor:
+        (after_id,) = decode_cursor(cursor, int)
+        query = query.where(Product.id > after_id)
+    elif page:
+        query = query.offset((page - 1) * limit)
+
+    rows = (await session.execute(query.limit(limit + 1))).all()
+    page_rows = rows[:limit]
+
+    items = [{f: getattr(row, f) for f in product_fields} for row in page_rows]
+
+    if "stock" in selected and page_rows:
+        by_product = {row.id: item for row, item in zip(page_rows, items)}
+        for item in items:
+            item["stock"] = []
+        stock_rows = (
+            await session.execute(
+                select(Stock.product_id, *[getattr(Stock, f) for f in STOCK_FIELDS])
+                .where(Stock.product_id.in_(by_product.keys()), *warehouse_filters)
+                .order_by(Stock.product_id, Stock.warehouse_id)
+            )
+        ).all()
+        for stock_row in stock_rows:
+            by_product[stock_row.product_id]["stock"].append(stock_row._asdict())
+
+    # plain dicts: serialized by orjson directly
+    response = ORJSONResponse(items)
+    if len(rows) > limit:
+        set_next_cursor(request, response, encode_cursor(page_rows[-1].id))
+    return response
 
 
 class ProductStockResponse(SQLModel):
@@ -22,34 +170,67 @@ class ProductStockResponse(SQLModel):
 
 
 @router.post("/")
-def create_product(
+async def create_product(
     product: Product,
     warehouse_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     quantity: float = 0,
 ):
     session.add(product)
-    session.commit()
-    session.refresh(product)
-    print("Product created:", product)
-
-    stock = Stock(
-        warehouse_id=warehouse_id,
-        product_id=product.id,
-        on_hand=quantity,
-        free_to_use=quantity,
-    )
-
-    session.add(stock)
-    session.commit()
-    session.refresh(stock)
-    session.refresh(product)
+    record_kpi_delta(session, total_products=1)
+    await session.commit()
+    await session.refresh(product)
+    product_cache.invalidate(product.id)
+    logger.debug("Product created", extra={"product_id": product.id})
+
+    # opening stock goes through the ledger like any other receipt
+    stock_row = await session.run_sync(receive, warehouse_id, product.id, quantity)
+    await session.commit()
+    stock = await session.get(Stock, stock_row.id)
+    await session.refresh(product)
     return {
         "product": product,
         "stock": stock,
     }
 
 
+# Bulk product import
+# Upload a CSV or NDJSON file of products (see app/services/product_import.py).
+# Products are upserted by sku and stock is seeded per warehouse in chunks;
+# the same pipeline is available offline via `python -m app.cli import-products`.
+# A large import is mostly parsing and validation, so this route stays a sync
+# `def` on the threadpool instead of holding up the event loop.
+
+
+@router.post("/import/")
+def import_products_file(
+    file: UploadFile,
+    warehouse_id: int | None = None,
+    format: Literal["csv", "ndjson"] | None = None,
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=10_000),
+    session: Session = Depends(get_session),
+):
+    if warehouse_id is not None and not session.get(Warehouse, warehouse_id):
+        raise HTTPException(status_code=404, detail="Warehouse not found")
+    fmt = format
+    if fmt is None:
+        fmt = "ndjson" if file.filename.endswith((".ndjson", ".jsonl")) else "csv"
+
+    # the upload is spooled to disk, read it back line by line
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    report = import_products(
+        session,
+        iter_records(stream, fmt),
+        default_warehouse_id=warehouse_id,
+        chunk_size=chunk_size,
+    )
+    kpi_snapshot.rebuild(session)
+    product_cache.invalidate()
+    # categories may have changed
+    report_cache.invalidate()
+    return report
+
+
 # 2. Receipts (Incoming Goods)
 # Used when items arrive from vendors.
 # Process:
@@ -62,32 +243,19 @@ def create_product(
 
 
 @router.post("/create_receipt/")
-def create_receipt(
+async def create_receipt(
     product_id: int,
     supplier: str,
     quantity: float,
     to_warehouse_id: int,
     scheduled_date: Optional[datetime] = None,
     user_id: int = None,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
+    # folded into the stock row's weighted-average cost on validation
+    unit_cost: Optional[float] = Query(default=None, ge=0),
 ):
     type_txn = TxnType.receipt
-    try:
-        last_id_of_receipt_txn = (
-            session.exec(
-                select(Transaction)
-                .where(
-                    Transaction.type == type_txn
-                    and Transaction.to_warehouse == to_warehouse_id
-                )
-                .order_by(Transaction.id.desc())
-            )
-            .first()
-            .id
-        )
-    except AttributeError:
-        last_id_of_receipt_txn = 0
-    reference_number = f"{to_warehouse_id}/IN/{last_id_of_receipt_txn + 1}"
+    reference_number = await session.run_sync(next_reference, to_warehouse_id, type_txn)
     receipt_txn = Transaction(
         type=type_txn,
         status=TxnStatus.ready,
@@ -99,11 +267,15 @@ def create_receipt(
         created_by=user_id,
         product_id=product_id,
         quantity=quantity,
+        unit_cost=unit_cost,
     )
     session.add(receipt_txn)
-    session.commit()
-    session.refresh(receipt_txn)
-    print("Receipt Transaction created:", receipt_txn)
+    record_status_change(session, type_txn, None, receipt_txn.status)
+    await session.flush()
+    record_transaction_event(session, receipt_txn)
+    await session.commit()
+    await session.refresh(receipt_txn)
+    logger.debug("Receipt created", extra={"transaction_id": receipt_txn.id})
     return receipt_txn
 
 
@@ -118,32 +290,19 @@ def create_receipt(
 
 
 @router.post("/create_delivery_order/")
-def create_delivery_order(
+async def create_delivery_order(
     product_id: int,
     quantity: float,
     from_warehouse_id: int,
     scheduled_date: Optional[datetime] = None,
     user_id: int = None,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     delivery_address: Optional[str] = None,
 ):
     type_txn = TxnType.delivery
-    try:
-        last_id_of_delivery_txn = (
-            session.exec(
-                select(Transaction)
-                .where(
-                    Transaction.type == type_txn
-                    and Transaction.from_warehouse == from_warehouse_id
-                )
-                .order_by(Transaction.id.desc())
-            )
-            .first()
-            .id
-        )
-    except AttributeError:
-        last_id_of_delivery_txn = 0
-    reference_number = f"{from_warehouse_id}/OUT/{last_id_of_delivery_txn + 1}"
+    reference_number = await session.run_sync(
+        next_reference, from_warehouse_id, type_txn
+    )
     delivery_txn = Transaction(
         type=type_txn,
         status=TxnStatus.ready,
@@ -157,109 +316,195 @@ def create_delivery_order(
         delivery_address=delivery_address,
     )
     session.add(delivery_txn)
-    session.commit()
-    session.refresh(delivery_txn)
-    print("Delivery Order Transaction created:", delivery_txn)
+    await session.flush()
+    # set the quantity aside now; `waiting` if not enough is free
+    await session.run_sync(reserve_or_wait, delivery_txn)
+    record_status_change(session, type_txn, None, delivery_txn.status)
+    record_transaction_event(session, delivery_txn)
+    await session.commit()
+    await session.refresh(delivery_txn)
+    logger.debug("Delivery order created", extra={"transaction_id": delivery_txn.id})
     return delivery_txn
 
 
-@router.post("validate_transaction/{transaction_id}")
-def validate_transaction(
+# Bulk receipts / delivery orders
+# One transaction with many lines, sent as a JSON array or CSV body
+# (see app/services/bulk_transactions.py). Validating it applies every line
+# in one DB transaction.
+
+
+@router.post("/create_bulk_receipt/")
+async def create_bulk_receipt(
+    supplier: str,
+    to_warehouse_id: int,
+    scheduled_date: Optional[datetime] = None,
+    user_id: int = None,
+    lines: list[TransactionLineIn] = Depends(parse_lines),
+    session: AsyncSession = Depends(get_async_session),
+):
+    receipt_txn = Transaction(
+        type=TxnType.receipt,
+        supplier=supplier,
+        to_warehouse=to_warehouse_id,
+        scheduled_date=scheduled_date,
+        contact="Supplier XYZ",
+        created_by=user_id,
+    )
+    try:
+        await session.run_sync(create_bulk_transaction, receipt_txn, lines)
+    except UnknownProducts as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    await session.commit()
+    await session.refresh(receipt_txn)
+    return {"transaction": receipt_txn, "line_count": len(lines)}
+
+
+@router.post("/create_bulk_delivery_order/")
+async def create_bulk_delivery_order(
+    from_warehouse_id: int,
+    scheduled_date: Optional[datetime] = None,
+    user_id: int = None,
+    delivery_address: Optional[str] = None,
+    lines: list[TransactionLineIn] = Depends(parse_lines),
+    session: AsyncSession = Depends(get_async_session),
+):
+    delivery_txn = Transaction(
+        type=TxnType.delivery,
+        from_warehouse=from_warehouse_id,
+        scheduled_date=scheduled_date,
+        contact="Customer ABC",
+        created_by=user_id,
+        delivery_address=delivery_address,
+    )
+    try:
+        await session.run_sync(create_bulk_transaction, delivery_txn, lines)
+    except UnknownProducts as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    await session.commit()
+    await session.refresh(delivery_txn)
+    return {"transaction": delivery_txn, "line_count": len(lines)}
+
+
+@router.post("/validate_transaction/{transaction_id}")
+async def validate_transaction(
     transaction_id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    transaction = session.get(Transaction, transaction_id)
-    # print(type(transaction.quantity))
+    # locked before any stock row, like batch validation does, so a
+    # transaction cannot be validated twice concurrently
+    transaction = await session.get(Transaction, transaction_id, with_for_update=True)
     if not transaction:
         raise HTTPException(status_code=404, detail="Transaction not found")
 
-    if transaction.status != TxnStatus.ready:
+    if transaction.status not in (TxnStatus.ready, TxnStatus.waiting):
         raise HTTPException(
-            status_code=400, detail="Only 'ready' transactions can be validated"
+            status_code=400,
+            detail="Only 'ready' or 'waiting' transactions can be validated",
         )
 
-    # dont use transaction lines for now, just assume one product per transaction
-    # get product id from transaction id
-    product_id = transaction.product_id
-    quantity = transaction.quantity
-    if transaction.type == TxnType.receipt:
-        stock = session.exec(
-            select(Stock).where(
-                (Stock.product_id == product_id)
-                & (Stock.warehouse_id == transaction.to_warehouse)
-            )
-        ).first()
-        if stock:
-            print("Existing stock found:", stock)
-            stock.on_hand += float(quantity)
-            stock.free_to_use += float(quantity)
-            session.add(stock)
-        else:
-            stock = Stock(
-                warehouse_id=transaction.to_warehouse,
-                product_id=product_id,
-                on_hand=quantity,
-                free_to_use=quantity,
-            )
-            session.add(stock)
-        transaction.status = TxnStatus.done
-        session.add(transaction)
-        session.commit()
-        session.refresh(transaction)
-        print("Receipt transaction validated and stock updated:", transaction)
-        return transaction
-    elif transaction.type == TxnType.delivery:
-        stock = session.exec(
-            select(Stock).where(
-                (Stock.product_id == product_id)
-                & (Stock.warehouse_id == transaction.from_warehouse)
-            )
-        ).first()
-        if not stock or stock.free_to_use < quantity:
+    try:
+        await session.run_sync(apply_transaction, transaction)
+    except InsufficientStock:
+        await session.rollback()
+        raise HTTPException(status_code=400, detail="Insufficient stock for delivery")
+    await session.commit()
+    await session.refresh(transaction)
+    logger.debug("Transaction validated", extra={"transaction_id": transaction.id})
+    return transaction
+
+
+@router.post("/validate_transactions/")
+async def validate_transactions(
+    batch: BatchValidationIn,
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Validate many transactions at once, e.g. at the end of a shift.
+
+    Pass `transaction_ids`, or a filter (`warehouse_id`, `type`,
+    `scheduled_before`) over ready / waiting transactions. Each transaction
+    succeeds or fails on its own; see app/services/batch_validation.py.
+    """
+    transaction_ids = batch.transaction_ids
+    if transaction_ids is None:
+        filters = (batch.warehouse_id, batch.type, batch.scheduled_before)
+        if all(value is None for value in filters):
             raise HTTPException(
-                status_code=400, detail="Insufficient stock for delivery"
+                status_code=400,
+                detail="transaction_ids or at least one filter is required",
             )
-        stock.on_hand -= quantity
-        stock.free_to_use -= quantity
-        session.add(stock)
-        transaction.status = TxnStatus.done
-        session.add(transaction)
-        session.commit()
-        session.refresh(transaction)
-        print("Delivery order transaction validated and stock updated:", transaction)
-        return transaction
-
-
-@router.get("/all-receipts/")
-def get_all_receipts(warehouse_id: int, session: Session = Depends(get_session)):
-    receipts = session.exec(
-        select(Transaction).where(
+        transaction_ids = await session.run_sync(
+            select_due,
+            batch.warehouse_id,
+            batch.type,
+            batch.scheduled_before,
+            batch.limit,
+        )
+    result = await session.run_sync(validate_batch, transaction_ids)
+    await session.commit()
+    return result.as_dict()
+
+
+@router.post("/cancel_transaction/{transaction_id}")
+async def cancel_transaction(
+    transaction_id: int,
+    session: AsyncSession = Depends(get_async_session),
+):
+    transaction = await session.get(Transaction, transaction_id, with_for_update=True)
+    if not transaction:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+
+    if transaction.status in (TxnStatus.done, TxnStatus.canceled):
+        raise HTTPException(
+            status_code=400, detail=f"Transaction is already {transaction.status.value}"
+        )
+
+    record_status_change(
+        session, transaction.type, transaction.status, TxnStatus.canceled
+    )
+    transaction.status = TxnStatus.canceled
+    session.add(transaction)
+    # give the reserved quantities back in the same DB transaction
+    await session.run_sync(release_transaction, transaction.id)
+    record_transaction_event(session, transaction)
+    await session.commit()
+    await session.refresh(transaction)
+    return transaction
+
+
+@router.get("/all-receipts/", response_model=list[TransactionRead])
+async def get_all_receipts(
+    warehouse_id: int, session: AsyncSession = Depends(get_async_read_session)
+):
+    receipts = await session.execute(
+        select(*TRANSACTION_COLUMNS).where(
             (Transaction.type == TxnType.receipt)
             & (Transaction.to_warehouse == warehouse_id)
         )
-    ).all()
-    return receipts
+    )
+    return rows_response(receipts)
 
 
-@router.get("/all-deliveries/")
-def get_all_deliveries(warehouse_id: int, session: Session = Depends(get_session)):
-    deliveries = session.exec(
-        select(Transaction).where(
+@router.get("/all-deliveries/", response_model=list[TransactionRead])
+async def get_all_deliveries(
+    warehouse_id: int, session: AsyncSession = Depends(get_async_read_session)
+):
+    deliveries = await session.execute(
+        select(*TRANSACTION_COLUMNS).where(
             (Transaction.type == TxnType.delivery)
             & (Transaction.from_warehouse == warehouse_id)
         )
-    ).all()
-    return deliveries
+    )
+    return rows_response(deliveries)
 
 
 @router.post("/update_cost_stock/")
-def update_cost_stock(
+async def update_cost_stock(
     product_id: int,
     warehouse_id: int | None = None,
     product_unit_cost: float | None = None,
     on_hand: float | None = None,
     free_to_use: float | None = None,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     """Update a product's unit cost and/or stock quantities.
 
@@ -268,6 +513,10 @@ def update_cost_stock(
     - `on_hand` / `free_to_use` (optional): quantity updates. These require `warehouse_id` to be provided.
       If the stock row for the given warehouse does not exist it will be created.
 
+    Validated receipts and transfers already keep `product_unit_cost` as a
+    weighted average (see app/services/stock_movement.py); setting it here is a
+    manual correction.
+
     Returns the updated/created Stock records.
     """
     updated = []
@@ -276,28 +525,36 @@ def update_cost_stock(
     if product_unit_cost is not None:
         if warehouse_id is None:
             # update all stock rows for this product
-            stocks = session.exec(
-                select(Stock).where(Stock.product_id == product_id)
+            stocks = (
+                await session.exec(select(Stock).where(Stock.product_id == product_id))
             ).all()
             for s in stocks:
+                before = stock_state(s)
                 s.product_unit_cost = product_unit_cost
                 session.add(s)
-            session.commit()
+                record_stock_change(session, before, stock_state(s))
+                record_stock_row_event(session, s)
+            await session.commit()
             for s in stocks:
-                session.refresh(s)
+                await session.refresh(s)
                 updated.append(s)
         else:
-            stock_item = session.exec(
-                select(Stock).where(
-                    (Stock.product_id == product_id)
-                    & (Stock.warehouse_id == warehouse_id)
+            stock_item = (
+                await session.exec(
+                    select(Stock).where(
+                        (Stock.product_id == product_id)
+                        & (Stock.warehouse_id == warehouse_id)
+                    )
                 )
             ).first()
             if stock_item:
+                before = stock_state(stock_item)
                 stock_item.product_unit_cost = product_unit_cost
                 session.add(stock_item)
-                session.commit()
-                session.refresh(stock_item)
+                record_stock_change(session, before, stock_state(stock_item))
+                record_stock_row_event(session, stock_item)
+                await session.commit()
+                await session.refresh(stock_item)
                 updated.append(stock_item)
             else:
                 # create new stock row with provided cost
@@ -309,8 +566,11 @@ def update_cost_stock(
                     free_to_use=0,
                 )
                 session.add(new_stock)
-                session.commit()
-                session.refresh(new_stock)
+                record_stock_change(session, None, stock_state(new_stock))
+                record_stock_row_event(session, new_stock)
+                record_stock_level(session, warehouse_id, product_id)
+                await session.commit()
+                await session.refresh(new_stock)
                 updated.append(new_stock)
 
     # Update quantities (require warehouse)
@@ -320,9 +580,14 @@ def update_cost_stock(
                 status_code=400, detail="warehouse_id is required to update quantities"
             )
 
-        stock_item = session.exec(
-            select(Stock).where(
-                (Stock.product_id == product_id) & (Stock.warehouse_id == warehouse_id)
+        stock_item = (
+            await session.exec(
+                select(Stock)
+                .where(
+                    (Stock.product_id == product_id)
+                    & (Stock.warehouse_id == warehouse_id)
+                )
+                .with_for_update()
             )
         ).first()
 
@@ -338,20 +603,40 @@ def update_cost_stock(
                 free_to_use=free_to_use if free_to_use is not None else 0,
             )
             session.add(stock_item)
-            session.commit()
-            session.refresh(stock_item)
+            record_stock_change(session, None, stock_state(stock_item))
+            record_stock_row_event(session, stock_item)
+            record_stock_level(session, warehouse_id, product_id)
+            await session.run_sync(
+                append_entry, warehouse_id, product_id, stock_item.on_hand
+            )
+            await session.commit()
+            await session.refresh(stock_item)
             updated.append(stock_item)
         else:
+            before = stock_state(stock_item)
             if on_hand is not None:
+                # a manual correction is still a movement: log the difference
+                await session.run_sync(
+                    append_entry, warehouse_id, product_id, on_hand - stock_item.on_hand
+                )
                 stock_item.on_hand = on_hand
             if free_to_use is not None:
                 stock_item.free_to_use = free_to_use
+            elif on_hand is not None:
+                # keep what is reserved out of free_to_use
+                stock_item.free_to_use += on_hand - before[0]
             # If product_unit_cost was provided earlier for same warehouse, it will already be set
             session.add(stock_item)
-            session.commit()
-            session.refresh(stock_item)
+            record_stock_change(session, before, stock_state(stock_item))
+            record_stock_row_event(session, stock_item)
+            record_stock_level(session, warehouse_id, product_id)
+            await session.commit()
+            await session.refresh(stock_item)
             updated.append(stock_item)
 
+    product_cache.invalidate(product_id)
+    # a cost edit moves no stock, the cached valuation would not notice
+    report_cache.invalidate()
     return updated
 
 
@@ -365,36 +650,25 @@ def update_cost_stock(
 
 
 @router.post("/create_internal_transfer/")
-def create_internal_transfer(
+async def create_internal_transfer(
     product_id: int,
     quantity: float,
     from_warehouse_id: int,
     to_warehouse_id: int,
     scheduled_date: Optional[datetime] = None,
     user_id: int = None,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     type_txn = TxnType.internal_adjustment
-    try:
-        last_id_of_internal_txn = (
-            session.exec(
-                select(Transaction)
-                .where(
-                    Transaction.type == type_txn
-                    and Transaction.from_warehouse == from_warehouse_id
-                    and Transaction.to_warehouse == to_warehouse_id
-                )
-                .order_by(Transaction.id.desc())
-            )
-            .first()
-            .id
-        )
-    except AttributeError:
-        last_id_of_internal_txn = 0
-    reference_number = f"{from_warehouse_id}/INT/{last_id_of_internal_txn + 1}"
+    reference_number = await session.run_sync(
+        next_reference, from_warehouse_id, type_txn
+    )
+    if scheduled_date is not None and scheduled_date.tzinfo is not None:
+        scheduled_date = scheduled_date.astimezone(timezone.utc).replace(tzinfo=None)
+    scheduled = scheduled_date is not None and scheduled_date > datetime.utcnow()
     internal_txn = Transaction(
         type=type_txn,
-        status=TxnStatus.ready,
+        status=TxnStatus.waiting if scheduled else TxnStatus.ready,
         from_warehouse=from_warehouse_id,
         to_warehouse=to_warehouse_id,
         reference_number=reference_number,
@@ -405,66 +679,28 @@ def create_internal_transfer(
         quantity=quantity,
     )
     session.add(internal_txn)
-    session.commit()
-    session.refresh(internal_txn)
-    print("Internal Transfer Transaction created:", internal_txn)
-    # add in StockLedger
-    ledger_entry = StockLedger(
-        product_id=product_id,
-        warehouse_id=from_warehouse_id,
-        quantity_change=-quantity,
-        created_at=datetime.utcnow(),
-        transaction_id=internal_txn.id,
-    )
-    ledger_entry2 = StockLedger(
-        product_id=product_id,
-        warehouse_id=to_warehouse_id,
-        quantity_change=quantity,
-        created_at=datetime.utcnow(),
-        transaction_id=internal_txn.id,
-    )
-    session.add(ledger_entry)
-    session.add(ledger_entry2)
-    session.commit()
-    session.refresh(ledger_entry)
-    print("Stock Ledger entry created for internal transfer:", ledger_entry)
-    # update stock levels for both warehouses
-    # Deduct from source warehouse
-    source_stock = session.exec(
-        select(Stock).where(
-            (Stock.product_id == product_id) & (Stock.warehouse_id == from_warehouse_id)
-        )
-    ).first()
-    if not source_stock or source_stock.free_to_use < quantity:
+    record_status_change(session, type_txn, None, internal_txn.status)
+    await session.flush()
+
+    if scheduled:
+        # runs when validated; until then the quantity is only reserved
+        await session.run_sync(reserve_or_wait, internal_txn)
+        record_transaction_event(session, internal_txn)
+        await session.commit()
+        await session.refresh(internal_txn)
+        return internal_txn
+
+    # move the stock and log both legs in the same DB transaction
+    try:
+        await session.run_sync(apply_transaction, internal_txn)
+    except InsufficientStock:
+        await session.rollback()
         raise HTTPException(
             status_code=400, detail="Insufficient stock for internal transfer"
         )
-    source_stock.on_hand -= quantity
-    source_stock.free_to_use -= quantity
-    session.add(source_stock)
-    # Add to destination warehouse
-    dest_stock = session.exec(
-        select(Stock).where(
-            (Stock.product_id == product_id) & (Stock.warehouse_id == to_warehouse_id)
-        )
-    ).first()
-    if dest_stock:
-        dest_stock.on_hand += quantity
-        dest_stock.free_to_use += quantity
-        session.add(dest_stock)
-    else:
-        dest_stock = Stock(
-            warehouse_id=to_warehouse_id,
-            product_id=product_id,
-            on_hand=quantity,
-            free_to_use=quantity,
-        )
-        session.add(dest_stock)
-
-    session.add(ledger_entry)
-    session.commit()
-    session.refresh(ledger_entry)
-    print("Stock Ledger entry created for internal transfer:", ledger_entry)
+    await session.commit()
+    await session.refresh(internal_txn)
+    logger.debug("Internal transfer created", extra={"transaction_id": internal_txn.id})
     return internal_txn
 
 
@@ -479,41 +715,28 @@ def create_internal_transfer(
 
 
 @router.post("/adjust_stock/")
-def adjust_stock(
+async def adjust_stock(
     product: Product,
     warehouse_id: int,
     counted_qty: float,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
-    stock = session.exec(
-        select(Stock).where(
-            (Stock.product_id == product.id) & (Stock.warehouse_id == warehouse_id)
-        )
-    ).first()
+    stock, system_qty, adjustment_qty = await session.run_sync(
+        adjust, warehouse_id, product.id, counted_qty
+    )
     if not stock:
         raise HTTPException(status_code=404, detail="Stock record not found")
 
-    system_qty = stock.on_hand
-    adjustment_qty = counted_qty - system_qty
-
-    stock.on_hand = counted_qty
-    stock.free_to_use += adjustment_qty
-    session.add(stock)
-    session.commit()
-    session.refresh(stock)
-
-    # Log adjustment in StockLedger
-    ledger_entry = StockLedger(
-        product_id=product.id,
-        warehouse_id=warehouse_id,
-        quantity=adjustment_qty,
-        entry_date=datetime.utcnow(),
-        adjustment=True,
+    # the ledger entry is written by adjust() in the same transaction
+    await session.commit()
+    logger.debug(
+        "Stock adjusted",
+        extra={
+            "product_id": product.id,
+            "warehouse_id": warehouse_id,
+            "adjustment_qty": adjustment_qty,
+        },
     )
-    session.add(ledger_entry)
-    session.commit()
-    session.refresh(ledger_entry)
-    print("Stock adjusted and ledger entry created:", ledger_entry)
 
     return {
         "product": product,
@@ -524,18 +747,170 @@ def adjust_stock(
     }
 
 
-@router.get("/stock_ledger/")
-def get_stock_ledger(
-    warehouse_id: int,
-    session: Session = Depends(get_session),
+@router.get("/stock_ledger/", response_model=list[LedgerEntryRead])
+async def get_stock_ledger(
+    request: Request,
+    warehouse_id: int | None = None,
+    product_id: int | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    session: AsyncSession = Depends(get_async_read_session),
 ):
-    ledger_entries = session.exec(
-        select(StockLedger).where(
-            (StockLedger.from_warehouse_id == warehouse_id)
-            | (StockLedger.to_warehouse_id == warehouse_id)
+    """Ledger entries newest first for a warehouse and/or product.
+
+    Reads a range of the (warehouse_id, created_at) or (product_id, created_at)
+    index; `since`/`until` bound the time range and the next page's cursor is
+    returned in the `X-Next-Cursor` header.
+    """
+    if warehouse_id is None and product_id is None:
+        raise HTTPException(
+            status_code=400, detail="warehouse_id or product_id is required"
         )
-    ).all()
-    return ledger_entries
+
+    query = select(*LEDGER_COLUMNS).order_by(
+        StockLedger.created_at.desc(), StockLedger.id.desc()
+    )
+    if warehouse_id is not None:
+        query = query.where(StockLedger.warehouse_id == warehouse_id)
+    if product_id is not None:
+        query = query.where(StockLedger.product_id == product_id)
+    if since is not None:
+        query = query.where(StockLedger.created_at >= since)
+    if until is not None:
+        query = query.where(StockLedger.created_at < until)
+    if cursor:
+        after = decode_cursor(cursor, datetime, int)
+        query = query.where(tuple_(StockLedger.created_at, StockLedger.id) < after)
+
+    rows = (await session.execute(query.limit(limit + 1))).all()
+    page = rows[:limit]
+    response = rows_response(page)
+    if len(rows) > limit:
+        last = page[-1]
+        set_next_cursor(request, response, encode_cursor(last.created_at, last.id))
+    return response
+
+
+@router.get("/stock_as_of/")
+async def get_stock_as_of(
+    as_of: datetime,
+    warehouse_id: int | None = None,
+    product_id: int | None = None,
+    session: AsyncSession = Depends(get_async_read_session),
+):
+    """On-hand quantities per (warehouse, product) at `as_of`.
+
+    Starts from the newest ledger checkpoint at or before `as_of` and replays
+    only the ledger entries recorded after it.
+    """
+    if warehouse_id is None and product_id is None:
+        raise HTTPException(
+            status_code=400, detail="warehouse_id or product_id is required"
+        )
+    return await session.run_sync(stock_as_of, as_of, warehouse_id, product_id)
+
+
+# Reordering rules
+# A min/max level per (warehouse, product). A stock row whose free_to_use is
+# at or below its minimum (LOW_STOCK_THRESHOLD without a rule) is flagged as
+# low stock; see app/services/low_stock.py.
+
+
+@router.get("/reorder-rules/")
+async def get_reorder_rules(
+    warehouse_id: int | None = None,
+    session: AsyncSession = Depends(get_async_read_session),
+):
+    query = select(ReorderRule).order_by(
+        ReorderRule.warehouse_id, ReorderRule.product_id
+    )
+    if warehouse_id is not None:
+        query = query.where(ReorderRule.warehouse_id == warehouse_id)
+    return (await session.exec(query)).all()
+
+
+@router.post("/reorder-rules/")
+async def set_reorder_rule(
+    rule: ReorderRule,
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Create or replace the rule of a (warehouse, product)."""
+    if rule.max_qty is not None and rule.max_qty < rule.min_qty:
+        raise HTTPException(status_code=400, detail="max_qty must be >= min_qty")
+
+    # the stock row is locked like any movement so its flag refresh is serialized
+    await session.exec(
+        select(Stock.id)
+        .where(
+            (Stock.warehouse_id == rule.warehouse_id)
+            & (Stock.product_id == rule.product_id)
+        )
+        .with_for_update()
+    )
+    existing = (
+        await session.exec(
+            select(ReorderRule).where(
+                (ReorderRule.warehouse_id == rule.warehouse_id)
+                & (ReorderRule.product_id == rule.product_id)
+            )
+        )
+    ).first()
+    if existing:
+        existing.min_qty = rule.min_qty
+        existing.max_qty = rule.max_qty
+        rule = existing
+    else:
+        rule.id = None
+    session.add(rule)
+    record_stock_level(session, rule.warehouse_id, rule.product_id)
+    await session.commit()
+    await session.refresh(rule)
+    return rule
+
+
+@router.delete("/reorder-rules/{rule_id}")
+async def delete_reorder_rule(
+    rule_id: int,
+    session: AsyncSession = Depends(get_async_session),
+):
+    rule = await session.get(ReorderRule, rule_id)
+    if not rule:
+        raise HTTPException(status_code=404, detail="Reorder rule not found")
+    await session.delete(rule)
+    record_stock_level(session, rule.warehouse_id, rule.product_id)
+    await session.commit()
+    return {"deleted": rule_id}
+
+
+@router.get("/low-stock/")
+async def get_low_stock(
+    warehouse_id: int | None = None,
+    session: AsyncSession = Depends(get_async_read_session),
+):
+    """Low-stock rows with `suggested_qty`, what to order to reach max (or min)."""
+    return await session.run_sync(list_low_stock, warehouse_id)
+
+
+# declared last so the fixed paths above take precedence
+@router.get("/{product_id}")
+async def read_product(
+    product_id: int,
+    request: Request,
+    session: AsyncSession = Depends(get_async_read_session),
+):
+    # cached reference data (app/services/ref_cache.py); misses read the
+    # replica, or the primary for a client reading its own writes
+    payload = product_cache.get(product_id)
+    if payload is None:
+        generation = product_cache.generation
+        product = await session.get(Product, product_id)
+        if not product:
+            raise HTTPException(status_code=404, detail="Product not found")
+        payload = build_payload(product)
+        product_cache.set(product_id, payload, generation)
+    return payload_response(request, payload)
 
 
 # get all stock and products in a warehouse
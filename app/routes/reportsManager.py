@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.create_db import get_async_read_session
+from app.services.reports import inventory_aging, stock_valuation
+
+router = APIRouter(prefix="/reports", tags=["Reports"])
+
+
+# cached until stock moves, see app/services/reports.py
+@router.get("/valuation")
+async def get_stock_valuation(
+    warehouse_id: int | None = None,
+    session: AsyncSession = Depends(get_async_read_session),
+):
+    return await session.run_sync(stock_valuation, warehouse_id)
+
+
+@router.get("/aging")
+async def get_inventory_aging(
+    warehouse_id: int | None = None,
+    session: AsyncSession = Depends(get_async_read_session),
+):
+    return await session.run_sync(inventory_aging, warehouse_id)
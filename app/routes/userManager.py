@@ -1,21 +1,24 @@
 # user registration
 
 from fastapi import APIRouter, HTTPException, Depends
-from app.models.create_db import get_session
+from app.models.create_db import get_async_session
 
 from app.models.schemas import User
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import List
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 
 @router.post("/", response_model=User)
-def create_user(user: User, session: Session = Depends(get_session)):
-    existing_user = session.exec(select(User).where(User.email == user.email)).first()
+async def create_user(user: User, session: AsyncSession = Depends(get_async_session)):
+    existing_user = (
+        await session.exec(select(User).where(User.email == user.email))
+    ).first()
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     session.add(user)
-    session.commit()
-    session.refresh(user)
+    await session.commit()
+    await session.refresh(user)
     return user
@@ -1,27 +1,39 @@
 from fastapi import FastAPI
 from app.models.schemas import *
 
-from fastapi import APIRouter, HTTPException, Depends
-from app.models.create_db import get_session
+from fastapi import APIRouter, HTTPException, Depends, Request
+from app.models.create_db import get_async_read_session, get_async_session
+from app.services.ref_cache import build_payload, payload_response, warehouse_cache
 
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import List
 
 router = APIRouter(prefix="/warehouses", tags=["warehouses"])
 
 
 @router.get("/")
-def read_warehouses(session: Session = Depends(get_session)):
-    warehouses = session.exec(select(Warehouse)).all()
-    return list(warehouses)
+async def read_warehouses(
+    request: Request, session: AsyncSession = Depends(get_async_read_session)
+):
+    # cached reference data (app/services/ref_cache.py); misses read the
+    # replica, or the primary for a client reading its own writes
+    payload = warehouse_cache.get("all")
+    if payload is None:
+        generation = warehouse_cache.generation
+        warehouses = (await session.exec(select(Warehouse))).all()
+        payload = build_payload(list(warehouses))
+        warehouse_cache.set("all", payload, generation)
+    return payload_response(request, payload)
 
 
 @router.post("/")
-def create_warehouse(
+async def create_warehouse(
     warehouse: Warehouse,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
 ):
     session.add(warehouse)
-    session.commit()
-    session.refresh(warehouse)
+    await session.commit()
+    await session.refresh(warehouse)
+    warehouse_cache.invalidate()
     return warehouse
@@ -0,0 +1,172 @@
+# Scheduled auto-validation
+# Transactions whose scheduled_date has passed are validated without anyone
+# clicking through them. Each run claims a batch of due transactions with
+# FOR UPDATE SKIP LOCKED, so any number of workers (the in-app periodic job
+# and/or `python -m app.worker` processes) can poll the same table without
+# validating anything twice or waiting on each other, and validates them
+# through app/services/batch_validation.py in the same DB transaction.
+#
+# A transaction that fails (not enough stock) is skipped by this process for
+# AUTO_VALIDATE_RETRY_SECONDS so it cannot starve the ones behind it.
+#
+# On SQLite there are no row locks; run a single worker there.
+
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import func, select
+from sqlmodel import Session
+
+from app.models.schemas import Transaction
+from app.services.batch_validation import VALIDATABLE_STATUSES, validate_batch
+from app.settings import get_settings
+
+
+class AutoValidationMetrics:
+    """Counters of the runs made by this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.validated = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.last_run_at: datetime | None = None
+        self.last_batch_size = 0
+        self.last_batch_seconds = 0.0
+        # scheduled_date -> validation delay of the most overdue transaction
+        self.last_max_lag_seconds = 0.0
+        self.max_lag_seconds = 0.0
+
+    def record(self, validated: int, failed: int, seconds: float, lag: float):
+        with self._lock:
+            self.runs += 1
+            self.validated += validated
+            self.failed += failed
+            self.busy_seconds += seconds
+            self.last_run_at = datetime.utcnow()
+            self.last_batch_size = validated + failed
+            self.last_batch_seconds = seconds
+            self.last_max_lag_seconds = lag
+            self.max_lag_seconds = max(self.max_lag_seconds, lag)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "runs": self.runs,
+                "validated": self.validated,
+                "failed": self.failed,
+                "validated_per_busy_second": (
+                    round(self.validated / self.busy_seconds, 1)
+                    if self.busy_seconds
+                    else 0.0
+                ),
+                "last_run_at": self.last_run_at,
+                "last_batch_size": self.last_batch_size,
+                "last_batch_seconds": round(self.last_batch_seconds, 4),
+                "last_max_lag_seconds": round(self.last_max_lag_seconds, 3),
+                "max_lag_seconds": round(self.max_lag_seconds, 3),
+            }
+
+
+metrics = AutoValidationMetrics()
+# transaction id -> monotonic time before which it is not retried
+_retry_after: dict[int, float] = {}
+
+
+def _due(now: datetime):
+    return (
+        Transaction.status.in_(VALIDATABLE_STATUSES),
+        Transaction.scheduled_date <= now,
+    )
+
+
+def claim_due(
+    session: Session, now: datetime, limit: int, skip: set[int] = frozenset()
+) -> list[tuple[int, datetime]]:
+    """Lock up to `limit` due transactions nobody else holds, most overdue first."""
+    query = (
+        select(Transaction.id, Transaction.scheduled_date)
+        .where(*_due(now))
+        .order_by(Transaction.scheduled_date, Transaction.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    if skip:
+        query = query.where(Transaction.id.not_in(skip))
+    return [tuple(row) for row in session.execute(query)]
+
+
+def run_once(session: Session, limit: int | None = None) -> dict:
+    """Claim and validate one batch of due transactions, then commit."""
+    settings = get_settings()
+    limit = limit or settings.AUTO_VALIDATE_BATCH
+    started = time.perf_counter()
+    now = datetime.utcnow()
+
+    clock = time.monotonic()
+    for transaction_id in [t for t, until in _retry_after.items() if until <= clock]:
+        del _retry_after[transaction_id]
+
+    claimed = claim_due(session, now, limit, set(_retry_after))
+    if not claimed:
+        session.rollback()
+        return {"claimed": 0, "validated": 0, "failed": 0}
+
+    result = validate_batch(session, [transaction_id for transaction_id, _ in claimed])
+    session.commit()
+
+    for transaction_id in result.failed:
+        _retry_after[transaction_id] = clock + settings.AUTO_VALIDATE_RETRY_SECONDS
+    finished = datetime.utcnow()
+    validated = set(result.validated)
+    lag = max(
+        (
+            (finished - scheduled_date).total_seconds()
+            for transaction_id, scheduled_date in claimed
+            if transaction_id in validated
+        ),
+        default=0.0,
+    )
+    metrics.record(
+        len(result.validated), len(result.failed), time.perf_counter() - started, lag
+    )
+    return {
+        "claimed": len(claimed),
+        "validated": len(result.validated),
+        "failed": len(result.failed),
+    }
+
+
+def run_until_idle(session: Session, limit: int | None = None) -> int:
+    """Keep running batches while full ones come back; returns validated count."""
+    limit = limit or get_settings().AUTO_VALIDATE_BATCH
+    total = 0
+    while True:
+        run = run_once(session, limit)
+        total += run["validated"]
+        if run["claimed"] < limit or not run["validated"]:
+            return total
+
+
+def backlog(session: Session, now: datetime | None = None) -> dict:
+    """What is due right now, across all workers."""
+    now = now or datetime.utcnow()
+    count, oldest = session.execute(
+        select(func.count(), func.min(Transaction.scheduled_date)).where(*_due(now))
+    ).one()
+    return {
+        "due": count,
+        "oldest_due_lag_seconds": (
+            round((now - oldest).total_seconds(), 3) if oldest else 0.0
+        ),
+    }
+
+
+def auto_validate():
+    """Periodic job: validate what is due with its own session."""
+    from app.models.create_db import engine
+
+    with Session(engine) as session:
+        run_until_idle(session)
@@ -0,0 +1,469 @@
+# Batch validation
+# Validates many transactions in one DB transaction with a fixed number of
+# statements, however many transactions there are:
+#   1. lock the transactions (by id) and read their lines and reservations
+#   2. create missing destination stock rows, then lock every affected Stock
+#      row in (warehouse_id, product_id) order, the order every multi-row
+#      movement locks in (stock_movement.lock_stock)
+#   3. walk the transactions in id order against the locked balances in
+#      Python; one short of stock fails alone, the rest still go through,
+#      and incoming stock is folded into each row's weighted-average cost
+#   4. write the net stock change and new cost per row, the ledger rows, the
+#      consumed reservations and the `done` statuses with one executemany /
+#      IN each
+# The effect per transaction is the same as stock_movement.apply_transaction.
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import bindparam, func, insert, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Field, Session, SQLModel
+
+from app.models.schemas import (
+    Reservation,
+    ReservationStatus,
+    Stock,
+    Transaction,
+    TransactionLine,
+    TxnStatus,
+    TxnType,
+)
+from app.services.events import record_stock_event, record_transaction_event
+from app.services.kpi_snapshot import record_status_change, record_stock_change
+from app.services.ledger import append_entries
+from app.services.low_stock import record_stock_level
+from app.services.stock_movement import average_cost, line_unit_costs
+
+MAX_BATCH_SIZE = 5_000
+VALIDATABLE_STATUSES = (TxnStatus.ready, TxnStatus.waiting)
+
+_stock = Stock.__table__
+_transaction = Transaction.__table__
+_reservation = Reservation.__table__
+
+_SHIFT = (
+    update(_stock)
+    .where(_stock.c.id == bindparam("stock_id"))
+    .values(
+        on_hand=_stock.c.on_hand + bindparam("delta"),
+        free_to_use=_stock.c.free_to_use + bindparam("free_delta"),
+        product_unit_cost=bindparam("unit_cost"),
+    )
+)
+
+
+class BatchValidationIn(SQLModel):
+    """Either explicit ids or a filter over ready / waiting transactions."""
+
+    transaction_ids: Optional[list[int]] = Field(
+        default=None, max_length=MAX_BATCH_SIZE
+    )
+    warehouse_id: Optional[int] = None
+    type: Optional[TxnType] = None
+    # e.g. now: everything that is due
+    scheduled_before: Optional[datetime] = None
+    limit: int = Field(default=MAX_BATCH_SIZE, gt=0, le=MAX_BATCH_SIZE)
+
+
+@dataclass
+class _Move:
+    warehouse_id: int
+    product_id: int
+    delta: float
+    free_delta: float
+    # incoming stock: its unit cost, or the stock row it comes from (transfers)
+    unit_cost: float | None = None
+    cost_from: tuple | None = None
+
+
+@dataclass
+class _Balance:
+    stock_id: int
+    on_hand: float
+    free_to_use: float
+    unit_cost: float
+    delta: float = 0
+    free_delta: float = 0
+    new_cost: float | None = None
+
+    def state(self, applied: bool = True) -> tuple[float, float, float]:
+        if not applied:
+            return (self.on_hand, self.free_to_use, self.unit_cost)
+        return (
+            self.on_hand + self.delta,
+            self.free_to_use + self.free_delta,
+            self.unit_cost if self.new_cost is None else self.new_cost,
+        )
+
+    def receive(self, quantity: float, unit_cost: float):
+        on_hand, _, cost = self.state()
+        self.new_cost = average_cost(on_hand, cost, quantity, unit_cost)
+
+
+@dataclass
+class BatchResult:
+    validated: list[int] = field(default_factory=list)
+    failed: dict[int, str] = field(default_factory=dict)
+
+    def as_dict(self) -> dict:
+        results = [{"id": id, "status": "done"} for id in self.validated]
+        results += [
+            {"id": id, "status": "failed", "detail": detail}
+            for id, detail in self.failed.items()
+        ]
+        results.sort(key=lambda result: result["id"])
+        return {
+            "validated": len(self.validated),
+            "failed": len(self.failed),
+            "results": results,
+        }
+
+
+def _moves(
+    transaction, quantities: dict, reserved: dict, unit_costs: dict
+) -> list[_Move]:
+    moves = []
+    for product_id, quantity in quantities.items():
+        if transaction.type in (TxnType.delivery, TxnType.internal_adjustment):
+            unreserved = quantity - reserved.get(product_id, 0)
+            moves.append(
+                _Move(transaction.from_warehouse, product_id, -quantity, -unreserved)
+            )
+        if transaction.type == TxnType.receipt:
+            moves.append(
+                _Move(
+                    transaction.to_warehouse,
+                    product_id,
+                    quantity,
+                    quantity,
+                    unit_cost=unit_costs.get(product_id),
+                )
+            )
+        elif transaction.type == TxnType.internal_adjustment:
+            moves.append(
+                _Move(
+                    transaction.to_warehouse,
+                    product_id,
+                    quantity,
+                    quantity,
+                    cost_from=(transaction.from_warehouse, product_id),
+                )
+            )
+    return moves
+
+
+def _load_quantities(session: Session, transactions) -> dict[int, dict[int, float]]:
+    quantities = {
+        transaction.id: {transaction.product_id: float(transaction.quantity)}
+        for transaction in transactions
+        if transaction.product_id is not None
+    }
+    multi_line = [t.id for t in transactions if t.product_id is None]
+    if multi_line:
+        rows = session.execute(
+            select(
+                TransactionLine.transaction_id,
+                TransactionLine.product_id,
+                func.sum(TransactionLine.quantity),
+            )
+            .where(TransactionLine.transaction_id.in_(multi_line))
+            .group_by(TransactionLine.transaction_id, TransactionLine.product_id)
+        )
+        for transaction_id, product_id, quantity in rows:
+            quantities.setdefault(transaction_id, {})[product_id] = float(quantity)
+    return quantities
+
+
+def _load_unit_costs(session: Session, transactions) -> dict[int, dict[int, float]]:
+    receipts = [t for t in transactions if t.type == TxnType.receipt]
+    unit_costs = {
+        transaction.id: {transaction.product_id: transaction.unit_cost}
+        for transaction in receipts
+        if transaction.product_id is not None and transaction.unit_cost is not None
+    }
+    multi_line = [t.id for t in receipts if t.product_id is None]
+    if multi_line:
+        for (transaction_id, product_id), cost in line_unit_costs(
+            session, multi_line
+        ).items():
+            unit_costs.setdefault(transaction_id, {})[product_id] = cost
+    return unit_costs
+
+
+def _load_reservations(session: Session, ids: list[int]) -> dict[int, dict]:
+    reserved: dict[int, dict[int, float]] = {}
+    rows = session.execute(
+        select(
+            _reservation.c.transaction_id,
+            _reservation.c.product_id,
+            func.sum(_reservation.c.quantity),
+        )
+        .where(
+            _reservation.c.transaction_id.in_(ids),
+            _reservation.c.status == ReservationStatus.active,
+        )
+        .group_by(_reservation.c.transaction_id, _reservation.c.product_id)
+    )
+    for transaction_id, product_id, quantity in rows:
+        reserved.setdefault(transaction_id, {})[product_id] = quantity
+    return reserved
+
+
+def _lock_stock(session: Session, keys: set) -> dict[tuple, _Balance]:
+    # stock_movement.lock_stock, reading the balances as well
+    query = (
+        select(
+            _stock.c.id,
+            _stock.c.warehouse_id,
+            _stock.c.product_id,
+            _stock.c.on_hand,
+            _stock.c.free_to_use,
+            _stock.c.product_unit_cost,
+        )
+        .where(tuple_(_stock.c.warehouse_id, _stock.c.product_id).in_(sorted(keys)))
+        .order_by(_stock.c.warehouse_id, _stock.c.product_id)
+        .with_for_update()
+    )
+    return {
+        (row.warehouse_id, row.product_id): _Balance(
+            row.id, row.on_hand, row.free_to_use, row.product_unit_cost or 0
+        )
+        for row in session.execute(query)
+    }
+
+
+def _create_missing(session: Session, keys: list[tuple]) -> list[tuple]:
+    """Insert empty stock rows for `keys`; returns the keys actually inserted."""
+    rows = [
+        {
+            "warehouse_id": warehouse_id,
+            "product_id": product_id,
+            "on_hand": 0,
+            "free_to_use": 0,
+            "product_unit_cost": 0,
+        }
+        for warehouse_id, product_id in keys
+    ]
+    try:
+        with session.begin_nested():
+            session.execute(insert(_stock), rows)
+        return keys
+    except IntegrityError:
+        # a concurrent movement created some of them, go row by row
+        created = []
+        for key, row in zip(keys, rows):
+            try:
+                with session.begin_nested():
+                    session.execute(insert(_stock), [row])
+                created.append(key)
+            except IntegrityError:
+                pass
+        return created
+
+
+def validate_batch(session: Session, transaction_ids: list[int]) -> BatchResult:
+    """Validate `transaction_ids` set-based (no commit); see the module notes."""
+    result = BatchResult()
+    requested = sorted(set(transaction_ids))
+    transactions = session.execute(
+        select(
+            _transaction.c.id,
+            _transaction.c.type,
+            _transaction.c.status,
+            _transaction.c.product_id,
+            _transaction.c.quantity,
+            _transaction.c.unit_cost,
+            _transaction.c.from_warehouse,
+            _transaction.c.to_warehouse,
+        )
+        .where(_transaction.c.id.in_(requested))
+        .order_by(_transaction.c.id)
+        .with_for_update()
+    ).all()
+    found = {transaction.id for transaction in transactions}
+    for transaction_id in requested:
+        if transaction_id not in found:
+            result.failed[transaction_id] = "Transaction not found"
+    transactions = [t for t in transactions if _check_status(t, result)]
+    if not transactions:
+        return result
+
+    ids = [transaction.id for transaction in transactions]
+    quantities = _load_quantities(session, transactions)
+    reserved = _load_reservations(session, ids)
+    unit_costs = _load_unit_costs(session, transactions)
+    moves = {
+        transaction.id: _moves(
+            transaction,
+            quantities.get(transaction.id, {}),
+            reserved.get(transaction.id, {}),
+            unit_costs.get(transaction.id, {}),
+        )
+        for transaction in transactions
+    }
+
+    keys = {(move.warehouse_id, move.product_id) for m in moves.values() for move in m}
+    balances = _lock_stock(session, keys)
+    incoming = sorted(
+        {
+            (move.warehouse_id, move.product_id)
+            for m in moves.values()
+            for move in m
+            if move.delta > 0
+        }
+        - balances.keys()
+    )
+    if incoming:
+        for _ in _create_missing(session, incoming):
+            record_stock_change(session, None, (0, 0, 0))
+        balances = _lock_stock(session, keys)
+
+    ledger = []
+    for transaction in transactions:
+        shortage = _first_shortage(moves[transaction.id], balances)
+        if shortage is not None:
+            result.failed[transaction.id] = (
+                f"Insufficient stock of product {shortage.product_id} "
+                f"in warehouse {shortage.warehouse_id}"
+            )
+            continue
+        for move in moves[transaction.id]:
+            balance = balances[(move.warehouse_id, move.product_id)]
+            unit_cost = move.unit_cost
+            if move.cost_from is not None:
+                unit_cost = balances[move.cost_from].state()[2]
+            if unit_cost is not None and move.delta > 0:
+                balance.receive(move.delta, unit_cost)
+            balance.delta += move.delta
+            balance.free_delta += move.free_delta
+            ledger.append(
+                {
+                    "warehouse_id": move.warehouse_id,
+                    "product_id": move.product_id,
+                    "quantity_change": move.delta,
+                    "transaction_id": transaction.id,
+                }
+            )
+        result.validated.append(transaction.id)
+
+    if result.validated:
+        _write(session, transactions, balances, ledger, result.validated)
+    return result
+
+
+def _check_status(transaction, result: BatchResult) -> bool:
+    if transaction.status in VALIDATABLE_STATUSES:
+        return True
+    result.failed[transaction.id] = (
+        f"Only 'ready' or 'waiting' transactions can be validated "
+        f"(status is '{transaction.status.value}')"
+    )
+    return False
+
+
+def _first_shortage(moves: list[_Move], balances: dict) -> _Move | None:
+    # checked per product against what earlier transactions left, summing
+    # the transaction's own moves first (a product may appear twice)
+    needed: dict[tuple, list[float]] = {}
+    for move in moves:
+        if move.delta < 0 or move.free_delta < 0:
+            total = needed.setdefault((move.warehouse_id, move.product_id), [0, 0])
+            total[0] -= move.delta
+            total[1] -= move.free_delta
+    for move in moves:
+        key = (move.warehouse_id, move.product_id)
+        if key not in needed:
+            continue
+        balance = balances.get(key)
+        on_hand, free_to_use = needed[key]
+        if balance is None:
+            return move
+        after = balance.state()
+        if after[0] < on_hand or after[1] < free_to_use:
+            return move
+    return None
+
+
+def _write(session: Session, transactions, balances, ledger, validated: list[int]):
+    changed = [
+        (key, balance)
+        for key, balance in sorted(balances.items())
+        if balance.delta or balance.free_delta or balance.new_cost is not None
+    ]
+    if changed:
+        session.execute(
+            _SHIFT,
+            [
+                {
+                    "stock_id": balance.stock_id,
+                    "delta": balance.delta,
+                    "free_delta": balance.free_delta,
+                    "unit_cost": balance.state()[2],
+                }
+                for _, balance in changed
+            ],
+        )
+        for (warehouse_id, product_id), balance in changed:
+            after = balance.state()
+            record_stock_change(session, balance.state(applied=False), after)
+            record_stock_event(session, warehouse_id, product_id, after[0], after[1])
+            record_stock_level(session, warehouse_id, product_id)
+    append_entries(session, ledger)
+
+    session.execute(
+        update(_reservation)
+        .where(
+            _reservation.c.transaction_id.in_(validated),
+            _reservation.c.status == ReservationStatus.active,
+        )
+        .values(status=ReservationStatus.consumed)
+    )
+
+    done = set(validated)
+    for transaction in transactions:
+        if transaction.id in done:
+            record_status_change(
+                session, transaction.type, transaction.status, TxnStatus.done
+            )
+    rows = session.execute(
+        update(_transaction)
+        .where(_transaction.c.id.in_(validated))
+        .values(status=TxnStatus.done, completion_date=datetime.utcnow())
+        .returning(
+            _transaction.c.id,
+            _transaction.c.reference_number,
+            _transaction.c.type,
+            _transaction.c.status,
+            _transaction.c.from_warehouse,
+            _transaction.c.to_warehouse,
+        )
+    )
+    for row in rows:
+        record_transaction_event(session, row)
+
+
+def select_due(
+    session: Session,
+    warehouse_id: int | None = None,
+    txn_type: TxnType | None = None,
+    scheduled_before: datetime | None = None,
+    limit: int = MAX_BATCH_SIZE,
+) -> list[int]:
+    """Ids of validatable transactions matching a batch filter, oldest first."""
+    query = select(_transaction.c.id).where(
+        _transaction.c.status.in_(VALIDATABLE_STATUSES)
+    )
+    if warehouse_id is not None:
+        query = query.where(
+            (_transaction.c.from_warehouse == warehouse_id)
+            | (_transaction.c.to_warehouse == warehouse_id)
+        )
+    if txn_type is not None:
+        query = query.where(_transaction.c.type == txn_type)
+    if scheduled_before is not None:
+        query = query.where(_transaction.c.scheduled_date <= scheduled_before)
+    return list(
+        session.execute(query.order_by(_transaction.c.id).limit(limit)).scalars()
+    )
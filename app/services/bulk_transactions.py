@@ -0,0 +1,124 @@
+# Bulk (multi-line) receipts and delivery orders
+# One Transaction header is created per request and all of its lines are
+# written to TransactionLine with a single executemany INSERT. The header has
+# no product_id/quantity; validation applies the lines set-based through
+# stock_movement.apply_bulk. Delivery orders reserve their lines on creation
+# (app/services/reservations.py).
+#
+# Lines arrive either as a JSON array or as CSV with a header row:
+#   product_id,quantity,unit_cost
+#   12,50,3.20
+
+import csv
+import io
+import json
+from typing import Optional
+
+from fastapi import HTTPException, Request
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import insert, select
+from sqlmodel import Field, Session, SQLModel
+
+from app.models.schemas import (
+    Product,
+    Transaction,
+    TransactionLine,
+    TxnStatus,
+    TxnType,
+)
+from app.services.events import record_transaction_event
+from app.services.kpi_snapshot import record_status_change
+from app.services.reservations import reserve_or_wait
+from app.services.sequences import next_reference
+
+MAX_BULK_LINES = 10_000
+
+
+class TransactionLineIn(SQLModel):
+    product_id: int
+    quantity: float = Field(gt=0)
+    unit_cost: Optional[float] = Field(default=None, ge=0)
+
+
+_lines_adapter = TypeAdapter(list[TransactionLineIn])
+
+
+class UnknownProducts(Exception):
+    def __init__(self, product_ids: list[int]):
+        self.product_ids = product_ids
+        super().__init__(f"Unknown product ids: {product_ids[:20]}")
+
+
+async def parse_lines(request: Request) -> list[TransactionLineIn]:
+    """Request body dependency: a JSON array or CSV document of lines."""
+    body = await request.body()
+    content_type = request.headers.get("content-type", "")
+    try:
+        if "csv" in content_type:
+            reader = csv.DictReader(io.StringIO(body.decode("utf-8-sig")))
+            raw = [
+                {key: value for key, value in row.items() if value not in ("", None)}
+                for row in reader
+            ]
+        else:
+            raw = json.loads(body or b"[]")
+        lines = _lines_adapter.validate_python(raw)
+    except ValidationError as exc:
+        raise HTTPException(status_code=422, detail=exc.errors(include_url=False))
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise HTTPException(status_code=400, detail=f"Unreadable lines: {exc}")
+
+    if not lines:
+        raise HTTPException(status_code=400, detail="At least one line is required")
+    if len(lines) > MAX_BULK_LINES:
+        raise HTTPException(
+            status_code=413, detail=f"At most {MAX_BULK_LINES} lines per request"
+        )
+    return lines
+
+
+def create_bulk_transaction(
+    session: Session,
+    transaction: Transaction,
+    lines: list[TransactionLineIn],
+) -> Transaction:
+    """Insert a multi-line transaction header and its lines (no commit).
+    Raises UnknownProducts, before writing anything, if a line refers to a
+    product that does not exist."""
+    product_ids = {line.product_id for line in lines}
+    known = set(
+        session.execute(select(Product.id).where(Product.id.in_(product_ids))).scalars()
+    )
+    unknown = sorted(product_ids - known)
+    if unknown:
+        raise UnknownProducts(unknown)
+
+    warehouse_id = (
+        transaction.to_warehouse
+        if transaction.type == TxnType.receipt
+        else transaction.from_warehouse
+    )
+    transaction.status = TxnStatus.ready
+    transaction.reference_number = next_reference(
+        session, warehouse_id, transaction.type
+    )
+    session.add(transaction)
+    session.flush()
+
+    session.execute(
+        insert(TransactionLine.__table__),
+        [
+            {
+                "transaction_id": transaction.id,
+                "product_id": line.product_id,
+                "quantity": line.quantity,
+                "unit_cost": line.unit_cost,
+            }
+            for line in lines
+        ],
+    )
+    if transaction.type == TxnType.delivery:
+        reserve_or_wait(session, transaction)
+    record_status_change(session, transaction.type, None, transaction.status)
+    record_transaction_event(session, transaction)
+    return transaction
@@ -0,0 +1,119 @@
+# Connection pool configuration and metrics
+# Both engines in app/models/create_db.py are built from the DB_* settings via
+# `engine_options`. Their pools are QueuePool subclasses that time every
+# checkout, so /metrics/pool can show how long requests waited for a
+# connection next to how many are checked out / in overflow.
+#
+# Sizing: every uvicorn worker has one sync and one async engine, so a
+# deployment can open up to
+#   workers * 2 * (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+# connections; keep that under Postgres' max_connections.
+
+import threading
+import time
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def observe(self, waited: float, timed_out: bool = False):
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += int(timed_out)
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+
+class _TimedPoolMixin:
+    metrics: PoolMetrics
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            self.metrics.observe(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.observe(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        # dispose() swaps in a fresh pool, keep counting into the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(settings, url: str, is_async: bool = False) -> dict:
+    """create_engine / create_async_engine keyword arguments for `url`."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend == "sqlite" and url.database in (None, "", ":memory:"):
+        # in-memory SQLite lives in a single connection, nothing to pool
+        return {}
+
+    options = {
+        "poolclass": TimedAsyncQueuePool if is_async else TimedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+    timeout_ms = settings.DB_STATEMENT_TIMEOUT_MS
+    if backend == "postgresql" and timeout_ms:
+        if is_async:
+            options["connect_args"] = {
+                "server_settings": {"statement_timeout": str(timeout_ms)}
+            }
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout_ms}"}
+    return options
+
+
+def pool_status(engine) -> dict:
+    pool = engine.pool
+    status = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=pool._max_overflow,
+        )
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        status.update(
+            checkouts=metrics.checkouts,
+            checkout_timeouts=metrics.timeouts,
+            wait_seconds_total=round(metrics.wait_seconds_total, 6),
+            wait_seconds_max=round(metrics.wait_seconds_max, 6),
+            wait_seconds_avg=(
+                round(metrics.wait_seconds_total / metrics.checkouts, 6)
+                if metrics.checkouts
+                else 0.0
+            ),
+        )
+    return status
@@ -0,0 +1,177 @@
+# Change feed
+# Compact delta events are staged on the session while a movement runs
+# (`session.info`, like the KPI deltas) and published to the in-process
+# broker only when the session commits, so subscribers never see a change
+# that was rolled back. One commit is delivered as one batch (a JSON array):
+#   {"type": "stock", "warehouse_id", "product_id", "on_hand", "free_to_use"}
+#   {"type": "ledger", "warehouse_id", "product_id", "quantity_change",
+#    "transaction_id"}
+#   {"type": "transaction", "id", "reference_number", "txn_type", "status",
+#    "from_warehouse", "to_warehouse"}
+#
+# Subscribers (WebSocket / SSE connections, see app/routes/eventsManager.py)
+# pick the warehouses they care about. The broker lives in each uvicorn
+# worker and only sees that worker's commits, so run the feed on a single
+# worker or put a shared bus (e.g. Postgres LISTEN/NOTIFY) behind `publish`.
+
+import asyncio
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session
+
+from app.models.schemas import Stock, Transaction
+
+_PENDING_EVENTS_KEY = "feed_events"
+# batches buffered per subscriber before it is told to resync
+MAX_QUEUED_BATCHES = 256
+RESYNC = [{"type": "resync"}]
+
+
+def _pending(session: Session) -> dict:
+    # stock events are keyed so only the last state of a row per commit is sent
+    return session.info.setdefault(_PENDING_EVENTS_KEY, {})
+
+
+def record_stock_event(
+    session: Session,
+    warehouse_id: int,
+    product_id: int,
+    on_hand: float,
+    free_to_use: float,
+):
+    _pending(session)[("stock", warehouse_id, product_id)] = {
+        "type": "stock",
+        "warehouse_id": warehouse_id,
+        "product_id": product_id,
+        "on_hand": on_hand,
+        "free_to_use": free_to_use,
+    }
+
+
+def record_stock_row_event(session: Session, stock: Stock):
+    record_stock_event(
+        session, stock.warehouse_id, stock.product_id, stock.on_hand, stock.free_to_use
+    )
+
+
+def record_ledger_events(session: Session, rows: list[dict]):
+    pending = _pending(session)
+    for row in rows:
+        pending[("ledger", len(pending))] = {
+            "type": "ledger",
+            "warehouse_id": row["warehouse_id"],
+            "product_id": row["product_id"],
+            "quantity_change": row["quantity_change"],
+            "transaction_id": row["transaction_id"],
+        }
+
+
+def record_transaction_event(session: Session, transaction: Transaction):
+    """Stage a transaction's current status; it needs an id (flush first)."""
+    _pending(session)[("transaction", transaction.id)] = {
+        "type": "transaction",
+        "id": transaction.id,
+        "reference_number": transaction.reference_number,
+        "txn_type": transaction.type,
+        "status": transaction.status,
+        "from_warehouse": transaction.from_warehouse,
+        "to_warehouse": transaction.to_warehouse,
+    }
+
+
+def _event_warehouses(feed_event: dict) -> set:
+    if feed_event["type"] == "transaction":
+        return {feed_event["from_warehouse"], feed_event["to_warehouse"]} - {None}
+    return {feed_event["warehouse_id"]}
+
+
+class Subscription:
+    def __init__(self, warehouse_ids: frozenset | None):
+        # None means every warehouse
+        self.warehouse_ids = warehouse_ids
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(MAX_QUEUED_BATCHES)
+
+    def _deliver(self, batch: list[dict]):
+        # runs on the subscriber's event loop
+        try:
+            self.queue.put_nowait(batch)
+        except asyncio.QueueFull:
+            # a slow client: drop what it missed and make it re-fetch
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+    async def next_batch(self) -> list[dict]:
+        return await self.queue.get()
+
+
+class EventBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_warehouse: dict[int, set[Subscription]] = {}
+        self._all: set[Subscription] = set()
+        self.published = 0
+
+    def subscribe(self, warehouse_ids=None) -> Subscription:
+        """Subscribe from a coroutine; `warehouse_ids` None or empty = all."""
+        subscription = Subscription(frozenset(warehouse_ids or ()) or None)
+        with self._lock:
+            if subscription.warehouse_ids is None:
+                self._all.add(subscription)
+            for warehouse_id in subscription.warehouse_ids or ():
+                self._by_warehouse.setdefault(warehouse_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._all.discard(subscription)
+            for warehouse_id in subscription.warehouse_ids or ():
+                subscribers = self._by_warehouse.get(warehouse_id)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._by_warehouse[warehouse_id]
+
+    def publish(self, events: list[dict]):
+        """Fan a committed batch out to matching subscribers (any thread)."""
+        batches: dict[Subscription, list[dict]] = {}
+        with self._lock:
+            for feed_event in events:
+                targets = set(self._all)
+                for warehouse_id in _event_warehouses(feed_event):
+                    targets.update(self._by_warehouse.get(warehouse_id, ()))
+                for subscription in targets:
+                    batches.setdefault(subscription, []).append(feed_event)
+            self.published += len(events)
+
+        for subscription, batch in batches.items():
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._deliver, batch)
+            except RuntimeError:
+                # the subscriber's loop is closed (shutdown)
+                self.unsubscribe(subscription)
+
+
+broker = EventBroker()
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _publish_pending_events(session):
+    # also fires when a savepoint is released; wait for the real commit
+    if session.in_nested_transaction():
+        return
+    pending = session.info.pop(_PENDING_EVENTS_KEY, None)
+    if pending:
+        broker.publish(list(pending.values()))
+
+
+@event.listens_for(OrmSession, "after_soft_rollback")
+def _discard_pending_events(session, previous_transaction):
+    # a rolled back savepoint leaves the outer transaction (and what it
+    # staged before the savepoint) intact
+    if previous_transaction.nested:
+        return
+    session.info.pop(_PENDING_EVENTS_KEY, None)
@@ -0,0 +1,244 @@
+# Request instrumentation
+# The middleware in app/main.py opens a RequestStats per request in a
+# contextvar; SQLAlchemy cursor events (on every engine: sync, async and
+# replica) add each statement's count and duration to it. That context
+# follows the request into `run_sync` greenlets and threadpool routes, so
+# every query a request causes is attributed to it. Background jobs have no
+# RequestStats and only feed the global query metrics.
+#
+# Per route (the path template, so ids don't blow up the label set):
+#   http_request_duration_seconds   latency histogram
+#   http_request_db_queries         queries per request histogram
+#   http_request_db_seconds         DB time per request histogram
+#   http_request_query_flood_total  requests over N_PLUS_ONE_QUERY_THRESHOLD
+# and db_slow_queries_total for statements over SLOW_QUERY_MS, which are
+# logged with their bound parameters. Everything is rendered as Prometheus
+# text by `render_prometheus` (GET /metrics). Counters are per process.
+
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.settings import get_settings
+
+logger = logging.getLogger("app.instrumentation")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+# bound parameters shown in the slow query log
+MAX_LOGGED_PARAMS = 20
+
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    db_seconds: float = 0.0
+
+
+_request_stats: ContextVar[RequestStats | None] = ContextVar(
+    "request_stats", default=None
+)
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: tuple, labels: tuple):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.labels = labels
+        self._lock = threading.Lock()
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, *label_values):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        for label_values, values in sorted(series.items()):
+            labels = _labels(self.labels, label_values)
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_bucket{_labels(self.labels, label_values, le=bound)}"
+                    f" {cumulative}"
+                )
+            cumulative += values[len(self.buckets)]
+            lines.append(
+                f"{self.name}_bucket{_labels(self.labels, label_values, le='+Inf')}"
+                f" {cumulative}"
+            )
+            lines.append(f"{self.name}_sum{labels} {values[-1]}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._lock = threading.Lock()
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = dict(self._values)
+        for label_values, value in sorted(values.items()):
+            lines.append(f"{self.name}{_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple, values: tuple, le=None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if le is not None:
+        pairs.append(f'le="{le}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+ROUTE_LABELS = ("method", "route")
+
+request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Request latency",
+    LATENCY_BUCKETS,
+    ("method", "route", "status"),
+)
+request_queries = Histogram(
+    "http_request_db_queries",
+    "SQL statements per request",
+    QUERY_COUNT_BUCKETS,
+    ROUTE_LABELS,
+)
+request_db_seconds = Histogram(
+    "http_request_db_seconds",
+    "Time in SQL statements per request",
+    LATENCY_BUCKETS,
+    ROUTE_LABELS,
+)
+query_floods = Counter(
+    "http_request_query_flood_total",
+    "Requests that issued more statements than N_PLUS_ONE_QUERY_THRESHOLD",
+    ROUTE_LABELS,
+)
+db_queries = Counter("db_queries_total", "SQL statements executed")
+db_seconds = Counter("db_query_seconds_total", "Time spent in SQL statements")
+slow_queries = Counter("db_slow_queries_total", "Statements slower than SLOW_QUERY_MS")
+METRICS = (
+    request_duration,
+    request_queries,
+    request_db_seconds,
+    query_floods,
+    db_queries,
+    db_seconds,
+    slow_queries,
+)
+
+
+def start_request() -> tuple[RequestStats, object]:
+    stats = RequestStats()
+    return stats, _request_stats.set(stats)
+
+
+def finish_request(
+    token, stats: RequestStats, method: str, route: str, status: int, seconds: float
+):
+    _request_stats.reset(token)
+    request_duration.observe(seconds, method, route, status)
+    request_queries.observe(stats.queries, method, route)
+    request_db_seconds.observe(stats.db_seconds, method, route)
+    threshold = get_settings().N_PLUS_ONE_QUERY_THRESHOLD
+    if threshold and stats.queries > threshold:
+        query_floods.inc(method, route)
+        logger.warning(
+            "%s %s issued %d SQL statements (threshold %d), likely an N+1 query",
+            method,
+            route,
+            stats.queries,
+            threshold,
+            extra={"route": route, "queries": stats.queries},
+        )
+
+
+def server_timing(stats: RequestStats, seconds: float) -> str:
+    """Server-Timing header value, shown per request in browser dev tools."""
+    return (
+        f"app;dur={seconds * 1000:.1f}, "
+        f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.queries} queries"'
+    )
+
+
+def render_prometheus() -> str:
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def _params_for_log(parameters):
+    if (
+        isinstance(parameters, (list, tuple))
+        and parameters
+        and isinstance(parameters[0], (dict, list, tuple))
+    ):
+        # executemany: the first few parameter sets
+        return list(parameters[:MAX_LOGGED_PARAMS])
+    return parameters
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    db_queries.inc()
+    db_seconds.inc(amount=elapsed)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+    slow_ms = get_settings().SLOW_QUERY_MS
+    if slow_ms and elapsed * 1000 >= slow_ms:
+        slow_queries.inc()
+        logger.warning(
+            "slow query (%.1f ms): %s | params=%r",
+            elapsed * 1000,
+            statement,
+            _params_for_log(parameters),
+            extra={"duration_ms": round(elapsed * 1000, 1)},
+        )
+
+
+@event.listens_for(Engine, "handle_error")
+def _drop_query_timer(exception_context):
+    # the statement failed, after_cursor_execute will not run for it
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started"):
+        connection.info["query_started"].pop()
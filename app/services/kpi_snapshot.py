@@ -0,0 +1,150 @@
+# Materialized dashboard KPI snapshot
+# The snapshot is built once with the aggregate query from app/services/kpis.py
+# and then kept current by applying deltas recorded by the mutating routes.
+# Deltas are staged on the session (`session.info`) and only applied when the
+# session commits, so a rolled-back request never moves a counter.
+#
+# Each uvicorn worker holds its own snapshot; `reconcile_kpis` runs
+# periodically (see app/main.py) to rebuild it from Stock/Transaction and
+# wipe out any drift, e.g. writes made by other workers.
+
+import hashlib
+import json
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session
+
+from app.models.schemas import Stock, TxnStatus, TxnType
+from app.services.kpis import PENDING_STATUSES, compute_kpis
+
+_PENDING_DELTAS_KEY = "kpi_deltas"
+
+# counters that are a plain count of transactions in a set of statuses
+_STATUS_COUNTERS = {
+    "pending_receipts": (TxnType.receipt, PENDING_STATUSES),
+    "pending_deliveries": (TxnType.delivery, PENDING_STATUSES),
+    "internal_transfers": (TxnType.internal_adjustment, [TxnStatus.waiting]),
+}
+
+
+class KpiSnapshot:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.values: dict | None = None
+        self.version = 0
+        self.etag: str | None = None
+
+    def _publish(self, values: dict):
+        # callers hold the lock
+        self.values = values
+        self.version += 1
+        digest = hashlib.md5(
+            json.dumps(values, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        self.etag = f'"kpi-{digest}"'
+
+    def rebuild(self, session: Session):
+        values = compute_kpis(session)
+        with self._lock:
+            self._publish(values)
+
+    def apply(self, deltas: dict):
+        if not deltas:
+            return
+        with self._lock:
+            if self.values is None:
+                # nothing materialized yet, the first read will build it
+                return
+            values = dict(self.values)
+            for name, delta in deltas.items():
+                if name in values:
+                    values[name] += delta
+            self._publish(values)
+
+    def get(self, session: Session) -> tuple[dict, str]:
+        if self.values is None:
+            self.rebuild(session)
+        with self._lock:
+            return self.values, self.etag
+
+
+kpi_snapshot = KpiSnapshot()
+
+
+def record_kpi_delta(session: Session, **deltas: float):
+    """Stage KPI deltas on the session; they are applied on commit."""
+    pending = session.info.setdefault(_PENDING_DELTAS_KEY, {})
+    for name, delta in deltas.items():
+        if delta:
+            pending[name] = pending.get(name, 0) + delta
+
+
+def stock_state(stock: Stock | None) -> tuple[float, float, float] | None:
+    """Capture the fields of a Stock row that feed into KPIs."""
+    if stock is None:
+        return None
+    return (
+        float(stock.on_hand or 0),
+        float(stock.free_to_use or 0),
+        float(stock.product_unit_cost or 0),
+    )
+
+
+def record_stock_change(
+    session: Session,
+    before: tuple[float, float, float] | None,
+    after: tuple[float, float, float] | None,
+):
+    """Stage the KPI effect of a Stock row going from `before` to `after`.
+
+    Both arguments are `stock_state(...)` tuples, `None` meaning the row
+    did not exist (before) or was removed (after). low_stock_items follows
+    the low-stock flags instead (app/services/low_stock.py).
+    """
+
+    def value(state):
+        return state[0] * state[2] if state is not None else 0
+
+    record_kpi_delta(session, stock_value=value(after) - value(before))
+
+
+def record_status_change(
+    session: Session,
+    txn_type: TxnType,
+    old_status: TxnStatus | None,
+    new_status: TxnStatus | None,
+):
+    """Stage the KPI effect of a transaction changing status (None = not existing)."""
+    deltas = {}
+    for name, (counted_type, statuses) in _STATUS_COUNTERS.items():
+        if txn_type != counted_type:
+            continue
+        deltas[name] = int(new_status in statuses) - int(old_status in statuses)
+    record_kpi_delta(session, **deltas)
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _apply_pending_deltas(session):
+    # also fires when a savepoint is released; wait for the real commit
+    if session.in_nested_transaction():
+        return
+    kpi_snapshot.apply(session.info.pop(_PENDING_DELTAS_KEY, None))
+
+
+@event.listens_for(OrmSession, "after_soft_rollback")
+def _discard_pending_deltas(session, previous_transaction):
+    # a rolled back savepoint leaves the outer transaction (and what it
+    # staged before the savepoint) intact
+    if previous_transaction.nested:
+        return
+    session.info.pop(_PENDING_DELTAS_KEY, None)
+
+
+def reconcile_kpis():
+    """Rebuild the snapshot from the database (periodic job)."""
+    from app.models.create_db import engine
+
+    with Session(engine) as session:
+        kpi_snapshot.rebuild(session)
@@ -0,0 +1,113 @@
+# Dashboard KPI engine
+# Every KPI is an aggregate expression over one source table. All KPIs that
+# share a table are folded into a single aggregate subquery, and the
+# per-table subqueries are joined into one row, so the whole dashboard is
+# answered in a single round-trip without loading any rows into Python.
+#
+# Adding a KPI:
+#   register_kpi("stock_value", Stock, lambda: func.sum(Stock.on_hand * Stock.product_unit_cost))
+
+from dataclasses import dataclass
+from typing import Callable, Iterable
+
+from sqlalchemy import func, select, true
+from sqlalchemy.sql.elements import ColumnElement
+from sqlmodel import Session, SQLModel
+
+from app.models.schemas import (
+    LowStockFlag,
+    Product,
+    Stock,
+    Transaction,
+    TxnType,
+    TxnStatus,
+)
+
+# minimum free_to_use of stock rows without a ReorderRule (see
+# app/services/low_stock.py)
+LOW_STOCK_THRESHOLD = 5
+PENDING_STATUSES = [TxnStatus.waiting, TxnStatus.ready]
+
+
+@dataclass(frozen=True)
+class KpiDefinition:
+    name: str
+    source: type[SQLModel]
+    expression: Callable[[], ColumnElement]
+
+
+KPI_REGISTRY: dict[str, KpiDefinition] = {}
+
+
+def register_kpi(
+    name: str, source: type[SQLModel], expression: Callable[[], ColumnElement]
+) -> KpiDefinition:
+    """Register (or replace) a KPI computed as an aggregate over `source`."""
+    definition = KpiDefinition(name=name, source=source, expression=expression)
+    KPI_REGISTRY[name] = definition
+    return definition
+
+
+def _count_transactions(txn_type: TxnType, statuses: list[TxnStatus]):
+    return lambda: func.count().filter(
+        Transaction.type == txn_type, Transaction.status.in_(statuses)
+    )
+
+
+register_kpi("total_products", Product, lambda: func.count())
+# maintained incrementally, so this counts flagged rows only
+register_kpi("low_stock_items", LowStockFlag, lambda: func.count())
+register_kpi(
+    "pending_receipts",
+    Transaction,
+    _count_transactions(TxnType.receipt, PENDING_STATUSES),
+)
+register_kpi(
+    "pending_deliveries",
+    Transaction,
+    _count_transactions(TxnType.delivery, PENDING_STATUSES),
+)
+register_kpi(
+    "internal_transfers",
+    Transaction,
+    _count_transactions(TxnType.internal_adjustment, [TxnStatus.waiting]),
+)
+register_kpi(
+    "stock_value",
+    Stock,
+    lambda: func.coalesce(
+        func.sum(Stock.on_hand * func.coalesce(Stock.product_unit_cost, 0)), 0
+    ),
+)
+
+
+def build_kpi_query(definitions: Iterable[KpiDefinition] | None = None):
+    """Build one SELECT returning a single row with a column per KPI."""
+    if definitions is None:
+        definitions = KPI_REGISTRY.values()
+
+    by_source: dict[type[SQLModel], list[KpiDefinition]] = {}
+    for definition in definitions:
+        by_source.setdefault(definition.source, []).append(definition)
+
+    # one aggregate subquery per table, each yielding exactly one row
+    subqueries = [
+        select(*[d.expression().label(d.name) for d in defs])
+        .select_from(source)
+        .subquery(f"kpi_{source.__tablename__}")
+        for source, defs in by_source.items()
+    ]
+
+    from_clause = subqueries[0]
+    for subquery in subqueries[1:]:
+        from_clause = from_clause.join(subquery, true())
+
+    columns = [c for subquery in subqueries for c in subquery.c]
+    return select(*columns).select_from(from_clause)
+
+
+def compute_kpis(
+    session: Session, definitions: Iterable[KpiDefinition] | None = None
+) -> dict:
+    row = session.execute(build_kpi_query(definitions)).one()
+    return dict(row._mapping)
@@ -0,0 +1,65 @@
+# Stock ledger
+# StockLedger is the append-only record of every change to Stock.on_hand.
+# Rows are written by app/services/stock_movement.py in the same DB
+# transaction as the stock change they describe. Stock that predates the
+# ledger got an opening-balance row from migration 4, so summing
+# quantity_change per (warehouse_id, product_id) reproduces on_hand.
+
+from datetime import datetime
+
+from sqlalchemy import event, insert
+from sqlmodel import Session
+
+from app.models.schemas import StockLedger
+from app.services.events import record_ledger_events
+
+_ledger = StockLedger.__table__
+
+
+def append_entries(session: Session, entries: list[dict]):
+    """Append ledger rows with one (executemany) INSERT; zero changes are skipped.
+
+    Each entry has warehouse_id, product_id, quantity_change and optionally
+    transaction_id.
+    """
+    now = datetime.utcnow()
+    rows = [
+        {
+            "transaction_id": entry.get("transaction_id"),
+            "warehouse_id": entry["warehouse_id"],
+            "product_id": entry["product_id"],
+            "quantity_change": entry["quantity_change"],
+            "created_at": now,
+        }
+        for entry in entries
+        if entry["quantity_change"]
+    ]
+    if rows:
+        session.execute(insert(_ledger), rows)
+        record_ledger_events(session, rows)
+
+
+def append_entry(
+    session: Session,
+    warehouse_id: int,
+    product_id: int,
+    quantity_change: float,
+    transaction_id: int | None = None,
+):
+    append_entries(
+        session,
+        [
+            {
+                "warehouse_id": warehouse_id,
+                "product_id": product_id,
+                "quantity_change": quantity_change,
+                "transaction_id": transaction_id,
+            }
+        ],
+    )
+
+
+@event.listens_for(StockLedger, "before_update")
+@event.listens_for(StockLedger, "before_delete")
+def _reject_ledger_rewrite(mapper, connection, target):
+    raise ValueError("StockLedger is append-only; record a correcting entry instead")
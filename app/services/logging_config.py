@@ -0,0 +1,48 @@
+# Logging setup
+# Everything logs through the standard `logging` module under the "app"
+# logger. LOG_LEVEL gates what is emitted: per-request events are DEBUG, so
+# in production (INFO and up) they are dropped before any formatting
+# happens. LOG_FORMAT=json writes one JSON object per line, with the `extra`
+# fields of the call as top-level keys, for log shippers.
+
+import logging
+import sys
+
+import orjson
+
+# attributes every LogRecord has; anything else came in through `extra`
+_RECORD_FIELDS = set(logging.LogRecord("", 0, "", 0, "", None, None).__dict__) | {
+    "message",
+    "asctime",
+}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry, default=str).decode()
+
+
+def configure_logging(level: str = "INFO", fmt: str = "text"):
+    handler = logging.StreamHandler(sys.stderr)
+    if fmt == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(
+            logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+        )
+    logger = logging.getLogger("app")
+    logger.handlers[:] = [handler]
+    logger.setLevel(level.upper())
+    # uvicorn configures the root logger too; don't print everything twice
+    logger.propagate = False
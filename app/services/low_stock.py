@@ -0,0 +1,122 @@
+# Low-stock engine
+# LowStockFlag holds exactly the Stock rows whose free_to_use is at or below
+# their minimum: ReorderRule.min_qty for the (warehouse, product), or
+# LOW_STOCK_THRESHOLD when there is no rule. Every place that changes a stock
+# row stages its key (`record_stock_level`), and just before the session
+# commits the flags of those keys are recomputed with two set-based
+# statements, in the same DB transaction. Stock rows are locked by the
+# change itself, so concurrent commits refresh the same key one at a time.
+#
+# Low-stock listings, replenishment suggestions and the low_stock_items KPI
+# then read the flags only: their cost grows with the number of flagged
+# rows, not with the size of Stock. `rebuild_flags` recomputes everything
+# (when migrating an existing database, and after a bulk load outside the
+# app: `python -m app.cli rebuild-low-stock`).
+
+from sqlalchemy import and_, delete, event, func, insert, literal, select, tuple_
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session
+
+from app.models.schemas import LowStockFlag, ReorderRule, Stock
+from app.services.kpi_snapshot import record_kpi_delta
+from app.services.kpis import LOW_STOCK_THRESHOLD
+
+_PENDING_LEVELS_KEY = "low_stock_keys"
+
+_flag = LowStockFlag.__table__
+_stock = Stock.__table__
+_rule = ReorderRule.__table__
+
+
+def record_stock_level(session: Session, warehouse_id: int, product_id: int):
+    """Stage a changed stock row; its flag is refreshed when the session commits."""
+    session.info.setdefault(_PENDING_LEVELS_KEY, set()).add((warehouse_id, product_id))
+
+
+def _flagged_rows(condition=None):
+    minimum = func.coalesce(_rule.c.min_qty, literal(LOW_STOCK_THRESHOLD))
+    query = (
+        select(
+            _stock.c.warehouse_id,
+            _stock.c.product_id,
+            _stock.c.free_to_use,
+            minimum,
+            _rule.c.max_qty,
+        )
+        .select_from(
+            _stock.outerjoin(
+                _rule,
+                and_(
+                    _rule.c.warehouse_id == _stock.c.warehouse_id,
+                    _rule.c.product_id == _stock.c.product_id,
+                ),
+            )
+        )
+        .where(_stock.c.free_to_use <= minimum)
+    )
+    if condition is not None:
+        query = query.where(condition)
+    return query
+
+
+_FLAG_COLUMNS = ["warehouse_id", "product_id", "free_to_use", "min_qty", "max_qty"]
+
+
+def refresh_flags(session: Session, keys) -> int:
+    """Recompute the flags of (warehouse_id, product_id) `keys`; returns the
+    change in the number of flagged rows."""
+    keys = sorted(keys)
+    if not keys:
+        return 0
+    removed = session.execute(
+        delete(_flag).where(tuple_(_flag.c.warehouse_id, _flag.c.product_id).in_(keys))
+    ).rowcount
+    added = session.execute(
+        insert(_flag).from_select(
+            _FLAG_COLUMNS,
+            _flagged_rows(tuple_(_stock.c.warehouse_id, _stock.c.product_id).in_(keys)),
+        )
+    ).rowcount
+    return added - removed
+
+
+def rebuild_flags(session: Session):
+    """Recompute every flag from Stock and ReorderRule, then commit."""
+    session.execute(delete(_flag))
+    session.execute(insert(_flag).from_select(_FLAG_COLUMNS, _flagged_rows()))
+    session.commit()
+
+
+def list_low_stock(session: Session, warehouse_id: int | None = None) -> list[dict]:
+    """Flagged rows with the quantity to order to get back to max (or min)."""
+    query = select(*_flag.c).order_by(_flag.c.warehouse_id, _flag.c.product_id)
+    if warehouse_id is not None:
+        query = query.where(_flag.c.warehouse_id == warehouse_id)
+    items = []
+    for row in session.execute(query):
+        target = row.max_qty if row.max_qty is not None else row.min_qty
+        items.append(
+            {
+                **row._asdict(),
+                "suggested_qty": max(target - row.free_to_use, 0),
+            }
+        )
+    return items
+
+
+@event.listens_for(OrmSession, "before_commit")
+def _refresh_pending_flags(session):
+    if session.in_nested_transaction():
+        return
+    keys = session.info.pop(_PENDING_LEVELS_KEY, None)
+    if keys:
+        # ORM changes (e.g. manual corrections) must be in the DB first
+        session.flush()
+        record_kpi_delta(session, low_stock_items=refresh_flags(session, keys))
+
+
+@event.listens_for(OrmSession, "after_soft_rollback")
+def _discard_pending_levels(session, previous_transaction):
+    if previous_transaction.nested:
+        return
+    session.info.pop(_PENDING_LEVELS_KEY, None)
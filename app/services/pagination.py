@@ -0,0 +1,47 @@
+# Keyset (cursor) pagination helpers
+# A cursor is the sort key of the last row of a page, serialized as an opaque
+# url-safe token. The next page is fetched with a row-value comparison on an
+# indexed sort key, so every page costs the same regardless of its depth.
+#
+# List endpoints keep returning a plain JSON array; the cursor of the next
+# page travels in the `X-Next-Cursor` header (and an RFC 8288 `Link` header).
+
+import base64
+import json
+from datetime import datetime
+
+from fastapi import HTTPException, Request, Response
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(*values) -> str:
+    raw = json.dumps(
+        [v.isoformat() if isinstance(v, datetime) else v for v in values],
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types) -> tuple:
+    """Decode a cursor into a tuple, converting each value with `types`."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if len(values) != len(types):
+            raise ValueError("cursor arity mismatch")
+        return tuple(
+            datetime.fromisoformat(v) if t is datetime else t(v)
+            for t, v in zip(types, values)
+        )
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def set_next_cursor(request: Request, response: Response, cursor: str | None):
+    if cursor is None:
+        return
+    response.headers["X-Next-Cursor"] = cursor
+    next_url = request.url.include_query_params(cursor=cursor)
+    response.headers["Link"] = f'<{next_url}>; rel="next"'
@@ -0,0 +1,204 @@
+# Bulk product import
+# Streams CSV or NDJSON records, validates them in chunks and, per chunk:
+#   1. upserts Product by sku with one multi-row INSERT ... ON CONFLICT DO UPDATE
+#   2. seeds Stock rows with one multi-row INSERT ... ON CONFLICT DO NOTHING
+#      (existing stock is never overwritten by an import) and logs the seeded
+#      quantities as opening balances in StockLedger
+#   3. commits, so memory stays bounded by the chunk size and progress is durable
+#
+# Record fields: sku, name, uom, category, warehouse_id, quantity, unit_cost.
+# Rows without a warehouse_id use the import's default warehouse, rows without
+# either only upsert the product.
+
+import csv
+import json
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Callable, Iterable, Iterator, Optional, TextIO
+
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import Field, Session, SQLModel
+
+from app.models.schemas import Product, Stock, Warehouse
+from app.services.ledger import append_entries
+from app.services.low_stock import record_stock_level
+
+DEFAULT_CHUNK_SIZE = 1000
+# keep the report small even when a whole file is rejected
+MAX_REPORTED_REJECTIONS = 1000
+
+
+class ProductImportRow(SQLModel):
+    sku: str = Field(min_length=1)
+    name: str = Field(min_length=1)
+    uom: str = Field(min_length=1)
+    category: Optional[str] = None
+    warehouse_id: Optional[int] = None
+    quantity: float = Field(default=0, ge=0)
+    unit_cost: Optional[float] = Field(default=None, ge=0)
+
+
+@dataclass
+class ImportReport:
+    processed: int = 0
+    products_upserted: int = 0
+    stock_rows_seeded: int = 0
+    rejected_count: int = 0
+    rejected: list[dict] = field(default_factory=list)
+
+    def reject(self, row_number: int, errors):
+        self.rejected_count += 1
+        if len(self.rejected) < MAX_REPORTED_REJECTIONS:
+            self.rejected.append({"row": row_number, "errors": errors})
+
+
+def iter_records(stream: TextIO, fmt: str) -> Iterator[dict]:
+    """Yield raw records one at a time from a CSV or NDJSON text stream."""
+    if fmt == "csv":
+        for record in csv.DictReader(stream):
+            # empty CSV cells mean "not provided"
+            yield {k: v for k, v in record.items() if k and v not in ("", None)}
+    elif fmt == "ndjson":
+        for line in stream:
+            if line.strip():
+                try:
+                    record = json.loads(line)
+                except ValueError as exc:
+                    yield {"__error__": str(exc)}
+                    continue
+                if isinstance(record, dict):
+                    yield record
+                else:
+                    # valid JSON, but not a record
+                    kind = type(record).__name__
+                    yield {"__error__": f"Expected a JSON object, got {kind}"}
+    else:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+
+def _dialect_insert(session: Session):
+    if session.get_bind().dialect.name == "sqlite":
+        return sqlite.insert
+    return postgresql.insert
+
+
+def _import_chunk(
+    session: Session,
+    numbered_rows: list[tuple[int, ProductImportRow]],
+    default_warehouse_id: int | None,
+    report: ImportReport,
+):
+    insert = _dialect_insert(session)
+
+    warehouse_ids = {
+        row.warehouse_id for _, row in numbered_rows if row.warehouse_id is not None
+    }
+    known_warehouses = set(
+        session.execute(
+            select(Warehouse.id).where(Warehouse.id.in_(warehouse_ids))
+        ).scalars()
+    )
+    rows = []
+    for row_number, row in numbered_rows:
+        if row.warehouse_id is not None and row.warehouse_id not in known_warehouses:
+            report.reject(row_number, f"Unknown warehouse_id {row.warehouse_id}")
+        else:
+            rows.append(row)
+    if not rows:
+        return
+
+    # the last occurrence of a sku in a chunk wins
+    products = {
+        row.sku: {
+            "sku": row.sku,
+            "name": row.name,
+            "uom": row.uom,
+            "category": row.category,
+        }
+        for row in rows
+    }
+    upsert = insert(Product).values(list(products.values()))
+    upsert = upsert.on_conflict_do_update(
+        index_elements=[Product.sku],
+        set_={
+            "name": upsert.excluded.name,
+            "uom": upsert.excluded.uom,
+            "category": upsert.excluded.category,
+        },
+    ).returning(Product.id, Product.sku)
+    product_ids = {sku: id_ for id_, sku in session.execute(upsert)}
+    report.products_upserted += len(product_ids)
+
+    stock_rows = {}
+    for row in rows:
+        warehouse_id = row.warehouse_id or default_warehouse_id
+        if warehouse_id is None:
+            continue
+        stock_rows[(warehouse_id, product_ids[row.sku])] = {
+            "warehouse_id": warehouse_id,
+            "product_id": product_ids[row.sku],
+            "on_hand": row.quantity,
+            "free_to_use": row.quantity,
+            "product_unit_cost": row.unit_cost or 0,
+        }
+    if stock_rows:
+        seeded = session.execute(
+            insert(Stock)
+            .values(list(stock_rows.values()))
+            .on_conflict_do_nothing(
+                index_elements=[Stock.warehouse_id, Stock.product_id]
+            )
+            .returning(Stock.warehouse_id, Stock.product_id, Stock.on_hand)
+        ).all()
+        report.stock_rows_seeded += len(seeded)
+        for row in seeded:
+            record_stock_level(session, row.warehouse_id, row.product_id)
+        append_entries(
+            session,
+            [
+                {
+                    "warehouse_id": row.warehouse_id,
+                    "product_id": row.product_id,
+                    "quantity_change": row.on_hand,
+                }
+                for row in seeded
+            ],
+        )
+
+    session.commit()
+
+
+def import_products(
+    session: Session,
+    records: Iterable[dict],
+    default_warehouse_id: int | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    on_progress: Callable[[ImportReport], None] | None = None,
+) -> ImportReport:
+    report = ImportReport()
+    numbered = enumerate(records, start=1)
+    while True:
+        chunk = list(islice(numbered, chunk_size))
+        if not chunk:
+            break
+
+        valid = []
+        for row_number, record in chunk:
+            report.processed += 1
+            if "__error__" in record:
+                report.reject(row_number, record["__error__"])
+                continue
+            try:
+                valid.append((row_number, ProductImportRow.model_validate(record)))
+            except ValidationError as exc:
+                report.reject(
+                    row_number, exc.errors(include_url=False, include_context=False)
+                )
+
+        if valid:
+            _import_chunk(session, valid, default_warehouse_id, report)
+        if on_progress:
+            on_progress(report)
+    return report
@@ -0,0 +1,42 @@
+# Read replica routing
+# Read-only endpoints use the replica engine (PG_DB_REPLICA) when one is
+# configured. A replica lags the primary, so a client that needs to see its
+# own writes can ask for the primary:
+#   - per request with the `X-Read-Your-Writes: 1` header, or
+#   - automatically: every successful write sets a short-lived cookie
+#     (READ_YOUR_WRITES_SECONDS) that pins the client's reads to the primary
+#     until the replica has had time to catch up. Browsers only send it back
+#     on same-origin or credentialed requests; the bundled client is neither,
+#     so it sends the header itself after its writes (apiFetch in
+#     client/src/services/new_api.js).
+
+import time
+
+from fastapi import Request, Response
+
+READ_YOUR_WRITES_HEADER = "x-read-your-writes"
+READ_YOUR_WRITES_COOKIE = "read_your_writes_until"
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+def wants_primary(request: Request) -> bool:
+    if request.headers.get(READ_YOUR_WRITES_HEADER, "").lower() in ("1", "true"):
+        return True
+    until = request.cookies.get(READ_YOUR_WRITES_COOKIE)
+    try:
+        return until is not None and float(until) > time.time()
+    except ValueError:
+        return False
+
+
+def mark_write(response: Response, window_seconds: float):
+    """Pin the client's next reads to the primary for `window_seconds`."""
+    if window_seconds <= 0:
+        return
+    response.set_cookie(
+        READ_YOUR_WRITES_COOKIE,
+        f"{time.time() + window_seconds:.3f}",
+        max_age=max(1, int(window_seconds + 0.999)),
+        httponly=True,
+        samesite="lax",
+    )
@@ -0,0 +1,136 @@
+# Reference data cache
+# Warehouses and products change rarely but are fetched on nearly every page.
+# Their serialized JSON bodies are kept in a per-worker TTL + LRU cache and
+# served with an ETag, so repeat requests skip both the query and the
+# serialization and clients revalidating with If-None-Match get a 304.
+#
+# Routes that change the cached tables invalidate after their commit. Other
+# workers keep their copy until the TTL expires, which bounds staleness to
+# REFERENCE_CACHE_TTL_SECONDS. A load that started before an invalidation is
+# not stored (see `generation`), so it cannot put stale data back.
+#
+# Misses load through the read session like other reads: the replica, or the
+# primary while the client carries the read-your-writes marker. The client
+# that made a change therefore reloads it from the primary, and a replica
+# load can add at most the replica lag to the TTL bound above.
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import orjson
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from app.settings import get_settings
+
+
+@dataclass(frozen=True)
+class CachedPayload:
+    body: bytes
+    etag: str
+
+
+def build_payload(value) -> CachedPayload:
+    body = orjson.dumps(jsonable_encoder(value))
+    return CachedPayload(body, f'"{hashlib.md5(body).hexdigest()}"')
+
+
+def payload_response(
+    request: Request, payload: CachedPayload, cache_control: str = "no-cache"
+) -> Response:
+    headers = {"ETag": payload.etag, "Cache-Control": cache_control}
+    if_none_match = request.headers.get("if-none-match", "")
+    if payload.etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    return Response(payload.body, media_type="application/json", headers=headers)
+
+
+class TTLCache:
+    """`ttl_seconds` and `max_entries` may be zero-argument callables; they are
+    called on first use, so a module-level cache does not read the settings
+    at import time."""
+
+    def __init__(self, name: str, ttl_seconds, max_entries):
+        self.name = name
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def ttl_seconds(self) -> float:
+        if callable(self._ttl_seconds):
+            self._ttl_seconds = self._ttl_seconds()
+        return self._ttl_seconds
+
+    @property
+    def max_entries(self) -> int:
+        if callable(self._max_entries):
+            self._max_entries = self._max_entries()
+        return self._max_entries
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, generation: int):
+        """Store `value` unless the cache was invalidated since `generation`."""
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *keys):
+        """Drop `keys`, or everything when no key is given."""
+        with self._lock:
+            self.generation += 1
+            if not keys:
+                self._entries.clear()
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+warehouse_cache = TTLCache(
+    "warehouses",
+    lambda: get_settings().REFERENCE_CACHE_TTL_SECONDS,
+    lambda: get_settings().REFERENCE_CACHE_MAX_ENTRIES,
+)
+product_cache = TTLCache(
+    "products",
+    lambda: get_settings().REFERENCE_CACHE_TTL_SECONDS,
+    lambda: get_settings().REFERENCE_CACHE_MAX_ENTRIES,
+)
+REFERENCE_CACHES = (warehouse_cache, product_cache)
@@ -0,0 +1,219 @@
+# Stock valuation and inventory aging reports
+# Both are aggregated by the database, so only their result rows reach the
+# app, never a row per Stock or StockLedger entry:
+#   valuation  SUM(on_hand * product_unit_cost) per warehouse and category,
+#              one GROUP BY.
+#   aging      FIFO: what is on hand is taken to be the most recent inbound
+#              ledger entries, since the oldest are issued first. A running
+#              window sum over inbound entries, newest first, keeps only the
+#              entries that are still (partly) on hand, and how much of each.
+#              Those layers are bucketed by age here, with the
+#              quantity-weighted average age per warehouse.
+# On-hand quantity the ledger cannot explain is reported as `untracked`
+# instead of being given an age. Stock that predates the ledger has an
+# opening balance (migration 4) and ages from there.
+#
+# Results are cached per worker (`report_cache`), keyed by the ledger
+# high-water mark (the largest StockLedger.id): a report is only recomputed
+# once stock has moved. Aging is also keyed by the day, because its buckets
+# move with the clock. A cost or category edit moves no stock: those routes
+# invalidate the cache, and other workers catch up within
+# REPORT_CACHE_TTL_SECONDS.
+
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import and_, case, func, select
+from sqlmodel import Session
+
+from app.models.schemas import Product, Stock, StockLedger, Warehouse
+from app.services.ref_cache import TTLCache
+from app.settings import get_settings
+
+# upper bounds (in days) of the aging buckets, anything older goes in the last
+AGING_BUCKET_DAYS = (30, 60, 90, 180)
+AGING_BUCKETS = [
+    f"{low + 1 if low else 0}-{high}"
+    for low, high in zip((0, *AGING_BUCKET_DAYS), AGING_BUCKET_DAYS)
+] + [f"{AGING_BUCKET_DAYS[-1] + 1}+"]
+
+report_cache = TTLCache("reports", lambda: get_settings().REPORT_CACHE_TTL_SECONDS, 256)
+
+
+def ledger_high_water_mark(session: Session) -> int:
+    return session.execute(select(func.max(StockLedger.id))).scalar() or 0
+
+
+def _unit_cost():
+    return func.coalesce(Stock.product_unit_cost, 0)
+
+
+def _valuation(session: Session, warehouse_id: int | None) -> dict:
+    query = (
+        select(
+            Stock.warehouse_id,
+            Warehouse.name.label("warehouse_name"),
+            Product.category,
+            func.count().label("stock_rows"),
+            func.sum(Stock.on_hand).label("on_hand"),
+            func.sum(Stock.on_hand * _unit_cost()).label("value"),
+        )
+        .join(Product, Product.id == Stock.product_id)
+        .join(Warehouse, Warehouse.id == Stock.warehouse_id)
+        .group_by(Stock.warehouse_id, Warehouse.name, Product.category)
+        .order_by(Stock.warehouse_id, Product.category)
+    )
+    if warehouse_id is not None:
+        query = query.where(Stock.warehouse_id == warehouse_id)
+
+    items = [dict(row._mapping) for row in session.execute(query)]
+    warehouses = {}
+    for item in items:
+        totals = warehouses.setdefault(
+            item["warehouse_id"],
+            {
+                "warehouse_id": item["warehouse_id"],
+                "warehouse_name": item["warehouse_name"],
+                "on_hand": 0.0,
+                "value": 0.0,
+            },
+        )
+        totals["on_hand"] += item["on_hand"] or 0
+        totals["value"] += item["value"] or 0
+    return {
+        "items": items,
+        "warehouses": list(warehouses.values()),
+        "total_value": sum(totals["value"] for totals in warehouses.values()),
+    }
+
+
+def _fifo_layers(warehouse_id: int | None):
+    """(warehouse_id, received_at, quantity, unit_cost) of inbound ledger
+    entries still on hand under FIFO."""
+    inbound = select(
+        StockLedger.warehouse_id,
+        StockLedger.product_id,
+        StockLedger.created_at,
+        StockLedger.quantity_change,
+        # this entry plus every newer inbound entry of the same stock row
+        func.sum(StockLedger.quantity_change)
+        .over(
+            partition_by=(StockLedger.warehouse_id, StockLedger.product_id),
+            order_by=(StockLedger.created_at.desc(), StockLedger.id.desc()),
+        )
+        .label("newer_quantity"),
+    ).where(StockLedger.quantity_change > 0)
+    if warehouse_id is not None:
+        inbound = inbound.where(StockLedger.warehouse_id == warehouse_id)
+    inbound = inbound.subquery()
+
+    older_than_stock = inbound.c.newer_quantity - inbound.c.quantity_change
+    return select(
+        inbound.c.warehouse_id,
+        inbound.c.created_at,
+        case(
+            (inbound.c.newer_quantity <= Stock.on_hand, inbound.c.quantity_change),
+            else_=Stock.on_hand - older_than_stock,
+        ).label("quantity"),
+        _unit_cost(),
+    ).join(
+        Stock,
+        and_(
+            Stock.warehouse_id == inbound.c.warehouse_id,
+            Stock.product_id == inbound.c.product_id,
+            Stock.on_hand > 0,
+            older_than_stock < Stock.on_hand,
+        ),
+    )
+
+
+def _aging(session: Session, warehouse_id: int | None, as_of: datetime) -> dict:
+    on_hand = (
+        select(
+            Stock.warehouse_id,
+            Warehouse.name,
+            func.sum(Stock.on_hand),
+            func.sum(Stock.on_hand * _unit_cost()),
+        )
+        .join(Warehouse, Warehouse.id == Stock.warehouse_id)
+        .group_by(Stock.warehouse_id, Warehouse.name)
+        .order_by(Stock.warehouse_id)
+    )
+    if warehouse_id is not None:
+        on_hand = on_hand.where(Stock.warehouse_id == warehouse_id)
+    warehouses = {
+        key: {
+            "warehouse_id": key,
+            "warehouse_name": name,
+            "buckets": {bucket: [0.0, 0.0] for bucket in AGING_BUCKETS},
+            # whatever the layers do not cover stays untracked
+            "untracked": [quantity or 0.0, value or 0.0],
+        }
+        for key, name, quantity, value in session.execute(on_hand)
+    }
+
+    age_quantity = defaultdict(float)
+    for key, received_at, quantity, unit_cost in session.execute(
+        _fifo_layers(warehouse_id)
+    ):
+        report = warehouses[key]
+        age_days = (as_of - received_at).total_seconds() / 86400
+        bucket = report["buckets"][
+            AGING_BUCKETS[bisect_left(AGING_BUCKET_DAYS, age_days)]
+        ]
+        bucket[0] += quantity
+        bucket[1] += quantity * unit_cost
+        report["untracked"][0] -= quantity
+        report["untracked"][1] -= quantity * unit_cost
+        age_quantity[key] += age_days * quantity
+
+    def amounts(totals):
+        # + 0.0 turns the -0.0 of fully covered stock into 0.0
+        return {
+            "quantity": round(totals[0], 4) + 0.0,
+            "value": round(totals[1], 2) + 0.0,
+        }
+
+    for key, report in warehouses.items():
+        tracked = sum(quantity for quantity, _ in report["buckets"].values())
+        report["weighted_age_days"] = (
+            round(age_quantity[key] / tracked, 1) if tracked else None
+        )
+        report["buckets"] = {
+            bucket: amounts(totals) for bucket, totals in report["buckets"].items()
+        }
+        report["untracked"] = amounts(report["untracked"])
+    return {
+        "as_of": as_of,
+        "buckets": AGING_BUCKETS,
+        "warehouses": list(warehouses.values()),
+    }
+
+
+def _cached(session: Session, key: tuple, compute) -> dict:
+    generation = report_cache.generation
+    key = (*key, ledger_high_water_mark(session))
+    report = report_cache.get(key)
+    if report is None:
+        report = compute()
+        report["ledger_high_water_mark"] = key[-1]
+        report_cache.set(key, report, generation)
+    return report
+
+
+def stock_valuation(session: Session, warehouse_id: int | None = None) -> dict:
+    return _cached(
+        session,
+        ("valuation", warehouse_id),
+        lambda: _valuation(session, warehouse_id),
+    )
+
+
+def inventory_aging(session: Session, warehouse_id: int | None = None) -> dict:
+    as_of = datetime.utcnow()
+    return _cached(
+        session,
+        ("aging", warehouse_id, as_of.date()),
+        lambda: _aging(session, warehouse_id, as_of),
+    )
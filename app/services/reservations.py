@@ -0,0 +1,229 @@
+# Stock reservations
+# Creating a delivery order (or a transfer scheduled for later) sets its
+# quantities aside: Stock.free_to_use drops while on_hand stays, and one
+# active Reservation row per product records it. So at all times
+#   free_to_use = on_hand - sum(active reservations)
+# per (warehouse, product). Reserving uses the same conditional UPDATE as a
+# delivery (app/services/stock_movement.py), so two orders can never reserve
+# the same units. If there is not enough free stock the order is kept as
+# `waiting` without a reservation instead of failing.
+#
+# A reservation ends in one of two ways:
+#   consumed  the transaction is validated; only on_hand drops then
+#   released  the transaction is canceled or the reservation expires
+#             (RESERVATION_TTL_HOURS); free_to_use goes back up
+# Every status change is a conditional UPDATE on `status = 'active'`, so a
+# validation racing the expiry sweep consumes or releases it, never both.
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, or_, select, update
+from sqlmodel import Session
+
+from app.models.schemas import (
+    Reservation,
+    ReservationStatus,
+    Transaction,
+    TxnStatus,
+)
+from app.services.events import record_transaction_event
+from app.services.kpi_snapshot import record_status_change
+from app.services.stock_movement import (
+    InsufficientStock,
+    apply_bulk,
+    line_quantities,
+    reserve,
+)
+from app.settings import get_settings
+
+_reservation = Reservation.__table__
+_transaction = Transaction.__table__
+
+
+def _quantities(session: Session, transaction: Transaction) -> dict[int, float]:
+    if transaction.product_id is not None:
+        return {transaction.product_id: float(transaction.quantity)}
+    return line_quantities(session, transaction)
+
+
+def _expires_at(now: datetime) -> datetime | None:
+    ttl_hours = get_settings().RESERVATION_TTL_HOURS
+    return now + timedelta(hours=ttl_hours) if ttl_hours > 0 else None
+
+
+def reserve_transaction(session: Session, transaction: Transaction) -> bool:
+    """Reserve all outgoing quantities of a flushed transaction, or none.
+
+    Returns False, with nothing changed, if any product lacks free stock.
+    """
+    warehouse_id = transaction.from_warehouse
+    quantities = _quantities(session, transaction)
+    try:
+        if len(quantities) == 1:
+            [(product_id, quantity)] = quantities.items()
+            reserve(session, warehouse_id, product_id, quantity)
+        else:
+            # locks the rows in product order and checks them all first
+            apply_bulk(
+                session,
+                warehouse_id,
+                dict.fromkeys(quantities, 0),
+                transaction.id,
+                free_deltas={product_id: -q for product_id, q in quantities.items()},
+            )
+    except InsufficientStock:
+        return False
+
+    now = datetime.utcnow()
+    expires_at = _expires_at(now)
+    session.execute(
+        insert(_reservation),
+        [
+            {
+                "transaction_id": transaction.id,
+                "warehouse_id": warehouse_id,
+                "product_id": product_id,
+                "quantity": quantity,
+                "status": ReservationStatus.active,
+                "expires_at": expires_at,
+                "created_at": now,
+            }
+            for product_id, quantity in quantities.items()
+        ],
+    )
+    return True
+
+
+def reserve_or_wait(session: Session, transaction: Transaction) -> bool:
+    """Reserve a new transaction; mark it `waiting` when stock is short."""
+    if reserve_transaction(session, transaction):
+        return True
+    transaction.status = TxnStatus.waiting
+    session.add(transaction)
+    return False
+
+
+def consume_reservations(session: Session, transaction_id: int) -> dict[int, float]:
+    """Mark a transaction's active reservations consumed; reserved qty per product."""
+    rows = session.execute(
+        update(_reservation)
+        .where(
+            _reservation.c.transaction_id == transaction_id,
+            _reservation.c.status == ReservationStatus.active,
+        )
+        .values(status=ReservationStatus.consumed)
+        .returning(_reservation.c.product_id, _reservation.c.quantity)
+    )
+    reserved: dict[int, float] = {}
+    for product_id, quantity in rows:
+        reserved[product_id] = reserved.get(product_id, 0) + quantity
+    return reserved
+
+
+def _release(session: Session, condition) -> set[int]:
+    """Release the active reservations matching `condition`.
+
+    Returns the ids of the transactions they belonged to.
+    """
+    rows = session.execute(
+        update(_reservation)
+        .where(condition, _reservation.c.status == ReservationStatus.active)
+        .values(status=ReservationStatus.released)
+        .returning(
+            _reservation.c.transaction_id,
+            _reservation.c.warehouse_id,
+            _reservation.c.product_id,
+            _reservation.c.quantity,
+        )
+    ).all()
+
+    by_warehouse: dict[int, dict[int, float]] = {}
+    for row in rows:
+        released = by_warehouse.setdefault(row.warehouse_id, {})
+        released[row.product_id] = released.get(row.product_id, 0) + row.quantity
+    for warehouse_id in sorted(by_warehouse):
+        released = by_warehouse[warehouse_id]
+        apply_bulk(
+            session,
+            warehouse_id,
+            dict.fromkeys(released, 0),
+            free_deltas=released,
+        )
+    return {row.transaction_id for row in rows}
+
+
+def release_transaction(session: Session, transaction_id: int) -> bool:
+    """Give back everything a (canceled) transaction still holds (no commit)."""
+    return bool(_release(session, _reservation.c.transaction_id == transaction_id))
+
+
+def release_expired(
+    session: Session, now: datetime | None = None, batch_size: int | None = None
+) -> int:
+    """Release expired reservations, and any left by canceled transactions.
+
+    Works in batches, each its own DB transaction. Rows another sweep (or a
+    validation) has locked are skipped and picked up on a later run.
+    Transactions that lost their reservation go back to `waiting`.
+    """
+    now = now or datetime.utcnow()
+    batch_size = batch_size or get_settings().RESERVATION_SWEEP_BATCH
+    canceled = select(_transaction.c.id).where(
+        _transaction.c.status == TxnStatus.canceled
+    )
+    released_count = 0
+    while True:
+        ids = (
+            session.execute(
+                select(_reservation.c.id)
+                .where(
+                    _reservation.c.status == ReservationStatus.active,
+                    or_(
+                        _reservation.c.expires_at <= now,
+                        _reservation.c.transaction_id.in_(canceled),
+                    ),
+                )
+                .order_by(_reservation.c.id)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            .scalars()
+            .all()
+        )
+        if not ids:
+            return released_count
+
+        transaction_ids = _release(session, _reservation.c.id.in_(ids))
+        waiting = session.execute(
+            update(_transaction)
+            .where(
+                _transaction.c.id.in_(transaction_ids),
+                _transaction.c.status == TxnStatus.ready,
+            )
+            .values(status=TxnStatus.waiting)
+            .returning(
+                _transaction.c.id,
+                _transaction.c.reference_number,
+                _transaction.c.type,
+                _transaction.c.status,
+                _transaction.c.from_warehouse,
+                _transaction.c.to_warehouse,
+            )
+        )
+        for transaction in waiting:
+            record_status_change(
+                session, transaction.type, TxnStatus.ready, TxnStatus.waiting
+            )
+            record_transaction_event(session, transaction)
+        session.commit()
+        released_count += len(ids)
+        if len(ids) < batch_size:
+            return released_count
+
+
+def expire_reservations():
+    """Periodic job: release expired reservations with its own session."""
+    from app.models.create_db import engine
+
+    with Session(engine) as session:
+        release_expired(session)
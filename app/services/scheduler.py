@@ -0,0 +1,53 @@
+# Periodic background jobs
+# Jobs are plain sync callables (they open their own Session) registered with
+# `register_periodic`. They run on the event loop of each uvicorn worker,
+# off-loaded to the threadpool so a slow job never blocks request handling.
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Callable
+
+from starlette.concurrency import run_in_threadpool
+
+
+@dataclass
+class PeriodicJob:
+    name: str
+    interval_seconds: float
+    func: Callable[[], None]
+
+
+logger = logging.getLogger("app.scheduler")
+
+_jobs: list[PeriodicJob] = []
+_tasks: list[asyncio.Task] = []
+
+
+def register_periodic(name: str, interval_seconds: float, func: Callable[[], None]):
+    _jobs.append(PeriodicJob(name, interval_seconds, func))
+
+
+async def _run_forever(job: PeriodicJob):
+    while True:
+        await asyncio.sleep(job.interval_seconds)
+        try:
+            await run_in_threadpool(job.func)
+        except Exception:
+            # keep the job alive, the next tick may succeed
+            logger.exception(
+                "Periodic job %s failed", job.name, extra={"job": job.name}
+            )
+
+
+def start():
+    for job in _jobs:
+        if job.interval_seconds > 0:
+            _tasks.append(asyncio.create_task(_run_forever(job), name=job.name))
+
+
+async def stop():
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
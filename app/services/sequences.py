@@ -0,0 +1,71 @@
+# Reference number allocator
+# References look like "<warehouse_id>/IN/<n>". Each (warehouse, type) pair
+# has one ReferenceSequence row that is bumped with a single
+# UPDATE ... RETURNING, so allocation is O(1) regardless of table size. The
+# row stays locked until the caller's transaction ends: concurrent creators
+# for the same pair queue up instead of racing to the same number, and a
+# rolled back creation also rolls back its number, keeping the sequence
+# gap-free.
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+
+from app.models.schemas import ReferenceSequence, Transaction, TxnType
+
+REFERENCE_CODES = {
+    TxnType.receipt: "IN",
+    TxnType.delivery: "OUT",
+    TxnType.internal_adjustment: "INT",
+}
+
+
+def _bump(session: Session, warehouse_id: int, txn_type: TxnType) -> int | None:
+    return session.execute(
+        update(ReferenceSequence)
+        .where(
+            ReferenceSequence.warehouse_id == warehouse_id,
+            ReferenceSequence.txn_type == txn_type,
+        )
+        .values(last_value=ReferenceSequence.last_value + 1)
+        .returning(ReferenceSequence.last_value)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+
+
+def _highest_existing(session: Session, prefix: str) -> int:
+    # one-off scan when a sequence is first created, so numbers handed out
+    # before sequences existed are never reused
+    highest = 0
+    references = session.execute(
+        select(Transaction.reference_number).where(
+            Transaction.reference_number.startswith(prefix, autoescape=True)
+        )
+    ).scalars()
+    for reference in references:
+        suffix = reference[len(prefix) :]
+        if suffix.isdigit():
+            highest = max(highest, int(suffix))
+    return highest
+
+
+def next_reference(session: Session, warehouse_id: int, txn_type: TxnType) -> str:
+    prefix = f"{warehouse_id}/{REFERENCE_CODES[txn_type]}/"
+
+    value = _bump(session, warehouse_id, txn_type)
+    if value is None:
+        value = _highest_existing(session, prefix) + 1
+        try:
+            # savepoint: another request may create the same sequence first
+            with session.begin_nested():
+                session.execute(
+                    insert(ReferenceSequence).values(
+                        warehouse_id=warehouse_id,
+                        txn_type=txn_type,
+                        last_value=value,
+                    )
+                )
+        except IntegrityError:
+            value = _bump(session, warehouse_id, txn_type)
+
+    return f"{prefix}{value}"
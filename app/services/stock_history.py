@@ -0,0 +1,136 @@
+# Point-in-time stock
+# A LedgerCheckpoint rolls StockLedger up into per-(warehouse, product)
+# StockSnapshot balances. A new checkpoint is built from the previous one plus
+# only the ledger rows in between, with a single INSERT ... SELECT.
+#
+# "What was on hand at T" starts from the newest checkpoint at or before T and
+# replays only the ledger rows after it, so historical queries cost
+# O(movements since the checkpoint) instead of O(history).
+#
+# Ledger rows are timestamped before their transaction commits, so a
+# checkpoint only covers ledger rows older than LEDGER_SNAPSHOT_SETTLE_SECONDS
+# to make sure no slow transaction can still add a row behind it.
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, literal, select, union_all
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+
+from app.models.schemas import LedgerCheckpoint, StockLedger, StockSnapshot
+
+LEDGER_SNAPSHOT_SETTLE_SECONDS = 300
+
+
+def _latest_checkpoint(session: Session, at_or_before: datetime | None = None):
+    query = select(LedgerCheckpoint).order_by(LedgerCheckpoint.taken_at.desc())
+    if at_or_before is not None:
+        query = query.where(LedgerCheckpoint.taken_at <= at_or_before)
+    return session.scalars(query.limit(1)).first()
+
+
+def _balances(
+    checkpoint: LedgerCheckpoint | None,
+    until: datetime,
+    warehouse_id: int | None = None,
+    product_id: int | None = None,
+):
+    """Subquery of (warehouse_id, product_id, on_hand) at `until`."""
+    delta = select(
+        StockLedger.warehouse_id,
+        StockLedger.product_id,
+        StockLedger.quantity_change.label("quantity"),
+    ).where(StockLedger.created_at <= until)
+    parts = [delta]
+
+    if checkpoint is not None:
+        delta = delta.where(StockLedger.created_at > checkpoint.taken_at)
+        base = select(
+            StockSnapshot.warehouse_id,
+            StockSnapshot.product_id,
+            StockSnapshot.on_hand.label("quantity"),
+        ).where(StockSnapshot.checkpoint_id == checkpoint.id)
+        parts = [base, delta]
+
+    if warehouse_id is not None:
+        parts = [
+            p.where(p.selected_columns.warehouse_id == warehouse_id) for p in parts
+        ]
+    if product_id is not None:
+        parts = [p.where(p.selected_columns.product_id == product_id) for p in parts]
+
+    combined = union_all(*parts).subquery()
+    return (
+        select(
+            combined.c.warehouse_id,
+            combined.c.product_id,
+            func.sum(combined.c.quantity).label("on_hand"),
+        )
+        .group_by(combined.c.warehouse_id, combined.c.product_id)
+        .order_by(combined.c.warehouse_id, combined.c.product_id)
+    )
+
+
+def take_checkpoint(
+    session: Session, cutoff: datetime | None = None
+) -> LedgerCheckpoint | None:
+    """Roll the ledger up to `cutoff` into a new checkpoint (commits).
+
+    Returns None when there is nothing newer to roll up or another worker
+    already took a checkpoint at the same cutoff.
+    """
+    if cutoff is None:
+        cutoff = datetime.utcnow() - timedelta(seconds=LEDGER_SNAPSHOT_SETTLE_SECONDS)
+        cutoff = cutoff.replace(microsecond=0)
+
+    previous = _latest_checkpoint(session)
+    if previous is not None and previous.taken_at >= cutoff:
+        return None
+
+    checkpoint = LedgerCheckpoint(taken_at=cutoff)
+    try:
+        # savepoint: another worker may take the same checkpoint first
+        with session.begin_nested():
+            session.add(checkpoint)
+    except IntegrityError:
+        session.rollback()
+        return None
+
+    balances = _balances(previous, cutoff).subquery()
+    session.execute(
+        insert(StockSnapshot).from_select(
+            ["checkpoint_id", "warehouse_id", "product_id", "on_hand"],
+            select(
+                literal(checkpoint.id),
+                balances.c.warehouse_id,
+                balances.c.product_id,
+                balances.c.on_hand,
+            ),
+        )
+    )
+    session.commit()
+    session.refresh(checkpoint)
+    return checkpoint
+
+
+def stock_as_of(
+    session: Session,
+    as_of: datetime,
+    warehouse_id: int | None = None,
+    product_id: int | None = None,
+) -> dict:
+    checkpoint = _latest_checkpoint(session, as_of)
+    rows = session.execute(_balances(checkpoint, as_of, warehouse_id, product_id))
+    return {
+        "as_of": as_of,
+        "checkpoint_taken_at": checkpoint.taken_at if checkpoint else None,
+        "items": [dict(row._mapping) for row in rows],
+    }
+
+
+def snapshot_ledger():
+    """Periodic job: take a checkpoint with its own session."""
+    from app.models.create_db import engine
+
+    with Session(engine) as session:
+        take_checkpoint(session)
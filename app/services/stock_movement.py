@@ -0,0 +1,580 @@
+# Stock movement service
+# Every change to Stock.on_hand / free_to_use goes through this module. Each
+# movement is a single conditional UPDATE ... RETURNING executed inside the
+# caller's DB transaction, so the availability check and the decrement are one
+# atomic statement: two concurrent deliveries can never both pass the check.
+# free_to_use is on_hand minus active reservations (app/services/reservations.py):
+# reserving only lowers free_to_use, consuming a reservation only lowers on_hand.
+# Every movement also appends its StockLedger rows (app/services/ledger.py) in
+# that same transaction. Nothing here commits; the route commits once the
+# whole movement succeeded.
+# product_unit_cost is the weighted-average cost of the row: stock received
+# at a known unit cost (receipts, and transfers at the source row's cost)
+# is folded into it by the same statement that adds the quantity. Stock
+# received without a cost leaves the average unchanged.
+# A movement touching more than one stock row locks them all up front, in
+# (warehouse_id, product_id) order (lock_stock), before its first UPDATE.
+# Batch validation locks in the same order, so no two movements ever hold
+# a row the other one waits for.
+
+from datetime import datetime
+
+from sqlalchemy import bindparam, case, func, insert, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+
+from app.models.schemas import Stock, Transaction, TransactionLine, TxnStatus, TxnType
+from app.services.events import record_stock_event, record_transaction_event
+from app.services.kpi_snapshot import record_status_change, record_stock_change
+from app.services.ledger import append_entries, append_entry
+from app.services.low_stock import record_stock_level
+
+_RETURNING = (Stock.id, Stock.on_hand, Stock.free_to_use, Stock.product_unit_cost)
+_stock = Stock.__table__
+
+# executemany statements for set-based movements, see apply_bulk
+_BULK_SHIFT = (
+    update(_stock)
+    .where(_stock.c.id == bindparam("stock_id"))
+    .values(
+        on_hand=_stock.c.on_hand + bindparam("delta"),
+        free_to_use=_stock.c.free_to_use + bindparam("free_delta"),
+    )
+)
+_BULK_SHIFT_COST = _BULK_SHIFT.values(product_unit_cost=bindparam("unit_cost"))
+
+
+class InsufficientStock(Exception):
+    def __init__(self, warehouse_id: int, product_id: int, quantity: float):
+        self.warehouse_id = warehouse_id
+        self.product_id = product_id
+        self.quantity = quantity
+        super().__init__(
+            f"Insufficient stock of product {product_id} "
+            f"in warehouse {warehouse_id} for quantity {quantity}"
+        )
+
+
+def lock_stock(session: Session, keys):
+    """Lock the existing stock rows of `keys` ((warehouse_id, product_id)
+    pairs) in key order, with one SELECT ... FOR UPDATE."""
+    session.execute(
+        select(Stock.id)
+        .where(tuple_(Stock.warehouse_id, Stock.product_id).in_(sorted(set(keys))))
+        .order_by(Stock.warehouse_id, Stock.product_id)
+        .with_for_update()
+    )
+
+
+def _state(row) -> tuple[float, float, float]:
+    return (row.on_hand, row.free_to_use, row.product_unit_cost or 0)
+
+
+def average_cost(
+    on_hand: float, cost: float | None, quantity: float, unit_cost: float
+) -> float:
+    """Weighted-average cost after receiving `quantity` at `unit_cost`."""
+    if on_hand <= 0:
+        return unit_cost
+    return (on_hand * (cost or 0) + quantity * unit_cost) / (on_hand + quantity)
+
+
+def _average_cost_column(quantity: float, unit_cost: float):
+    # average_cost, evaluated by the UPDATE against the row's current values
+    return case(
+        (
+            Stock.on_hand > 0,
+            (
+                Stock.on_hand * func.coalesce(Stock.product_unit_cost, 0)
+                + quantity * unit_cost
+            )
+            / (Stock.on_hand + quantity),
+        ),
+        else_=unit_cost,
+    )
+
+
+def _shift(
+    session: Session,
+    warehouse_id: int,
+    product_id: int,
+    delta: float,
+    *conditions,
+    transaction_id: int | None = None,
+    free_delta: float | None = None,
+    unit_cost: float | None = None,
+):
+    """Add `delta` to on_hand and `free_delta` (default: `delta`) to free_to_use
+    of one stock row in one statement, folding `unit_cost` into its average."""
+    if free_delta is None:
+        free_delta = delta
+    values = {
+        "on_hand": Stock.on_hand + delta,
+        "free_to_use": Stock.free_to_use + free_delta,
+    }
+    if unit_cost is not None:
+        values["product_unit_cost"] = _average_cost_column(delta, unit_cost)
+    row = session.execute(
+        update(Stock)
+        .where(
+            Stock.warehouse_id == warehouse_id,
+            Stock.product_id == product_id,
+            *conditions,
+        )
+        .values(**values)
+        .returning(*_RETURNING)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if row is not None:
+        after = _state(row)
+        before_on_hand = after[0] - delta
+        before_cost = after[2]
+        if unit_cost is not None:
+            # the value the row had, derived back from the new average
+            before_cost = (
+                (after[0] * after[2] - delta * unit_cost) / before_on_hand
+                if before_on_hand > 0
+                else 0
+            )
+        before = (before_on_hand, after[1] - free_delta, before_cost)
+        record_stock_change(session, before, after)
+        record_stock_event(
+            session, warehouse_id, product_id, row.on_hand, row.free_to_use
+        )
+        record_stock_level(session, warehouse_id, product_id)
+        append_entry(session, warehouse_id, product_id, delta, transaction_id)
+    return row
+
+
+def receive(
+    session: Session,
+    warehouse_id: int,
+    product_id: int,
+    quantity: float,
+    transaction_id: int | None = None,
+    unit_cost: float | None = None,
+):
+    """Add `quantity` to a stock row, creating the row if needed."""
+    row = _shift(
+        session,
+        warehouse_id,
+        product_id,
+        quantity,
+        transaction_id=transaction_id,
+        unit_cost=unit_cost,
+    )
+    if row is not None:
+        return row
+
+    try:
+        # savepoint: a concurrent receipt may create the same row first
+        with session.begin_nested():
+            row = session.execute(
+                insert(Stock)
+                .values(
+                    warehouse_id=warehouse_id,
+                    product_id=product_id,
+                    on_hand=quantity,
+                    free_to_use=quantity,
+                    product_unit_cost=unit_cost or 0,
+                )
+                .returning(*_RETURNING)
+            ).one()
+    except IntegrityError:
+        return _shift(
+            session,
+            warehouse_id,
+            product_id,
+            quantity,
+            transaction_id=transaction_id,
+            unit_cost=unit_cost,
+        )
+
+    record_stock_change(session, None, _state(row))
+    record_stock_event(session, warehouse_id, product_id, row.on_hand, row.free_to_use)
+    record_stock_level(session, warehouse_id, product_id)
+    append_entry(session, warehouse_id, product_id, quantity, transaction_id)
+    return row
+
+
+def issue(
+    session: Session,
+    warehouse_id: int,
+    product_id: int,
+    quantity: float,
+    transaction_id: int | None = None,
+):
+    """Remove `quantity` from a stock row, only if that much is free to use."""
+    row = _shift(
+        session,
+        warehouse_id,
+        product_id,
+        -quantity,
+        Stock.free_to_use >= quantity,
+        transaction_id=transaction_id,
+    )
+    if row is None:
+        raise InsufficientStock(warehouse_id, product_id, quantity)
+    return row
+
+
+def reserve(session: Session, warehouse_id: int, product_id: int, quantity: float):
+    """Set `quantity` aside: lower free_to_use only, if that much is free."""
+    row = _shift(
+        session,
+        warehouse_id,
+        product_id,
+        0,
+        Stock.free_to_use >= quantity,
+        free_delta=-quantity,
+    )
+    if row is None:
+        raise InsufficientStock(warehouse_id, product_id, quantity)
+    return row
+
+
+def issue_reserved(
+    session: Session,
+    warehouse_id: int,
+    product_id: int,
+    quantity: float,
+    reserved: float,
+    transaction_id: int | None = None,
+):
+    """Issue `quantity` of which `reserved` was already taken from free_to_use."""
+    if not reserved:
+        return issue(session, warehouse_id, product_id, quantity, transaction_id)
+    unreserved = quantity - reserved
+    row = _shift(
+        session,
+        warehouse_id,
+        product_id,
+        -quantity,
+        Stock.on_hand >= quantity,
+        Stock.free_to_use >= unreserved,
+        transaction_id=transaction_id,
+        free_delta=-unreserved,
+    )
+    if row is None:
+        raise InsufficientStock(warehouse_id, product_id, quantity)
+    return row
+
+
+def transfer(
+    session: Session,
+    from_warehouse_id: int,
+    to_warehouse_id: int,
+    product_id: int,
+    quantity: float,
+    transaction_id: int | None = None,
+    reserved: float = 0,
+):
+    # the source is updated first, but not necessarily locked first
+    lock_stock(
+        session, [(from_warehouse_id, product_id), (to_warehouse_id, product_id)]
+    )
+    source = issue_reserved(
+        session, from_warehouse_id, product_id, quantity, reserved, transaction_id
+    )
+    # the moved stock keeps the cost it had at the source
+    destination = receive(
+        session,
+        to_warehouse_id,
+        product_id,
+        quantity,
+        transaction_id,
+        unit_cost=source.product_unit_cost,
+    )
+    return source, destination
+
+
+def adjust(
+    session: Session,
+    warehouse_id: int,
+    product_id: int,
+    counted_qty: float,
+    transaction_id: int | None = None,
+):
+    """Set on_hand to a physical count; returns (stock_row, system_qty, delta)."""
+    # lock the row so no movement slips in between reading and writing
+    current = session.execute(
+        select(*_RETURNING)
+        .where(Stock.warehouse_id == warehouse_id, Stock.product_id == product_id)
+        .with_for_update()
+    ).first()
+    if current is None:
+        return None, None, None
+
+    system_qty = current.on_hand
+    delta = counted_qty - system_qty
+    row = _shift(
+        session, warehouse_id, product_id, delta, transaction_id=transaction_id
+    )
+    return row, system_qty, delta
+
+
+def apply_bulk(
+    session: Session,
+    warehouse_id: int,
+    deltas: dict[int, float],
+    transaction_id: int | None = None,
+    free_deltas: dict[int, float] | None = None,
+    unit_costs: dict[int, float] | None = None,
+) -> dict[int, float]:
+    """Apply many per-product deltas to one warehouse in a few statements.
+
+    The affected rows are locked in product order (the lock_stock order for
+    one warehouse), checked in Python while locked, and
+    updated with one executemany UPDATE. Missing rows, only allowed for
+    positive deltas, are created with one executemany INSERT. Ledger rows
+    for all of them are appended with one more executemany INSERT.
+    `free_deltas` overrides the change to free_to_use (default: `deltas`);
+    `unit_costs` are folded into the average cost of the rows receiving them.
+    Returns the unit cost of every row afterwards, by product.
+    """
+    if free_deltas is None:
+        free_deltas = deltas
+    unit_costs = unit_costs or {}
+    product_ids = sorted(deltas)
+    current = {
+        row.product_id: row
+        for row in session.execute(
+            select(Stock.product_id, *_RETURNING)
+            .where(
+                Stock.warehouse_id == warehouse_id, Stock.product_id.in_(product_ids)
+            )
+            .order_by(Stock.product_id)
+            .with_for_update()
+        )
+    }
+
+    for product_id in product_ids:
+        delta, free_delta = deltas[product_id], free_deltas[product_id]
+        row = current.get(product_id)
+        if (delta < 0 or free_delta < 0) and (
+            row is None or row.on_hand < -delta or row.free_to_use < -free_delta
+        ):
+            raise InsufficientStock(warehouse_id, product_id, -min(delta, free_delta))
+
+    # new averages, computed from the locked rows
+    costs = {}
+    for product_id, row in current.items():
+        unit_cost = unit_costs.get(product_id)
+        costs[product_id] = (
+            average_cost(
+                row.on_hand, row.product_unit_cost, deltas[product_id], unit_cost
+            )
+            if unit_cost is not None and deltas[product_id] > 0
+            else row.product_unit_cost or 0
+        )
+
+    updates = [
+        {
+            "stock_id": current[product_id].id,
+            "delta": deltas[product_id],
+            "free_delta": free_deltas[product_id],
+            "unit_cost": costs[product_id],
+        }
+        for product_id in product_ids
+        if product_id in current
+    ]
+    if updates:
+        session.execute(_BULK_SHIFT_COST if unit_costs else _BULK_SHIFT, updates)
+        for product_id in current:
+            before = _state(current[product_id])
+            delta, free_delta = deltas[product_id], free_deltas[product_id]
+            after = (before[0] + delta, before[1] + free_delta, costs[product_id])
+            record_stock_change(session, before, after)
+            record_stock_event(session, warehouse_id, product_id, after[0], after[1])
+            record_stock_level(session, warehouse_id, product_id)
+
+    logged = list(current)
+    missing = [product_id for product_id in product_ids if product_id not in current]
+    if missing:
+        try:
+            with session.begin_nested():
+                session.execute(
+                    insert(_stock),
+                    [
+                        {
+                            "warehouse_id": warehouse_id,
+                            "product_id": product_id,
+                            "on_hand": deltas[product_id],
+                            "free_to_use": deltas[product_id],
+                            "product_unit_cost": unit_costs.get(product_id, 0),
+                        }
+                        for product_id in missing
+                    ],
+                )
+        except IntegrityError:
+            # a concurrent movement created some of the rows, go row by row;
+            # receive() logs those itself
+            for product_id in missing:
+                row = receive(
+                    session,
+                    warehouse_id,
+                    product_id,
+                    deltas[product_id],
+                    transaction_id,
+                    unit_cost=unit_costs.get(product_id),
+                )
+                costs[product_id] = row.product_unit_cost or 0
+        else:
+            for product_id in missing:
+                quantity = deltas[product_id]
+                costs[product_id] = unit_costs.get(product_id, 0)
+                record_stock_change(
+                    session, None, (quantity, quantity, costs[product_id])
+                )
+                record_stock_event(
+                    session, warehouse_id, product_id, quantity, quantity
+                )
+                record_stock_level(session, warehouse_id, product_id)
+            logged.extend(missing)
+
+    append_entries(
+        session,
+        [
+            {
+                "warehouse_id": warehouse_id,
+                "product_id": product_id,
+                "quantity_change": deltas[product_id],
+                "transaction_id": transaction_id,
+            }
+            for product_id in logged
+        ],
+    )
+    return costs
+
+
+def line_quantities(session: Session, transaction: Transaction) -> dict[int, float]:
+    quantities: dict[int, float] = {}
+    rows = session.execute(
+        select(TransactionLine.product_id, TransactionLine.quantity).where(
+            TransactionLine.transaction_id == transaction.id
+        )
+    )
+    for product_id, quantity in rows:
+        quantities[product_id] = quantities.get(product_id, 0) + float(quantity)
+    return quantities
+
+
+def line_unit_costs(
+    session: Session, transaction_ids: list[int]
+) -> dict[tuple[int, int], float]:
+    """Quantity-weighted unit cost per (transaction_id, product_id), over the
+    lines that carry a unit_cost."""
+    costed = TransactionLine.unit_cost.is_not(None)
+    rows = session.execute(
+        select(
+            TransactionLine.transaction_id,
+            TransactionLine.product_id,
+            func.sum(TransactionLine.quantity * TransactionLine.unit_cost),
+            func.sum(TransactionLine.quantity),
+        )
+        .where(TransactionLine.transaction_id.in_(transaction_ids), costed)
+        .group_by(TransactionLine.transaction_id, TransactionLine.product_id)
+    )
+    return {
+        (transaction_id, product_id): value / quantity
+        for transaction_id, product_id, value, quantity in rows
+        if quantity
+    }
+
+
+def _apply_lines(session: Session, transaction: Transaction, reserved: dict):
+    quantities = line_quantities(session, transaction)
+    unit_costs = {}
+    if transaction.type == TxnType.receipt:
+        unit_costs = {
+            product_id: cost
+            for (_, product_id), cost in line_unit_costs(
+                session, [transaction.id]
+            ).items()
+        }
+    if transaction.type == TxnType.internal_adjustment:
+        # both warehouses' rows, before apply_bulk locks them one side at a time
+        lock_stock(
+            session,
+            [
+                (warehouse_id, product_id)
+                for warehouse_id in (
+                    transaction.from_warehouse,
+                    transaction.to_warehouse,
+                )
+                for product_id in quantities
+            ],
+        )
+    if transaction.type in (TxnType.delivery, TxnType.internal_adjustment):
+        # a transfer moves stock at the cost it had at the source
+        unit_costs = apply_bulk(
+            session,
+            transaction.from_warehouse,
+            {product_id: -q for product_id, q in quantities.items()},
+            transaction.id,
+            free_deltas={
+                product_id: reserved.get(product_id, 0) - q
+                for product_id, q in quantities.items()
+            },
+        )
+    if transaction.type in (TxnType.receipt, TxnType.internal_adjustment):
+        apply_bulk(
+            session,
+            transaction.to_warehouse,
+            quantities,
+            transaction.id,
+            unit_costs=unit_costs,
+        )
+
+
+def apply_transaction(session: Session, transaction: Transaction):
+    """Apply the stock effect of a ready transaction and mark it done.
+
+    Single-product transactions carry product_id/quantity on the header;
+    multi-line ones (product_id is None) are applied from TransactionLine.
+    Outgoing quantities covered by the transaction's active reservations were
+    already taken from free_to_use, so only on_hand drops for those.
+    """
+    # imported here: reservations builds on the movements in this module
+    from app.services.reservations import consume_reservations
+
+    reserved = {}
+    if transaction.type in (TxnType.delivery, TxnType.internal_adjustment):
+        reserved = consume_reservations(session, transaction.id)
+    product_id = transaction.product_id
+    if product_id is None:
+        _apply_lines(session, transaction, reserved)
+    elif transaction.type == TxnType.receipt:
+        receive(
+            session,
+            transaction.to_warehouse,
+            product_id,
+            float(transaction.quantity),
+            transaction.id,
+            unit_cost=transaction.unit_cost,
+        )
+    elif transaction.type == TxnType.delivery:
+        issue_reserved(
+            session,
+            transaction.from_warehouse,
+            product_id,
+            float(transaction.quantity),
+            reserved.get(product_id, 0),
+            transaction.id,
+        )
+    elif transaction.type == TxnType.internal_adjustment:
+        transfer(
+            session,
+            transaction.from_warehouse,
+            transaction.to_warehouse,
+            product_id,
+            float(transaction.quantity),
+            transaction.id,
+            reserved.get(product_id, 0),
+        )
+
+    record_status_change(session, transaction.type, transaction.status, TxnStatus.done)
+    transaction.status = TxnStatus.done
+    transaction.completion_date = datetime.utcnow()
+    session.add(transaction)
+    record_transaction_event(session, transaction)
@@ -1,11 +1,59 @@
-from fastapi import FastAPI
+from functools import lru_cache
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
     PG_DB: str
+    # optional read replica for read-only endpoints (see app/services/read_routing.py)
+    PG_DB_REPLICA: str | None = None
+    # how long a client's reads stick to the primary after it wrote
+    READ_YOUR_WRITES_SECONDS: float = 5
+    # seconds between full rebuilds of the in-memory dashboard KPI snapshot
+    KPI_RECONCILE_SECONDS: float = 60
+    # seconds between StockLedger checkpoints used for point-in-time stock
+    LEDGER_SNAPSHOT_SECONDS: float = 3600
+    # connection pool, per engine and per uvicorn worker (see app/services/db_pool.py)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # per-worker cache of warehouse / product reference data
+    REFERENCE_CACHE_TTL_SECONDS: float = 30
+    REFERENCE_CACHE_MAX_ENTRIES: int = 10_000
+    # upper bound on how stale another worker's cached valuation / aging report
+    # can be after a cost edit (see app/services/reports.py)
+    REPORT_CACHE_TTL_SECONDS: float = 300
+    # stock reservations of open deliveries / scheduled transfers
+    # (see app/services/reservations.py); a TTL of 0 never expires them
+    RESERVATION_TTL_HOURS: float = 72
+    RESERVATION_SWEEP_SECONDS: float = 60
+    RESERVATION_SWEEP_BATCH: int = 500
+    # auto-validation of transactions whose scheduled_date has passed
+    # (see app/services/auto_validation.py); 0 = not in the app, only via
+    # `python -m app.worker`
+    AUTO_VALIDATE_SECONDS: float = 0
+    AUTO_VALIDATE_BATCH: int = 500
+    AUTO_VALIDATE_RETRY_SECONDS: float = 300
+    # logging (see app/services/logging_config.py): level and "text" or "json"
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "text"
+    # request instrumentation (see app/services/instrumentation.py), 0 = off
+    SLOW_QUERY_MS: float = 200
+    N_PLUS_ONE_QUERY_THRESHOLD: int = 25
+    # server-side statement timeout in milliseconds (Postgres only), 0 = none
+    DB_STATEMENT_TIMEOUT_MS: int = 0
+    # apply pending migrations when a worker starts (see app/models/migrations.py);
+    # with many workers, turn this off and run `python -m app.cli migrate` once
+    # per deploy, workers then only check the schema version
+    MIGRATE_ON_STARTUP: bool = True
+    # import of app.main to the end of startup, logged as a warning when over
+    COLD_START_BUDGET_MS: float = 2000
     model_config = SettingsConfigDict(env_file=".env")
 
 
+# read from the environment / .env once per process
+@lru_cache
 def get_settings() -> Settings:
     return Settings()
@@ -0,0 +1,63 @@
+# Auto-validation worker
+# Validates transactions whose scheduled_date has passed, outside the API
+# processes (see app/services/auto_validation.py). Several can run at once.
+#   python -m app.worker --interval 5 --batch 500
+#   python -m app.worker --once
+# Inside the API instead: set AUTO_VALIDATE_SECONDS.
+
+import argparse
+import logging
+import signal
+import sys
+import threading
+
+from sqlmodel import Session
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.worker")
+    parser.add_argument(
+        "--interval", type=float, default=5, help="seconds between polls when idle"
+    )
+    parser.add_argument("--batch", type=int, default=None)
+    parser.add_argument(
+        "--once", action="store_true", help="validate what is due now, then exit"
+    )
+    args = parser.parse_args(argv)
+
+    from app.models.create_db import engine
+    from app.services import auto_validation
+    from app.services.logging_config import configure_logging
+    from app.settings import get_settings
+
+    settings = get_settings()
+    configure_logging(settings.LOG_LEVEL, settings.LOG_FORMAT)
+    logger = logging.getLogger("app.worker")
+
+    stopping = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stopping.set())
+
+    with Session(engine) as session:
+        while not stopping.is_set():
+            try:
+                validated = auto_validation.run_until_idle(session, args.batch)
+            except Exception:
+                # e.g. the database restarting; try again on the next poll
+                session.rollback()
+                logger.exception("Auto-validation run failed")
+                validated = 0
+            if validated:
+                logger.info(
+                    "Validated %d due transactions",
+                    validated,
+                    extra=auto_validation.metrics.as_dict(),
+                )
+            if args.once:
+                break
+            stopping.wait(args.interval)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
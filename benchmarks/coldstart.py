@@ -0,0 +1,79 @@
+# Cold start benchmark
+# Starts --runs fresh interpreters, one after another, each importing
+# app.main and running the app's startup (and shutdown) like a new uvicorn
+# worker would, against a database already migrated to the latest version.
+# Reports p50/max of the in-process import + startup time and of the whole
+# process, and fails when the slowest startup is over --budget-ms (defaults
+# to COLD_START_BUDGET_MS).
+#
+#   python -m benchmarks.coldstart --db sqlite:///bench.db --runs 10
+#   python -m benchmarks.coldstart --db postgresql://user:pw@localhost/bench
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+# what each child process runs; prints milliseconds from import to started
+_CHILD = """
+import time
+started = time.perf_counter()
+from fastapi.testclient import TestClient
+import app.main
+with TestClient(app.main.app):
+    print((time.perf_counter() - started) * 1000)
+"""
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    index = min(len(sorted_values) - 1, round(pct / 100 * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold start benchmark")
+    parser.add_argument("--db", default="sqlite:///bench.db")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    # app modules read the database URL from the settings at import time
+    os.environ["PG_DB"] = args.db
+    from app.models.create_db import engine
+    from app.models.migrations import migrate
+    from app.settings import get_settings
+
+    migrate(engine)
+    budget_ms = args.budget_ms or get_settings().COLD_START_BUDGET_MS
+
+    startup_ms, process_ms = [], []
+    for _ in range(args.runs):
+        started = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, "-c", _CHILD],
+            check=True,
+            capture_output=True,
+            text=True,
+            env={**os.environ, "LOG_LEVEL": "WARNING"},
+        ).stdout
+        process_ms.append((time.perf_counter() - started) * 1000)
+        startup_ms.append(float(output.strip().splitlines()[-1]))
+
+    startup_ms.sort()
+    process_ms.sort()
+    report = {
+        "runs": args.runs,
+        "budget_ms": budget_ms,
+        "startup_p50_ms": round(_percentile(startup_ms, 50), 1),
+        "startup_max_ms": round(startup_ms[-1], 1),
+        "process_p50_ms": round(_percentile(process_ms, 50), 1),
+        "process_max_ms": round(process_ms[-1], 1),
+    }
+    print(json.dumps(report, indent=2))
+    return 0 if not budget_ms or startup_ms[-1] <= budget_ms else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
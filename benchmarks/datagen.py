@@ -0,0 +1,343 @@
+# Synthetic inventory data generator
+# Fills an empty database with warehouses, products, stock, transactions
+# (with lines for multi-line ones) and a stock ledger whose entries add up to
+# every Stock.on_hand, at a chosen scale. The same --seed always produces the
+# same data, so benchmark runs are comparable. Rows are generated and
+# inserted in batches, so even the large scale runs in bounded memory.
+#
+#   python -m benchmarks.datagen --db sqlite:///bench.db --scale small --seed 1
+#   python -m benchmarks.datagen --db postgresql://user:pw@localhost/bench \
+#       --scale large
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from dataclasses import asdict, dataclass, replace
+from datetime import datetime, timedelta
+
+
+@dataclass(frozen=True)
+class Scale:
+    warehouses: int
+    products: int
+    ledger_rows: int
+    transactions: int
+    # warehouses each product is stocked in
+    stock_per_product: int = 3
+    # share of transactions still open (ready), the rest are done
+    pending_fraction: float = 0.05
+    # share of transactions with TransactionLine rows instead of a product
+    multi_line_fraction: float = 0.1
+    lines_per_transaction: int = 5
+
+
+SCALES = {
+    "tiny": Scale(warehouses=2, products=200, ledger_rows=5_000, transactions=500),
+    "small": Scale(
+        warehouses=5, products=5_000, ledger_rows=200_000, transactions=10_000
+    ),
+    "medium": Scale(
+        warehouses=20, products=50_000, ledger_rows=2_000_000, transactions=100_000
+    ),
+    "large": Scale(
+        warehouses=50,
+        products=100_000,
+        ledger_rows=10_000_000,
+        transactions=1_000_000,
+    ),
+}
+
+CATEGORIES = ("Furniture", "Electronics", "Hardware", "Office", "Packaging", "Tools")
+UOMS = ("unit", "box", "kg", "m")
+
+
+def _batched_insert(session, table, rows, batch_size: int) -> int:
+    """Insert an iterable of row dicts in executemany batches."""
+    from sqlalchemy import insert
+
+    statement = insert(table)
+    batch, count = [], 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            session.execute(statement, batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        session.execute(statement, batch)
+        count += len(batch)
+    return count
+
+
+def _ids(session, column) -> list[int]:
+    from sqlalchemy import select
+
+    return list(session.execute(select(column).order_by(column)).scalars())
+
+
+def generate(
+    engine,
+    scale: Scale,
+    seed: int = 0,
+    batch_size: int = 10_000,
+    days: int = 365,
+    now: datetime | None = None,
+) -> dict:
+    """Populate an empty schema; returns row counts and timings."""
+    from sqlalchemy import select
+    from sqlmodel import Session
+
+    from app.models.schemas import (
+        Product,
+        Stock,
+        StockLedger,
+        Transaction,
+        TransactionLine,
+        TxnStatus,
+        TxnType,
+        Warehouse,
+    )
+    from app.services.low_stock import rebuild_flags
+    from app.services.stock_history import take_checkpoint
+
+    rng = random.Random(seed)
+    now = now or datetime(2025, 1, 1)
+    start = now - timedelta(days=days)
+    span = (now - start).total_seconds()
+    counts, timings = {}, {}
+
+    def timed(name, func):
+        started = time.perf_counter()
+        counts[name] = func()
+        session.commit()
+        timings[name] = round(time.perf_counter() - started, 2)
+
+    with Session(engine) as session:
+        timed(
+            "warehouses",
+            lambda: _batched_insert(
+                session,
+                Warehouse.__table__,
+                (
+                    {
+                        "name": f"Warehouse {i}",
+                        "short_code": f"W{i:03d}",
+                        "address": f"{i} Depot Road",
+                    }
+                    for i in range(1, scale.warehouses + 1)
+                ),
+                batch_size,
+            ),
+        )
+        warehouse_ids = _ids(session, Warehouse.id)
+
+        timed(
+            "products",
+            lambda: _batched_insert(
+                session,
+                Product.__table__,
+                (
+                    {
+                        "name": f"Item {i}",
+                        "sku": f"GEN-{i:07d}",
+                        "category": rng.choice(CATEGORIES),
+                        "uom": rng.choice(UOMS),
+                    }
+                    for i in range(1, scale.products + 1)
+                ),
+                batch_size,
+            ),
+        )
+        product_ids = _ids(session, Product.id)
+
+        pending = int(scale.transactions * scale.pending_fraction)
+        done = scale.transactions - pending
+        types = (TxnType.receipt, TxnType.delivery, TxnType.internal_adjustment)
+
+        def transactions():
+            for i in range(scale.transactions):
+                txn_type = rng.choice(types)
+                created_at = start + timedelta(seconds=span * i / scale.transactions)
+                multi_line = rng.random() < scale.multi_line_fraction
+                from_warehouse = rng.choice(warehouse_ids)
+                to_warehouse = rng.choice(warehouse_ids)
+                is_done = i < done
+                yield {
+                    "type": txn_type,
+                    "status": TxnStatus.done if is_done else TxnStatus.ready,
+                    "reference_number": f"GEN/{txn_type.name}/{i + 1}",
+                    "product_id": None if multi_line else rng.choice(product_ids),
+                    "quantity": None if multi_line else float(rng.randint(1, 20)),
+                    "from_warehouse": (
+                        None if txn_type == TxnType.receipt else from_warehouse
+                    ),
+                    "to_warehouse": (
+                        None if txn_type == TxnType.delivery else to_warehouse
+                    ),
+                    "supplier": "Supplier XYZ" if txn_type == TxnType.receipt else None,
+                    "contact": "Generated",
+                    "created_at": created_at,
+                    "scheduled_date": created_at + timedelta(hours=rng.randint(1, 72)),
+                    "completion_date": (
+                        created_at + timedelta(hours=rng.randint(1, 96))
+                        if is_done
+                        else None
+                    ),
+                }
+
+        timed(
+            "transactions",
+            lambda: _batched_insert(
+                session, Transaction.__table__, transactions(), batch_size
+            ),
+        )
+        transaction_ids = _ids(session, Transaction.id)
+        done_ids = transaction_ids[:done]
+        multi_line_ids = list(
+            session.execute(
+                select(Transaction.id)
+                .where(Transaction.product_id.is_(None))
+                .order_by(Transaction.id)
+            ).scalars()
+        )
+
+        def lines():
+            for transaction_id in multi_line_ids:
+                for product_id in rng.sample(
+                    product_ids, min(scale.lines_per_transaction, len(product_ids))
+                ):
+                    yield {
+                        "transaction_id": transaction_id,
+                        "product_id": product_id,
+                        "quantity": float(rng.randint(1, 20)),
+                        "unit_cost": round(rng.uniform(1, 100), 2),
+                    }
+
+        timed(
+            "transaction_lines",
+            lambda: _batched_insert(
+                session, TransactionLine.__table__, lines(), batch_size
+            ),
+        )
+
+        # stock rows, each with a ledger history that sums to its on_hand
+        stocked = min(scale.stock_per_product, len(warehouse_ids))
+        stock_rows = len(product_ids) * stocked
+        per_row, extra = divmod(scale.ledger_rows, stock_rows)
+        stock_batch, ledger_batch = [], []
+        ledger_count = stock_count = 0
+        started = time.perf_counter()
+
+        def flush():
+            nonlocal stock_batch, ledger_batch
+            if stock_batch:
+                session.execute(Stock.__table__.insert(), stock_batch)
+            if ledger_batch:
+                session.execute(StockLedger.__table__.insert(), ledger_batch)
+            stock_batch, ledger_batch = [], []
+
+        row_index = 0
+        for product_id in product_ids:
+            for warehouse_id in rng.sample(warehouse_ids, stocked):
+                entries = max(1, per_row + (1 if row_index < extra else 0))
+                row_index += 1
+                on_hand = 0.0
+                for n in range(entries):
+                    if n == 0 or on_hand <= 0 or rng.random() < 0.5:
+                        change = float(
+                            rng.randint(1, 100) if n else rng.randint(50, 500)
+                        )
+                    else:
+                        change = -float(min(on_hand, rng.randint(1, 50)))
+                    on_hand += change
+                    ledger_batch.append(
+                        {
+                            "transaction_id": (
+                                rng.choice(done_ids) if done_ids and n else None
+                            ),
+                            "warehouse_id": warehouse_id,
+                            "product_id": product_id,
+                            "quantity_change": change,
+                            "created_at": start
+                            + timedelta(seconds=span * (n + 1) / (entries + 1)),
+                        }
+                    )
+                ledger_count += entries
+                stock_batch.append(
+                    {
+                        "warehouse_id": warehouse_id,
+                        "product_id": product_id,
+                        "product_unit_cost": round(rng.uniform(1, 100), 2),
+                        "on_hand": on_hand,
+                        "free_to_use": on_hand,
+                    }
+                )
+                stock_count += 1
+                if len(ledger_batch) >= batch_size:
+                    flush()
+        flush()
+        session.commit()
+        counts["stock"], counts["ledger_rows"] = stock_count, ledger_count
+        timings["stock_and_ledger"] = round(time.perf_counter() - started, 2)
+
+        started = time.perf_counter()
+        rebuild_flags(session)
+        take_checkpoint(session, cutoff=now)
+        timings["low_stock_flags_and_checkpoint"] = round(
+            time.perf_counter() - started, 2
+        )
+
+    return {"seed": seed, "scale": asdict(scale), "rows": counts, "seconds": timings}
+
+
+def prepare_database(url: str):
+    """Point the app at `url` and return a fresh, empty schema's engine."""
+    # app modules read the database URL from the settings at import time
+    os.environ["PG_DB"] = url
+    from sqlmodel import SQLModel
+
+    from app.models.create_db import engine
+    from app.models.migrations import migrate
+
+    SQLModel.metadata.drop_all(engine)
+    migrate(engine)
+    return engine
+
+
+def scale_from_args(args) -> Scale:
+    scale = SCALES[args.scale]
+    overrides = {
+        name: getattr(args, name)
+        for name in ("warehouses", "products", "ledger_rows", "transactions")
+        if getattr(args, name) is not None
+    }
+    return replace(scale, **overrides)
+
+
+def add_scale_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--scale", choices=sorted(SCALES), default="tiny")
+    parser.add_argument("--warehouses", type=int, default=None)
+    parser.add_argument("--products", type=int, default=None)
+    parser.add_argument("--ledger-rows", type=int, default=None)
+    parser.add_argument("--transactions", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Synthetic inventory data generator")
+    parser.add_argument("--db", default="sqlite:///bench.db")
+    add_scale_arguments(parser)
+    args = parser.parse_args(argv)
+
+    engine = prepare_database(args.db)
+    summary = generate(engine, scale_from_args(args), args.seed, args.batch_size)
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
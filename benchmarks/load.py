@@ -0,0 +1,275 @@
+# HTTP load benchmark
+# Drives a running server with --concurrency clients at once and reports
+# requests/sec and latency percentiles per scenario:
+#   dashboard  GET /dashboard/kpis and GET /dashboard/transactions
+#   receipts   creates one-unit receipts
+#   validate   validates pre-created one-unit delivery orders
+#   transfers  one-unit internal transfers between two warehouses
+# Scenarios work on their own freshly created warehouse/product, or spread
+# over generated data when given a Catalog (see benchmarks/suite.py). Requests
+# are drawn from --seed, so two runs send the same sequence.
+#
+# With --baseline-url, every scenario is also run, with the same seed, against
+# a second server on the same database, e.g. a build from before the routes
+# went async. Both runs are reported side by side. The baseline runs first
+# within each scenario, so neither side always gets the larger database:
+#
+#   git worktree add ../sync <last commit with sync routes>
+#   (cd ../sync && uvicorn app.main:app --workers 4 --port 8001)
+#   uvicorn app.main:app --workers 4
+#   python -m benchmarks.load --base-url http://127.0.0.1:8000 \
+#       --baseline-url http://127.0.0.1:8001 --concurrency 300
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import uuid
+from dataclasses import dataclass
+
+import httpx
+
+
+@dataclass
+class Catalog:
+    """Existing data to spread requests over."""
+
+    warehouse_ids: list[int]
+    product_ids: list[int]
+    # (warehouse_id, product_id) rows with plenty of free stock
+    stocked: list[tuple[int, int]]
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[index]
+
+
+async def _drive(client: httpx.AsyncClient, requests, concurrency: int) -> dict:
+    """Send `requests` ((method, url) pairs) from `concurrency` workers."""
+    queue = iter(requests)
+    latencies: list[float] = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        for method, url in queue:
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+    }
+
+
+async def _fixture(client: httpx.AsyncClient, rng: random.Random, quantity: float):
+    """Two new warehouses and a product with `quantity` in the first one."""
+    tag = f"{rng.getrandbits(32):08x}-{uuid.uuid4().hex[:4]}"
+    warehouses = [
+        (
+            await client.post(
+                "/warehouses/", json={"name": f"Load {tag} {n}", "short_code": tag}
+            )
+        ).json()["id"]
+        for n in range(2)
+    ]
+    product = (
+        await client.post(
+            "/products/",
+            params={"warehouse_id": warehouses[0], "quantity": quantity},
+            json={"name": f"Load {tag}", "sku": f"LOAD-{tag}", "uom": "unit"},
+        )
+    ).json()["product"]
+    return Catalog(warehouses, [product["id"]], [(warehouses[0], product["id"])])
+
+
+async def dashboard_requests(client, count: int, rng, catalog=None):
+    urls = ["/dashboard/kpis", "/dashboard/transactions?limit=50"]
+    return [("GET", urls[i % len(urls)]) for i in range(count)]
+
+
+async def receipt_requests(client, count: int, rng, catalog=None):
+    catalog = catalog or await _fixture(client, rng, 0)
+    return [
+        (
+            "POST",
+            "/products/create_receipt/?supplier=Load&quantity=1"
+            f"&product_id={rng.choice(catalog.product_ids)}"
+            f"&to_warehouse_id={rng.choice(catalog.warehouse_ids)}",
+        )
+        for _ in range(count)
+    ]
+
+
+async def validate_requests(client, count: int, rng, catalog=None):
+    # without a catalog: one warehouse/product with enough stock for every order
+    catalog = catalog or await _fixture(client, rng, count)
+    requests = []
+    for _ in range(count):
+        warehouse_id, product_id = rng.choice(catalog.stocked)
+        order = (
+            await client.post(
+                "/products/create_delivery_order/",
+                params={
+                    "product_id": product_id,
+                    "quantity": 1,
+                    "from_warehouse_id": warehouse_id,
+                },
+            )
+        ).json()
+        requests.append(("POST", f"/products/validate_transaction/{order['id']}"))
+    return requests
+
+
+async def transfer_requests(client, count: int, rng, catalog=None):
+    catalog = catalog or await _fixture(client, rng, count)
+    requests = []
+    for _ in range(count):
+        from_warehouse, product_id = rng.choice(catalog.stocked)
+        to_warehouse = rng.choice(catalog.warehouse_ids)
+        requests.append(
+            (
+                "POST",
+                "/products/create_internal_transfer/?quantity=1"
+                f"&product_id={product_id}&from_warehouse_id={from_warehouse}"
+                f"&to_warehouse_id={to_warehouse}",
+            )
+        )
+    return requests
+
+
+SCENARIOS = {
+    "dashboard": dashboard_requests,
+    "receipts": receipt_requests,
+    "validate": validate_requests,
+    "transfers": transfer_requests,
+}
+
+
+async def run_scenarios(
+    client: httpx.AsyncClient,
+    scenarios: list[str],
+    count: int,
+    concurrency: int,
+    seed: int = 0,
+    catalog: Catalog | None = None,
+) -> list[dict]:
+    results = []
+    for name in scenarios:
+        rng = random.Random(f"{seed}:{name}")
+        requests = await SCENARIOS[name](client, count, rng, catalog)
+        result = await _drive(client, requests, concurrency)
+        results.append({"scenario": name, "concurrency": concurrency, **result})
+    return results
+
+
+def side_by_side(results: list[dict], baseline: list[dict]) -> list[dict]:
+    """Per scenario throughput and p95 of both runs, and their ratios
+    (rps_ratio > 1 means faster than the baseline, p95_ratio > 1 slower)."""
+    previous = {result["scenario"]: result for result in baseline}
+    rows = []
+    for result in results:
+        before = previous[result["scenario"]]
+        rows.append(
+            {
+                "scenario": result["scenario"],
+                "rps": result["rps"],
+                "baseline_rps": before["rps"],
+                "rps_ratio": (
+                    round(result["rps"] / before["rps"], 2) if before["rps"] else None
+                ),
+                "p95_ms": result["p95_ms"],
+                "baseline_p95_ms": before["p95_ms"],
+                "p95_ratio": (
+                    round(result["p95_ms"] / before["p95_ms"], 2)
+                    if before["p95_ms"]
+                    else None
+                ),
+            }
+        )
+    return rows
+
+
+async def run(args) -> tuple[list[dict], list[dict]]:
+    """Results against --base-url, and against --baseline-url (or [])."""
+    limits = httpx.Limits(
+        max_connections=args.concurrency, max_keepalive_connections=args.concurrency
+    )
+
+    def client(base_url):
+        return httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout)
+
+    if not args.baseline_url:
+        async with client(args.base_url) as target:
+            results = await run_scenarios(
+                target, args.scenario, args.requests, args.concurrency, args.seed
+            )
+        return results, []
+
+    results, baseline = [], []
+    async with client(args.base_url) as target, client(args.baseline_url) as reference:
+        for name in args.scenario:
+            for side, runs in ((reference, baseline), (target, results)):
+                runs.extend(
+                    await run_scenarios(
+                        side, [name], args.requests, args.concurrency, args.seed
+                    )
+                )
+    return results, baseline
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP load benchmark")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument(
+        "--baseline-url", default=None, help="second server to compare against"
+    )
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=sorted(SCENARIOS),
+        help="repeatable, defaults to all scenarios",
+    )
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    args.scenario = args.scenario or sorted(SCENARIOS)
+
+    results, baseline = asyncio.run(run(args))
+    if baseline:
+        report = {
+            "results": results,
+            "baseline": baseline,
+            "comparison": side_by_side(results, baseline),
+        }
+    else:
+        report = results
+    print(json.dumps(report, indent=2))
+    return 0 if all(r["errors"] == 0 for r in results + baseline) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
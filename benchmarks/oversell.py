@@ -0,0 +1,130 @@
+# Concurrent delivery validation benchmark
+# Seeds one stock row with --stock units and --orders ready deliveries of one
+# unit each (more orders than stock), then validates all of them from
+# --workers threads at once, each with its own session, exactly like parallel
+# /products/validate_transaction calls. Passes only if exactly --stock
+# deliveries succeeded and on_hand ended at zero, i.e. nothing was oversold.
+#
+#   python -m benchmarks.oversell --db postgresql://user:pw@localhost/bench
+#   python -m benchmarks.oversell --db sqlite:///bench.db --orders 300
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Concurrent delivery validation benchmark"
+    )
+    parser.add_argument("--db", default="sqlite:///oversell_bench.db")
+    parser.add_argument("--stock", type=int, default=100)
+    parser.add_argument("--orders", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args(argv)
+
+    # app modules read the database URL from the settings at import time
+    os.environ.setdefault("PG_DB", args.db)
+    from sqlalchemy import create_engine
+    from sqlmodel import Session, SQLModel, select
+
+    from app.models.schemas import (
+        Product,
+        Stock,
+        Transaction,
+        TxnStatus,
+        TxnType,
+        Warehouse,
+    )
+    from app.services.stock_movement import InsufficientStock, apply_transaction
+
+    connect_args = {"timeout": 60} if args.db.startswith("sqlite") else {}
+    engine = create_engine(
+        args.db,
+        connect_args=connect_args,
+        pool_size=args.workers,
+        max_overflow=0,
+    )
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        warehouse = Warehouse(name="Bench", short_code="BN")
+        product = Product(name="Bench item", sku="BENCH-1", uom="unit")
+        session.add(warehouse)
+        session.add(product)
+        session.flush()
+        session.add(
+            Stock(
+                warehouse_id=warehouse.id,
+                product_id=product.id,
+                on_hand=args.stock,
+                free_to_use=args.stock,
+            )
+        )
+        orders = [
+            Transaction(
+                type=TxnType.delivery,
+                status=TxnStatus.ready,
+                product_id=product.id,
+                quantity=1,
+                from_warehouse=warehouse.id,
+            )
+            for _ in range(args.orders)
+        ]
+        session.add_all(orders)
+        session.commit()
+        order_ids = [order.id for order in orders]
+        warehouse_id, product_id = warehouse.id, product.id
+
+    def validate(transaction_id):
+        started = time.perf_counter()
+        with Session(engine) as session:
+            transaction = session.get(Transaction, transaction_id)
+            try:
+                apply_transaction(session, transaction)
+                session.commit()
+                ok = True
+            except InsufficientStock:
+                session.rollback()
+                ok = False
+        return ok, time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(validate, order_ids))
+    elapsed = time.perf_counter() - started
+
+    with Session(engine) as session:
+        stock = session.exec(
+            select(Stock).where(
+                Stock.warehouse_id == warehouse_id, Stock.product_id == product_id
+            )
+        ).one()
+
+    succeeded = sum(ok for ok, _ in results)
+    latencies = sorted(latency for _, latency in results)
+    report = {
+        "orders": args.orders,
+        "stock": args.stock,
+        "workers": args.workers,
+        "succeeded": succeeded,
+        "rejected": args.orders - succeeded,
+        "final_on_hand": stock.on_hand,
+        "final_free_to_use": stock.free_to_use,
+        "elapsed_s": round(elapsed, 3),
+        "validations_per_s": round(args.orders / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+        "oversold": stock.on_hand < 0 or succeeded > args.stock,
+    }
+    print(json.dumps(report, indent=2))
+    correct = succeeded == min(args.stock, args.orders) and not report["oversold"]
+    return 0 if correct else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+# Serialization benchmark
+# Loads --rows transactions from an in-memory SQLite database and times the
+# two listing paths, per 10k rows:
+#   before  ORM objects -> FastAPI jsonable_encoder -> JSONResponse
+#   after   row tuples (app/models/responses.py) -> orjson
+# "fetch" includes loading the rows, "encode" is the serialization alone.
+#
+#   python -m benchmarks.serialization --rows 10000 --repeat 5
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+
+def _timings(repeat: int, func) -> tuple[float, float]:
+    """Best and median wall time of `repeat` calls."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), statistics.median(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Listing serialization benchmark")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from sqlalchemy import insert
+    from sqlalchemy.pool import StaticPool
+    from sqlmodel import Session, SQLModel, create_engine, select
+
+    from app.models.responses import TRANSACTION_COLUMNS, rows_response
+    from app.models.schemas import Transaction, TxnStatus, TxnType
+
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    start = datetime(2024, 1, 1)
+    with Session(engine) as session:
+        session.execute(
+            insert(Transaction.__table__),
+            [
+                {
+                    "type": TxnType.delivery,
+                    "status": TxnStatus.done,
+                    "reference_number": f"1/OUT/{i}",
+                    "quantity": float(i % 50 + 1),
+                    "from_warehouse": None,
+                    "delivery_address": "1 Bench Street",
+                    "contact": "Customer ABC",
+                    "created_at": start + timedelta(seconds=i),
+                    "completion_date": start + timedelta(seconds=i, minutes=5),
+                }
+                for i in range(args.rows)
+            ],
+        )
+        session.commit()
+
+    def fetch_orm(session):
+        return session.exec(select(Transaction)).all()
+
+    def fetch_rows(session):
+        return session.execute(select(*TRANSACTION_COLUMNS)).all()
+
+    def encode_orm(objects):
+        return JSONResponse(jsonable_encoder(objects)).body
+
+    def encode_rows(rows):
+        return rows_response(rows).body
+
+    with Session(engine) as session:
+        objects = fetch_orm(session)
+        rows = fetch_rows(session)
+        assert json.loads(encode_orm(objects)) == json.loads(encode_rows(rows))
+
+        def orm_fetch_and_encode():
+            session.expunge_all()
+            encode_orm(fetch_orm(session))
+
+        results = {
+            "before": {
+                "encode": _timings(args.repeat, lambda: encode_orm(objects)),
+                "fetch+encode": _timings(args.repeat, orm_fetch_and_encode),
+            },
+            "after": {
+                "encode": _timings(args.repeat, lambda: encode_rows(rows)),
+                "fetch+encode": _timings(
+                    args.repeat, lambda: encode_rows(fetch_rows(session))
+                ),
+            },
+        }
+
+    per_10k = 10_000 / args.rows
+    report = {"rows": args.rows, "unit": "ms per 10k rows (best / median)"}
+    for path, timings in results.items():
+        report[path] = {
+            name: [round(t * 1000 * per_10k, 2) for t in pair]
+            for name, pair in timings.items()
+        }
+    report["speedup"] = {
+        name: round(results["before"][name][0] / results["after"][name][0], 1)
+        for name in results["before"]
+    }
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+# Reproducible benchmark suite
+# Generates a seeded dataset (benchmarks/datagen.py) in a fresh database,
+# then runs the load scenarios (benchmarks/load.py) spread over it, in
+# process through the ASGI app, or against --base-url when a server is
+# already running on that database. Writes throughput and latency
+# percentiles per scenario as JSON; with --baseline (an earlier --out file)
+# each scenario is compared to it and the run fails on a regression.
+#
+#   python -m benchmarks.suite --db sqlite:///bench.db --scale tiny \
+#       --out results.json
+#   python -m benchmarks.suite --db postgresql://user:pw@localhost/bench \
+#       --scale medium --concurrency 100 --baseline results.json
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import sys
+
+import httpx
+
+from benchmarks import datagen, load
+
+# tolerated slowdown against the baseline before a scenario counts as regressed
+DEFAULT_TOLERANCE = 0.15
+# pairs sampled from generated data for the write scenarios
+CATALOG_SIZE = 1000
+# free stock a (warehouse, product) row needs to take part in the write scenarios
+MIN_FREE_STOCK = 10
+
+
+def load_catalog(engine, seed: int) -> load.Catalog:
+    from sqlmodel import Session, select
+
+    from app.models.schemas import Product, Stock, Warehouse
+
+    rng = random.Random(seed)
+    with Session(engine) as session:
+        warehouse_ids = list(session.exec(select(Warehouse.id).order_by(Warehouse.id)))
+        product_ids = list(session.exec(select(Product.id).order_by(Product.id)))
+        stocked = [
+            tuple(row)
+            for row in session.exec(
+                select(Stock.warehouse_id, Stock.product_id)
+                .where(Stock.free_to_use >= MIN_FREE_STOCK)
+                .order_by(Stock.warehouse_id, Stock.product_id)
+            )
+        ]
+    return load.Catalog(
+        warehouse_ids=warehouse_ids,
+        product_ids=rng.sample(product_ids, min(CATALOG_SIZE, len(product_ids))),
+        stocked=rng.sample(stocked, min(CATALOG_SIZE, len(stocked))),
+    )
+
+
+def compare(results: list[dict], baseline: list[dict], tolerance: float) -> list[dict]:
+    """Per scenario change against the baseline; `regressed` when throughput
+    dropped or p95 latency grew by more than `tolerance`."""
+    previous = {result["scenario"]: result for result in baseline}
+    comparison = []
+    for result in results:
+        before = previous.get(result["scenario"])
+        if before is None:
+            continue
+        rps_change = result["rps"] / before["rps"] - 1 if before["rps"] else 0.0
+        p95_change = (
+            result["p95_ms"] / before["p95_ms"] - 1 if before["p95_ms"] else 0.0
+        )
+        comparison.append(
+            {
+                "scenario": result["scenario"],
+                "rps_change": round(rps_change, 3),
+                "p95_change": round(p95_change, 3),
+                "regressed": rps_change < -tolerance or p95_change > tolerance,
+            }
+        )
+    return comparison
+
+
+async def run(args, catalog: load.Catalog) -> list[dict]:
+    limits = httpx.Limits(
+        max_connections=args.concurrency, max_keepalive_connections=args.concurrency
+    )
+    if args.base_url:
+        client = httpx.AsyncClient(
+            base_url=args.base_url, limits=limits, timeout=args.timeout
+        )
+    else:
+        from app.main import app
+
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://bench",
+            timeout=args.timeout,
+        )
+    try:
+        async with client:
+            return await load.run_scenarios(
+                client,
+                args.scenario,
+                args.requests,
+                args.concurrency,
+                args.seed,
+                catalog,
+            )
+    finally:
+        if not args.base_url:
+            from app.models.create_db import async_engine, replica_engine
+
+            # pooled aiosqlite connections run in threads that block exit
+            await async_engine.dispose()
+            await replica_engine.dispose()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reproducible benchmark suite")
+    parser.add_argument("--db", default="sqlite:///bench.db")
+    datagen.add_scale_arguments(parser)
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=sorted(load.SCENARIOS),
+        help="repeatable, defaults to all scenarios",
+    )
+    parser.add_argument("--concurrency", type=int, default=None)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument(
+        "--base-url", default=None, help="server to drive instead of the in-process app"
+    )
+    parser.add_argument("--out", default=None, help="write the results JSON here")
+    parser.add_argument("--baseline", default=None, help="results JSON to compare to")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+    args.scenario = args.scenario or sorted(load.SCENARIOS)
+    backend = args.db.split(":", 1)[0].split("+", 1)[0]
+    if args.concurrency is None:
+        # SQLite serialises writers, more clients only add lock waits
+        args.concurrency = 8 if backend == "sqlite" else 100
+
+    scale = datagen.scale_from_args(args)
+    engine = datagen.prepare_database(args.db)
+    generated = datagen.generate(engine, scale, args.seed, args.batch_size)
+    catalog = load_catalog(engine, args.seed)
+    results = asyncio.run(run(args, catalog))
+
+    report = {
+        "meta": {
+            "seed": args.seed,
+            "scale": generated["scale"],
+            "rows": generated["rows"],
+            "generate_seconds": generated["seconds"],
+            "backend": backend,
+            "target": args.base_url or "in-process",
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "python": platform.python_version(),
+        },
+        "results": results,
+    }
+    failed = any(result["errors"] for result in results)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        report["comparison"] = compare(results, baseline["results"], args.tolerance)
+        failed = failed or any(entry["regressed"] for entry in report["comparison"])
+
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    print(output)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,20 @@
+import React from 'react'
+
+// "Load more" for listings paged with usePagedList; hidden after the last page
+const LoadMoreButton = ({ hasMore, loading, onClick, label = 'Load more' }) => {
+  if (!hasMore) return null
+  return (
+    <div className="flex justify-center mt-6">
+      <button
+        type="button"
+        onClick={onClick}
+        disabled={loading}
+        className="px-5 py-2 rounded-lg border border-[#D7CCC8] bg-white text-sm font-medium text-[#5D4037] hover:bg-[#FBF8F4] disabled:opacity-50 disabled:cursor-not-allowed transition-colors"
+      >
+        {loading ? 'Loading...' : label}
+      </button>
+    </div>
+  )
+}
+
+export default LoadMoreButton
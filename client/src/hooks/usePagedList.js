@@ -0,0 +1,50 @@
+import { useCallback, useEffect, useRef, useState } from 'react'
+
+// A keyset-paginated listing, loaded one page at a time: the first page on
+// mount (and whenever `params` change), the next one only when loadMore() is
+// called. `fetchPage(params, cursor)` resolves to { items, nextCursor }, see
+// fetchPage in services/new_api.js; pass a module-level function.
+export default function usePagedList(fetchPage, params = {}) {
+  const key = JSON.stringify(params)
+  const [items, setItems] = useState([])
+  const [cursor, setCursor] = useState(null)
+  const [loading, setLoading] = useState(true)
+  const [error, setError] = useState(null)
+  // only the latest request may update the state
+  const latest = useRef(0)
+
+  const load = useCallback(
+    async (after) => {
+      const request = ++latest.current
+      setLoading(true)
+      try {
+        const page = await fetchPage(JSON.parse(key), after)
+        if (request !== latest.current) return
+        setItems((prev) => (after ? [...prev, ...page.items] : page.items))
+        setCursor(page.nextCursor)
+        setError(null)
+      } catch (e) {
+        console.error('Error loading page:', e)
+        if (request === latest.current) setError(e)
+      } finally {
+        if (request === latest.current) setLoading(false)
+      }
+    },
+    [fetchPage, key]
+  )
+
+  useEffect(() => {
+    load(null)
+  }, [load])
+
+  return {
+    items,
+    loading,
+    error,
+    hasMore: Boolean(cursor),
+    loadMore: () => {
+      if (cursor && !loading) load(cursor)
+    },
+    reload: () => load(null),
+  }
+}
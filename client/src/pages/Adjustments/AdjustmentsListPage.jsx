@@ -1,38 +1,20 @@
-import React, { useEffect, useState } from 'react'
+import React from 'react'
 import { Link } from 'react-router-dom'
+import { fetchTransactionsPage } from '../../services/new_api'
+import usePagedList from '../../hooks/usePagedList'
+import LoadMoreButton from '../../components/LoadMoreButton'
 
-const baseUrl = (import.meta && import.meta.env && import.meta.env.VITE_API_URL) || 'http://localhost:8000'
-
-async function safeFetch(path, options = {}) {
-  const url = path.startsWith('http') ? path : `${baseUrl}${path}`
-  const res = await fetch(url, options)
-  if (!res.ok) throw new Error(`HTTP ${res.status}`)
-  return res.json()
-}
+const ADJUSTMENT_FILTERS = { txn_type: 'internal_adjustment' }
 
 const AdjustmentsListPage = () => {
-  const [adjustments, setAdjustments] = useState([])
-  const [loading, setLoading] = useState(true)
-
-  useEffect(() => {
-    let mounted = true
-    const load = async () => {
-      setLoading(true)
-      try {
-        const data = await safeFetch('/dashboard/transactions?txn_type=internal_adjustment')
-        if (mounted) setAdjustments(data || [])
-      } catch (e) {
-        console.error('Failed to load adjustments:', e)
-        if (mounted) setAdjustments([])
-      } finally {
-        if (mounted) setLoading(false)
-      }
-    }
-    load()
-    return () => {
-      mounted = false
-    }
-  }, [])
+  // newest page first, older ones on "Load more"
+  const {
+    items: adjustments,
+    loading: pageLoading,
+    hasMore,
+    loadMore,
+  } = usePagedList(fetchTransactionsPage, ADJUSTMENT_FILTERS)
+  const loading = pageLoading && adjustments.length === 0
 
   return (
     <div className="p-4">
@@ -75,6 +57,7 @@ const AdjustmentsListPage = () => {
           </tbody>
         </table>
       )}
+      <LoadMoreButton hasMore={hasMore} loading={pageLoading} onClick={loadMore} />
     </div>
   )
 }
@@ -1,11 +1,12 @@
 import React, { useEffect, useState } from 'react'
 import { useParams, useNavigate } from 'react-router-dom'
+import { apiFetch } from '../../services/new_api'
 
 const baseUrl = (import.meta && import.meta.env && import.meta.env.VITE_API_URL) || 'http://localhost:8000'
 
 async function safeFetch(path, options = {}) {
   const url = path.startsWith('http') ? path : `${baseUrl}${path}`
-  const res = await fetch(url, options)
+  const res = await apiFetch(url, options)
   if (!res.ok) throw new Error(`HTTP ${res.status}`)
   // If no content
   if (res.status === 204) return null
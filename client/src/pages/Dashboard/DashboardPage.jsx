@@ -16,6 +16,11 @@ import {
 } from 'lucide-react'
 
 import { useNavigate } from 'react-router-dom'
+import {
+  apiFetch,
+  fetchStockTotals,
+  subscribeEvents,
+} from '../../services/new_api'
 
 // KPI Card Component
 const KPICard = ({
@@ -145,42 +150,74 @@ const DashboardPage = () => {
     loadDashboardData()
   }, [])
 
-  const loadDashboardData = async () => {
-    setLoading(true)
+  // stay live: re-read the (cheap) server-side stock totals and KPI snapshot
+  useEffect(() => {
+    const unsubscribe = subscribeEvents((events) => {
+      if (events.some((e) => e.type === 'resync')) {
+        loadDashboardData({ silent: true })
+        return
+      }
+      if (events.some((e) => e.type === 'stock')) refreshStockTotals()
+      refreshKpis()
+    })
+    return unsubscribe
+  }, [])
+
+  const refreshStockTotals = async () => {
+    try {
+      const { total, byWarehouse } = await fetchStockTotals()
+      setDashboardData((prev) => ({
+        ...prev,
+        totalStockUnits: total,
+        warehouses: prev.warehouses.map((wh) => ({
+          ...wh,
+          totalStock: byWarehouse.get(wh.id) || 0,
+        })),
+      }))
+    } catch (error) {
+      console.error('Error refreshing stock totals:', error)
+    }
+  }
+
+  const refreshKpis = async () => {
+    try {
+      const kpiResponse = await apiFetch(`${API_BASE_URL}/dashboard/kpis`)
+      const kpiData = await kpiResponse.json()
+      setDashboardData((prev) => ({
+        ...prev,
+        productCount: kpiData.total_products,
+        lowStockCount: kpiData.low_stock_items,
+        pendingReceiptsCount: kpiData.pending_receipts,
+        pendingDeliveriesCount: kpiData.pending_deliveries,
+        scheduledTransfersCount: kpiData.internal_transfers,
+      }))
+    } catch (error) {
+      console.error('Error refreshing KPIs:', error)
+    }
+  }
+
+  const loadDashboardData = async ({ silent = false } = {}) => {
+    if (!silent) setLoading(true)
     try {
       // 1. Fetch Calculated KPIs from Dashboard Manager
-      const kpiResponse = await fetch(`${API_BASE_URL}/dashboard/kpis`)
+      const kpiResponse = await apiFetch(`${API_BASE_URL}/dashboard/kpis`)
       const kpiData = await kpiResponse.json()
 
       // 2. Fetch Warehouses
-      const whResponse = await fetch(`${API_BASE_URL}/warehouses/`)
+      const whResponse = await apiFetch(`${API_BASE_URL}/warehouses/`)
       const warehousesData = await whResponse.json()
 
-      // 3. Fetch Products & Stock to calculate total units and warehouse utilization
-      // logic: /products/ returns [products[], stock[]]
-      const prodResponse = await fetch(`${API_BASE_URL}/products/`)
-      const prodData = await prodResponse.json()
-      const allStock = prodData[1] || [] // Index 1 is the stock list
-
-      // Calculate total stock units (sum of on_hand)
-      const totalStockUnits = allStock.reduce(
-        (sum, item) => sum + (item.on_hand || 0),
-        0
-      )
+      // 3. Stock totals (overall and per warehouse) for the warehouse
+      // utilization cards, aggregated server-side by the valuation report
+      const { total: totalStockUnits, byWarehouse } = await fetchStockTotals()
 
       // Map stock to warehouses for the Warehouse Cards
-      const warehouseStats = warehousesData.map((wh) => {
-        const warehouseStock = allStock
-          .filter((s) => s.warehouse_id === wh.id)
-          .reduce((sum, item) => sum + (item.on_hand || 0), 0)
-
-        return {
-          ...wh,
-          totalStock: warehouseStock,
-          // Fallback capacity if not in DB model
-          capacity: wh.capacity || 10000,
-        }
-      })
+      const warehouseStats = warehousesData.map((wh) => ({
+        ...wh,
+        totalStock: byWarehouse.get(wh.id) || 0,
+        // Fallback capacity if not in DB model
+        capacity: wh.capacity || 10000,
+      }))
 
       setDashboardData({
         productCount: kpiData.total_products,
@@ -231,7 +268,7 @@ const DashboardPage = () => {
           </div>
           <button
             className="flex items-center justify-center gap-2 px-4 sm:px-5 py-2.5 bg-[#5D4037] text-[#F5F0EC] rounded-lg text-sm font-medium hover:bg-[#3E2723] transition-colors active:scale-95 self-start sm:self-auto"
-            onClick={loadDashboardData}
+            onClick={() => loadDashboardData()}
           >
             <RefreshCw size={16} className="sm:w-[18px] sm:h-[18px]" />
             <span>Refresh</span>
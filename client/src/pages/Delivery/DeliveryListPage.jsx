@@ -1,6 +1,11 @@
 import React, { useState, useEffect, useMemo } from 'react'
 import { useNavigate } from 'react-router-dom'
 import { Truck, Plus, Search, ChevronRight } from 'lucide-react'
+import { apiFetch, fetchTransactionsPage } from '../../services/new_api'
+import usePagedList from '../../hooks/usePagedList'
+import LoadMoreButton from '../../components/LoadMoreButton'
+
+const DELIVERY_FILTERS = { txn_type: 'delivery' }
 
 const STATUS_CONFIG = {
   draft: { label: 'Draft', bg: 'bg-gray-100', text: 'text-gray-700' },
@@ -63,9 +68,17 @@ const EmptyState = () => (
 
 const DeliveriesListPage = () => {
   const navigate = useNavigate()
-  const [deliveries, setDeliveries] = useState([])
+  // newest page first, older ones on "Load more"
+  const {
+    items: deliveries,
+    loading: deliveriesLoading,
+    hasMore,
+    loadMore,
+  } = usePagedList(fetchTransactionsPage, DELIVERY_FILTERS)
   const [warehouses, setWarehouses] = useState([])
-  const [loading, setLoading] = useState(true)
+  const [warehousesLoading, setWarehousesLoading] = useState(true)
+  const loading =
+    warehousesLoading || (deliveriesLoading && deliveries.length === 0)
   const [searchQuery, setSearchQuery] = useState('')
 
   const API_BASE_URL = 'http://localhost:8000'
@@ -73,24 +86,17 @@ const DeliveriesListPage = () => {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        setLoading(true)
-
-        // 1. Fetch Deliveries
-        const deliveryResponse = await fetch(
-          `${API_BASE_URL}/dashboard/transactions?txn_type=delivery`
-        )
-        const deliveryData = await deliveryResponse.json()
+        setWarehousesLoading(true)
 
-        // 2. Fetch Warehouses (needed for the 'From' column)
-        const warehouseResponse = await fetch(`${API_BASE_URL}/warehouses/`)
+        // Fetch Warehouses (needed for the 'From' column)
+        const warehouseResponse = await apiFetch(`${API_BASE_URL}/warehouses/`)
         const warehouseData = await warehouseResponse.json()
 
-        setDeliveries(deliveryData)
         setWarehouses(warehouseData)
       } catch (err) {
-        console.error('Failed to fetch deliveries:', err)
+        console.error('Failed to fetch warehouses:', err)
       } finally {
-        setLoading(false)
+        setWarehousesLoading(false)
       }
     }
     fetchData()
@@ -303,6 +309,13 @@ const DeliveriesListPage = () => {
             </div>
           )}
         </div>
+
+        <LoadMoreButton
+          hasMore={hasMore}
+          loading={deliveriesLoading}
+          onClick={loadMore}
+          label="Load older deliveries"
+        />
       </div>
     </div>
   )
@@ -1,6 +1,7 @@
 import React, { useState, useEffect, useMemo } from 'react';
 import { useNavigate } from 'react-router-dom';
 import axios from 'axios';
+import { withReadYourWrites } from '../../services/new_api';
 import {
   ArrowLeft,
   Truck,
@@ -19,12 +20,14 @@ import {
 // Change this to your actual FastAPI URL
 const API_URL = 'http://localhost:8000';
 
-const api = axios.create({
-  baseURL: API_URL,
-  headers: {
-    'Content-Type': 'application/json',
-  },
-});
+const api = withReadYourWrites(
+  axios.create({
+    baseURL: API_URL,
+    headers: {
+      'Content-Type': 'application/json',
+    },
+  })
+);
 
 // Error handling helper
 const handleApiError = (error) => {
@@ -1,6 +1,7 @@
 import React, { useState, useEffect, useMemo, useCallback } from 'react'
 import { useParams, useNavigate } from 'react-router-dom'
 import axios from 'axios'
+import { withReadYourWrites } from '../../services/new_api'
 import {
   ArrowLeft,
   Package,
@@ -21,12 +22,14 @@ import {
 
 const API_URL = 'http://localhost:8000'
 
-const api = axios.create({
-  baseURL: API_URL,
-  headers: {
-    'Content-Type': 'application/json',
-  },
-})
+const api = withReadYourWrites(
+  axios.create({
+    baseURL: API_URL,
+    headers: {
+      'Content-Type': 'application/json',
+    },
+  })
+)
 
 const handleApiError = (error) => {
   if (error.response) {
@@ -41,12 +44,9 @@ const handleApiError = (error) => {
 const deliveryService = {
   getById: async (id) => {
     try {
-      // Fetch all deliveries and find the specific one
-      const response = await api.get('/dashboard/transactions', {
-        params: { txn_type: 'delivery' },
-      })
-      const delivery = response.data.find((t) => t.id === parseInt(id))
-      if (!delivery) throw new Error('Delivery not found')
+      const response = await api.get(`/dashboard/transactions/${id}`)
+      const delivery = response.data
+      if (delivery.type !== 'delivery') throw new Error('Delivery not found')
       return delivery
     } catch (error) {
       handleApiError(error)
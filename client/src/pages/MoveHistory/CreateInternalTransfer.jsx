@@ -10,6 +10,13 @@ import {
   AlertCircle,
   CheckCircle2,
 } from 'lucide-react'
+import {
+  apiFetch,
+  fetchCatalogPage,
+  splitCatalog,
+} from '../../services/new_api'
+import usePagedList from '../../hooks/usePagedList'
+import LoadMoreButton from '../../components/LoadMoreButton'
 
 // --- Configuration & Theme ---
 
@@ -71,17 +78,27 @@ const Select = ({
   </div>
 )
 
+// products with their per-warehouse stock rows, one page at a time
+const CATALOG_PARAMS = {}
+
 // --- Main Component ---
 
 const CreateInternalTransfer = () => {
   const [loading, setLoading] = useState(false)
-  const [fetching, setFetching] = useState(true)
+  const [warehousesFetching, setWarehousesFetching] = useState(true)
   const [message, setMessage] = useState(null)
 
   // Data State
   const [warehouses, setWarehouses] = useState([])
-  const [products, setProducts] = useState([])
-  const [stockMap, setStockMap] = useState({}) // Mapping of productID -> warehouseID -> quantity
+  const {
+    items: catalog,
+    loading: catalogLoading,
+    error: catalogError,
+    hasMore: moreProducts,
+    loadMore: loadMoreProducts,
+  } = usePagedList(fetchCatalogPage, CATALOG_PARAMS)
+  const fetching =
+    warehousesFetching || (catalogLoading && catalog.length === 0)
 
   // Form State
   const [formData, setFormData] = useState({
@@ -96,29 +113,10 @@ const CreateInternalTransfer = () => {
   useEffect(() => {
     const loadData = async () => {
       try {
-        const [whRes, prodRes] = await Promise.all([
-          fetch(`${API_BASE_URL}/warehouses/`),
-          fetch(`${API_BASE_URL}/products/`),
-        ])
-
-        if (whRes.ok && prodRes.ok) {
-          const whData = await whRes.json()
-          const prodDataRaw = await prodRes.json()
-
-          // Handle [products, stock] structure from productManager.py
-          const productsList = Array.isArray(prodDataRaw) ? prodDataRaw[0] : []
-          const stockList = Array.isArray(prodDataRaw) ? prodDataRaw[1] : []
-
-          setWarehouses(whData)
-          setProducts(productsList)
-
-          // Build a quick lookup map for stock: stockMap[productId][warehouseId] = qty
-          const map = {}
-          stockList.forEach((item) => {
-            if (!map[item.product_id]) map[item.product_id] = {}
-            map[item.product_id][item.warehouse_id] = item.free_to_use
-          })
-          setStockMap(map)
+        const whRes = await apiFetch(`${API_BASE_URL}/warehouses/`)
+
+        if (whRes.ok) {
+          setWarehouses(await whRes.json())
         }
       } catch (err) {
         console.error('Failed to load data', err)
@@ -127,14 +125,34 @@ const CreateInternalTransfer = () => {
           text: 'Failed to load warehouses or products. Is the server running?',
         })
       } finally {
-        setFetching(false)
+        setWarehousesFetching(false)
       }
     }
     loadData()
   }, [])
 
+  useEffect(() => {
+    if (catalogError) {
+      setMessage({
+        type: 'error',
+        text: 'Failed to load warehouses or products. Is the server running?',
+      })
+    }
+  }, [catalogError])
+
   // --- Computed ---
 
+  const { products, stockMap } = useMemo(() => {
+    const { products: productsList, stock: stockList } = splitCatalog(catalog)
+    // Build a quick lookup map for stock: stockMap[productId][warehouseId] = qty
+    const map = {}
+    stockList.forEach((item) => {
+      if (!map[item.product_id]) map[item.product_id] = {}
+      map[item.product_id][item.warehouse_id] = item.free_to_use
+    })
+    return { products: productsList, stockMap: map }
+  }, [catalog])
+
   const availableStock = useMemo(() => {
     if (!formData.productId || !formData.fromWarehouseId) return 0
     const prodStock = stockMap[formData.productId]
@@ -187,7 +205,7 @@ const CreateInternalTransfer = () => {
         scheduled_date: formData.scheduledDate,
       })
 
-      const res = await fetch(
+      const res = await apiFetch(
         `${API_BASE_URL}/products/create_internal_transfer/?${params.toString()}`,
         {
           method: 'POST',
@@ -323,6 +341,12 @@ const CreateInternalTransfer = () => {
                   options={productOptions}
                   placeholder="Select Item to Move"
                 />
+                <LoadMoreButton
+                  hasMore={moreProducts}
+                  loading={catalogLoading}
+                  onClick={loadMoreProducts}
+                  label="Load more products"
+                />
                 {formData.productId && formData.fromWarehouseId && (
                   <div
                     className="text-xs mt-1.5 flex items-center gap-1"
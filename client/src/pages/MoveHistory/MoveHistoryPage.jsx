@@ -9,6 +9,15 @@ import {
   ArrowRightLeft,
   Plus,
 } from 'lucide-react'
+import {
+  apiFetch,
+  fetchProductsByIds,
+  fetchTransactionsPage,
+} from '../../services/new_api'
+import usePagedList from '../../hooks/usePagedList'
+import LoadMoreButton from '../../components/LoadMoreButton'
+
+const TRANSFER_FILTERS = { txn_type: 'internal_adjustment' }
 
 // --- Configuration & Theme ---
 
@@ -139,10 +148,19 @@ const DirectionIndicator = ({ fromId, toId }) => {
 // --- Main Component ---
 
 const App = () => {
-  const [transactions, setTransactions] = useState([])
+  // newest page first, older ones on "Load more"
+  const {
+    items: transactions,
+    loading: transactionsLoading,
+    hasMore,
+    loadMore,
+  } = usePagedList(fetchTransactionsPage, TRANSFER_FILTERS)
   const [warehouses, setWarehouses] = useState([])
-  const [products, setProducts] = useState([])
-  const [loading, setLoading] = useState(true)
+  // names of the products the loaded transactions refer to, by id
+  const [productMap, setProductMap] = useState({})
+  const [referencesLoading, setReferencesLoading] = useState(true)
+  const loading =
+    referencesLoading || (transactionsLoading && transactions.length === 0)
   const [searchQuery, setSearchQuery] = useState('')
   const [viewMode, setViewMode] = useState('list')
 
@@ -151,37 +169,20 @@ const App = () => {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        setLoading(true)
+        setReferencesLoading(true)
 
-        // 1. Fetch Internal Adjustments (Transfers)
-        const txResponse = await fetch(
-          `${API_BASE_URL}/dashboard/transactions?txn_type=internal_adjustment`
-        )
-        // Handle potential errors if backend is not reachable in preview
-        if (!txResponse.ok) throw new Error('Backend not reachable')
-        const txData = await txResponse.json()
-
-        // 2. Fetch Warehouses
-        const whResponse = await fetch(`${API_BASE_URL}/warehouses/`)
+        // Fetch Warehouses
+        const whResponse = await apiFetch(`${API_BASE_URL}/warehouses/`)
         const whData = await whResponse.json()
 
-        // 3. Fetch Products (returns [products, stock])
-        const prodResponse = await fetch(`${API_BASE_URL}/products/`)
-        const prodResponseData = await prodResponse.json()
-        const prodData = Array.isArray(prodResponseData)
-          ? prodResponseData[0]
-          : prodResponseData
-
-        setTransactions(txData)
         setWarehouses(whData)
-        setProducts(prodData)
       } catch (err) {
         console.error('Failed to fetch data:', err)
         // For preview purposes only - if fetch fails, we stop loading to show empty state or error
         // In a real scenario, you might want to show an error message
-        setLoading(false)
+        setReferencesLoading(false)
       } finally {
-        setLoading(false)
+        setReferencesLoading(false)
       }
     }
     fetchData()
@@ -194,12 +195,24 @@ const App = () => {
     }, {})
   }, [warehouses])
 
-  const productMap = useMemo(() => {
-    return products.reduce((acc, prod) => {
-      acc[prod.id] = { name: prod.name, sku: prod.sku }
-      return acc
-    }, {})
-  }, [products])
+  // look up only the products of newly loaded transactions, not the catalog
+  useEffect(() => {
+    const missing = transactions
+      .map((tx) => tx.product_id)
+      .filter((id) => id != null && !(id in productMap))
+    if (!missing.length) return
+    fetchProductsByIds(missing, { fields: 'id,name,sku' })
+      .then((prodData) => {
+        setProductMap((prev) => {
+          const next = { ...prev }
+          prodData.forEach((prod) => {
+            next[prod.id] = { name: prod.name, sku: prod.sku }
+          })
+          return next
+        })
+      })
+      .catch((err) => console.error('Failed to fetch products:', err))
+  }, [transactions])
 
   const movementRows = useMemo(() => {
     // Map transactions directly to rows (assuming 1 transaction = 1 product movement based on backend)
@@ -538,6 +551,12 @@ const App = () => {
             Showing {filteredRows.length} internal adjustment records
           </div>
         )}
+        <LoadMoreButton
+          hasMore={hasMore}
+          loading={transactionsLoading}
+          onClick={loadMore}
+          label="Load older transfers"
+        />
       </div>
     </div>
   )
@@ -13,6 +13,11 @@ import {
   ChevronLeft,
   ChevronRight,
 } from 'lucide-react'
+import { apiFetch, fetchTransactionsPage } from '../../services/new_api'
+import usePagedList from '../../hooks/usePagedList'
+import LoadMoreButton from '../../components/LoadMoreButton'
+
+const RECEIPT_FILTERS = { txn_type: 'receipt' }
 
 // Status Badge Component
 const StatusBadge = ({ status }) => {
@@ -146,9 +151,16 @@ const EmptyState = ({ searchQuery }) => (
 // Main Receipts List Page Component
 const ReceiptsListPage = () => {
   const navigate = useNavigate()
-  const [receipts, setReceipts] = useState([])
+  // newest page first, older ones on "Load more"
+  const {
+    items: receipts,
+    loading: receiptsLoading,
+    hasMore,
+    loadMore,
+  } = usePagedList(fetchTransactionsPage, RECEIPT_FILTERS)
   const [warehouses, setWarehouses] = useState([])
-  const [loading, setLoading] = useState(true)
+  const [warehousesLoading, setWarehousesLoading] = useState(true)
+  const loading = warehousesLoading || (receiptsLoading && receipts.length === 0)
   const [searchQuery, setSearchQuery] = useState('')
   const [currentPage, setCurrentPage] = useState(1)
   const itemsPerPage = 10
@@ -160,24 +172,17 @@ const ReceiptsListPage = () => {
   }, [])
 
   const loadData = async () => {
-    setLoading(true)
+    setWarehousesLoading(true)
     try {
-      // 1. Fetch Receipts (filter transactions by type 'receipt')
-      const receiptsResponse = await fetch(
-        `${API_BASE_URL}/dashboard/transactions?txn_type=receipt`
-      )
-      const receiptsData = await receiptsResponse.json()
-
-      // 2. Fetch Warehouses (for mapping IDs to names)
-      const warehousesResponse = await fetch(`${API_BASE_URL}/warehouses/`)
+      // Fetch Warehouses (for mapping IDs to names)
+      const warehousesResponse = await apiFetch(`${API_BASE_URL}/warehouses/`)
       const warehousesData = await warehousesResponse.json()
 
-      setReceipts(receiptsData)
       setWarehouses(warehousesData)
     } catch (error) {
-      console.error('Error loading receipts:', error)
+      console.error('Error loading warehouses:', error)
     } finally {
-      setLoading(false)
+      setWarehousesLoading(false)
     }
   }
 
@@ -466,6 +471,12 @@ const ReceiptsListPage = () => {
                 </div>
               </div>
             )}
+            <LoadMoreButton
+              hasMore={hasMore}
+              loading={receiptsLoading}
+              onClick={loadMore}
+              label="Load older receipts"
+            />
           </>
         )}
       </div>
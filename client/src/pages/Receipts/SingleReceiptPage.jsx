@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import axios from 'axios';
+import { withReadYourWrites } from '../../services/new_api';
 import { 
   ArrowLeft,
   Check,
@@ -19,12 +20,14 @@ import {
 
 const API_URL = 'http://localhost:8000';
 
-const api = axios.create({
-  baseURL: API_URL,
-  headers: {
-    'Content-Type': 'application/json',
-  },
-});
+const api = withReadYourWrites(
+  axios.create({
+    baseURL: API_URL,
+    headers: {
+      'Content-Type': 'application/json',
+    },
+  })
+);
 
 // Error handling helper
 const handleApiError = (error) => {
@@ -41,13 +44,9 @@ const handleApiError = (error) => {
 const receiptService = {
   getById: async (id) => {
     try {
-      // Note: Since backend doesn't have a specific GET /id endpoint yet,
-      // we fetch all receipts and filter client-side.
-      const response = await api.get('/dashboard/transactions', { 
-        params: { txn_type: 'receipt' } 
-      });
-      const receipt = response.data.find(t => t.id === parseInt(id));
-      if (!receipt) throw new Error('Receipt not found');
+      const response = await api.get(`/dashboard/transactions/${id}`);
+      const receipt = response.data;
+      if (receipt.type !== 'receipt') throw new Error('Receipt not found');
       return receipt;
     } catch (error) {
       handleApiError(error);
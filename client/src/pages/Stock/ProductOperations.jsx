@@ -12,6 +12,12 @@ import {
   CheckCircle2,
   ArrowRight,
 } from 'lucide-react'
+import { apiFetch, fetchCatalogPage } from '../../services/new_api'
+import usePagedList from '../../hooks/usePagedList'
+import LoadMoreButton from '../../components/LoadMoreButton'
+
+// product picker options only need these fields
+const PRODUCT_OPTION_PARAMS = { fields: 'id,name,sku' }
 
 // --- Configuration & Theme (Matching Previous Pages) ---
 
@@ -85,7 +91,14 @@ const ProductOperations = () => {
 
   // Data State
   const [warehouses, setWarehouses] = useState([])
-  const [products, setProducts] = useState([])
+  // one catalog page of options, more on "Load more products"
+  const {
+    items: products,
+    loading: productsLoading,
+    hasMore: moreProducts,
+    loadMore: loadMoreProducts,
+    reload: reloadProducts,
+  } = usePagedList(fetchCatalogPage, PRODUCT_OPTION_PARAMS)
 
   // Form States
   const [newProduct, setNewProduct] = useState({
@@ -112,18 +125,8 @@ const ProductOperations = () => {
   const fetchInitialData = async () => {
     try {
       // Fetch Warehouses
-      const whRes = await fetch(`${API_BASE_URL}/warehouses/`)
+      const whRes = await apiFetch(`${API_BASE_URL}/warehouses/`)
       if (whRes.ok) setWarehouses(await whRes.json())
-
-      // Fetch Products
-      const prodRes = await fetch(`${API_BASE_URL}/products/`)
-      if (prodRes.ok) {
-        const data = await prodRes.json()
-        // Handle format [products, stocks] or just products
-        const prodList =
-          Array.isArray(data) && Array.isArray(data[0]) ? data[0] : data
-        setProducts(prodList)
-      }
     } catch (error) {
       console.error('Fetch error:', error)
     }
@@ -153,7 +156,7 @@ const ProductOperations = () => {
         quantity: parseFloat(newProduct.initialQty),
       }
 
-      const res = await fetch(
+      const res = await apiFetch(
         `${API_BASE_URL}/products/?warehouse_id=${payload.warehouse_id}&quantity=${payload.quantity}`,
         {
           method: 'POST',
@@ -178,6 +181,7 @@ const ProductOperations = () => {
         initialQty: 0,
       })
       fetchInitialData() // Refresh lists
+      reloadProducts()
     } catch (err) {
       setMessage({
         type: 'error',
@@ -207,7 +211,7 @@ const ProductOperations = () => {
         url += `&product_unit_cost=${updateForm.newValue}`
       }
 
-      const res = await fetch(url, { method: 'POST' })
+      const res = await apiFetch(url, { method: 'POST' })
       if (!res.ok) throw new Error('Update failed')
 
       setMessage({ type: 'success', text: 'Update applied successfully!' })
@@ -451,6 +455,12 @@ const ProductOperations = () => {
                         options={productOptions}
                         placeholder="Search or select product..."
                       />
+                      <LoadMoreButton
+                        hasMore={moreProducts}
+                        loading={productsLoading}
+                        onClick={loadMoreProducts}
+                        label="Load more products"
+                      />
                     </InputGroup>
                   </div>
 
@@ -10,6 +10,13 @@ import {
   ArrowUpDown,
   Settings,
 } from 'lucide-react'
+import {
+  apiFetch,
+  fetchCatalogPage,
+  splitCatalog,
+} from '../../services/new_api'
+import usePagedList from '../../hooks/usePagedList'
+import LoadMoreButton from '../../components/LoadMoreButton'
 
 // --- Configuration & Theme ---
 
@@ -82,13 +89,27 @@ const StockStatusBadge = ({ onHand, freeToUse }) => {
   )
 }
 
+// the whole catalog, one page at a time
+const CATALOG_PARAMS = {}
+
 // --- Main Component ---
 
 const StockAvailabilityPage = () => {
-  const [products, setProducts] = useState([])
-  const [stocks, setStocks] = useState([])
+  // Catalog items carry their per-warehouse stock rows; further pages on
+  // "Load more"
+  const {
+    items: catalog,
+    loading: catalogLoading,
+    hasMore,
+    loadMore,
+  } = usePagedList(fetchCatalogPage, CATALOG_PARAMS)
+  const { products, stock: stocks } = useMemo(
+    () => splitCatalog(catalog),
+    [catalog]
+  )
   const [warehouses, setWarehouses] = useState([])
-  const [loading, setLoading] = useState(true)
+  const [warehousesLoading, setWarehousesLoading] = useState(true)
+  const loading = warehousesLoading || (catalogLoading && catalog.length === 0)
 
   // Filters
   const [searchQuery, setSearchQuery] = useState('')
@@ -100,34 +121,20 @@ const StockAvailabilityPage = () => {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        setLoading(true)
+        setWarehousesLoading(true)
 
-        // 1. Fetch Products & Stock (Endpoint returns [products, stock])
-        const prodResponse = await fetch(`${API_BASE_URL}/products/`)
-        // Handle non-200 responses (e.g. if backend isn't running in preview)
-        if (!prodResponse.ok) throw new Error('Failed to fetch products')
-
-        const prodDataRaw = await prodResponse.json()
-        // Backend returns [products_list, stock_list] based on user's file
-        const productsData = prodDataRaw[0] || []
-        const stocksData = prodDataRaw[1] || []
-
-        // 2. Fetch Warehouses
-        const whResponse = await fetch(`${API_BASE_URL}/warehouses/`)
+        // Fetch Warehouses
+        const whResponse = await apiFetch(`${API_BASE_URL}/warehouses/`)
         if (!whResponse.ok) throw new Error('Failed to fetch warehouses')
         const whData = await whResponse.json()
 
-        setProducts(productsData)
-        setStocks(stocksData)
         setWarehouses(whData)
       } catch (err) {
         console.error('Failed to fetch stock data:', err)
         // Fallback for preview if backend fails
-        setProducts([])
-        setStocks([])
         setWarehouses([])
       } finally {
-        setLoading(false)
+        setWarehousesLoading(false)
       }
     }
     fetchData()
@@ -532,6 +539,12 @@ const StockAvailabilityPage = () => {
             <span>Showing {filteredRows.length} products</span>
           </div>
         </div>
+        <LoadMoreButton
+          hasMore={hasMore}
+          loading={catalogLoading}
+          onClick={loadMore}
+          label="Load more products"
+        />
       </div>
     </div>
   )
@@ -7,6 +7,7 @@ import {
   CheckCircle,
   AlertCircle,
 } from 'lucide-react'
+import { apiFetch } from '../../services/new_api'
 
 export default function WarehouseAddPage() {
   const [formData, setFormData] = useState({
@@ -26,7 +27,7 @@ export default function WarehouseAddPage() {
     setSuccess(false)
 
     try {
-      const response = await fetch('http://localhost:8000/warehouses/', {
+      const response = await apiFetch('http://localhost:8000/warehouses/', {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
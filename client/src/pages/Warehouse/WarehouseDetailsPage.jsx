@@ -8,6 +8,7 @@ import {
   Tag,
   AlertCircle,
 } from 'lucide-react'
+import { apiFetch } from '../../services/new_api'
 
 // Info Row Component
 const InfoRow = ({ icon: Icon, label, value, isLoading }) => (
@@ -121,7 +122,7 @@ const WarehouseDetailsPage = () => {
     setError(false)
     try {
       // Fetch all warehouses and find the specific one
-      const response = await fetch(`${API_BASE_URL}/warehouses/`)
+      const response = await apiFetch(`${API_BASE_URL}/warehouses/`)
       if (!response.ok) throw new Error('Failed to fetch warehouses')
 
       const warehouses = await response.json()
@@ -9,6 +9,7 @@ import {
   Package,
   TrendingUp,
 } from 'lucide-react'
+import { apiFetch, fetchStockTotals } from '../../services/new_api'
 
 // Warehouse Card Component
 const WarehouseCard = ({ warehouse, totalStock, capacity, onClick }) => {
@@ -190,7 +191,10 @@ const StatsSummary = ({ warehouses, totalStock }) => (
 const WarehouseListPage = () => {
   const navigate = useNavigate()
   const [warehouses, setWarehouses] = useState([])
-  const [stock, setStock] = useState([])
+  const [stockTotals, setStockTotals] = useState({
+    total: 0,
+    byWarehouse: new Map(),
+  })
   const [loading, setLoading] = useState(true)
   const [searchQuery, setSearchQuery] = useState('')
 
@@ -203,43 +207,34 @@ const WarehouseListPage = () => {
   const loadData = async () => {
     setLoading(true)
     try {
-      // Fetch Warehouses and Stock concurrently
-      const [whResponse, prodResponse] = await Promise.all([
-        fetch(`${API_BASE_URL}/warehouses/`),
-        fetch(`${API_BASE_URL}/products/`),
+      // Fetch Warehouses and the server-side stock totals concurrently
+      const [whResponse, totals] = await Promise.all([
+        apiFetch(`${API_BASE_URL}/warehouses/`),
+        fetchStockTotals(),
       ])
 
       if (!whResponse.ok) throw new Error('Failed to fetch warehouses')
-      if (!prodResponse.ok) throw new Error('Failed to fetch products')
 
       const warehousesData = await whResponse.json()
-      const prodData = await prodResponse.json()
-
-      // prodData is a list [products, stock], we need the stock array at index 1
-      const stockData =
-        Array.isArray(prodData) && prodData.length > 1 ? prodData[1] : []
 
       setWarehouses(warehousesData)
-      setStock(stockData)
+      setStockTotals(totals)
     } catch (error) {
       console.error('Error loading warehouse data:', error)
       // Fallback to empty arrays in case of error to prevent UI crash
       setWarehouses([])
-      setStock([])
+      setStockTotals({ total: 0, byWarehouse: new Map() })
     } finally {
       setLoading(false)
     }
   }
 
-  // Calculate stock per warehouse
-  const getWarehouseStock = (warehouseId) => {
-    return stock
-      .filter((item) => item.warehouse_id === warehouseId)
-      .reduce((sum, item) => sum + (item.on_hand || 0), 0)
-  }
+  // Stock per warehouse
+  const getWarehouseStock = (warehouseId) =>
+    stockTotals.byWarehouse.get(warehouseId) || 0
 
-  // Calculate total stock across all warehouses
-  const totalStock = stock.reduce((sum, item) => sum + (item.on_hand || 0), 0)
+  // Total stock across all warehouses
+  const totalStock = stockTotals.total
 
   // Filter warehouses based on search
   const filteredWarehouses = warehouses.filter((warehouse) => {
@@ -3,10 +3,46 @@ const baseUrl =
   (import.meta && import.meta.env && import.meta.env.VITE_API_URL) ||
   'http://localhost:8000'
 
+// Reads may be served by a lagging replica (app/services/read_routing.py).
+// The server's read-your-writes cookie is not sent back on cross-origin
+// requests, so for READ_YOUR_WRITES_MS (the server's READ_YOUR_WRITES_SECONDS)
+// after this client's last write, reads ask for the primary with the
+// X-Read-Your-Writes header instead. Same signature as fetch.
+const READ_YOUR_WRITES_MS = 5000
+let lastWriteAt = 0
+
+export const apiFetch = async (url, options = {}) => {
+  const method = (options.method || 'GET').toUpperCase()
+  const headers = new Headers(options.headers)
+  if (method === 'GET' && Date.now() - lastWriteAt < READ_YOUR_WRITES_MS) {
+    headers.set('X-Read-Your-Writes', '1')
+  }
+  const res = await fetch(url, { ...options, headers })
+  if (method !== 'GET' && res.ok) lastWriteAt = Date.now()
+  return res
+}
+
+// axios instances: same as apiFetch, through interceptors
+export const withReadYourWrites = (instance) => {
+  instance.interceptors.request.use((config) => {
+    const method = (config.method || 'get').toUpperCase()
+    if (method === 'GET' && Date.now() - lastWriteAt < READ_YOUR_WRITES_MS) {
+      config.headers['X-Read-Your-Writes'] = '1'
+    }
+    return config
+  })
+  instance.interceptors.response.use((response) => {
+    const method = (response.config.method || 'get').toUpperCase()
+    if (method !== 'GET') lastWriteAt = Date.now()
+    return response
+  })
+  return instance
+}
+
 async function safeFetch(path, options = {}) {
   const url = path.startsWith('http') ? path : `${baseUrl}${path}`
   try {
-    const res = await fetch(url, options)
+    const res = await apiFetch(url, options)
     if (!res.ok) throw new Error(`HTTP ${res.status}`)
     return await res.json()
   } catch (err) {
@@ -71,15 +107,82 @@ export const getDashboardKpis = async () => {
   }
 }
 
+// One page of a keyset-paginated listing: { items, nextCursor }. Pass
+// nextCursor back for the following page, it is null after the last one.
+// Load further pages only when the user asks for them (hooks/usePagedList).
+export const fetchPage = async (path, params = {}, cursor = null) => {
+  const query = new URLSearchParams(params)
+  if (cursor) query.set('cursor', cursor)
+  const res = await apiFetch(`${baseUrl}${path}?${query.toString()}`)
+  if (!res.ok) throw new Error(`HTTP ${res.status}`)
+  return {
+    items: await res.json(),
+    nextCursor: res.headers.get('X-Next-Cursor'),
+  }
+}
+
+// `GET /products/` is a paginated catalog: each product carries its
+// per-warehouse `stock` rows. `params` are passed through, e.g.
+// { fields: 'id,name,sku' }.
+export const fetchCatalogPage = (params = {}, cursor = null) =>
+  fetchPage('/products/', params, cursor)
+
+// just the products with these ids (e.g. those a page of transactions shows)
+export const fetchProductsByIds = async (ids, params = {}) => {
+  const unique = [...new Set(ids)].filter((id) => id != null)
+  if (!unique.length) return []
+  const query = new URLSearchParams({ limit: String(unique.length), ...params })
+  unique.forEach((id) => query.append('ids', String(id)))
+  const res = await apiFetch(`${baseUrl}/products/?${query.toString()}`)
+  if (!res.ok) throw new Error(`HTTP ${res.status}`)
+  return await res.json()
+}
+
+// on_hand per warehouse and in total, aggregated by the server
+// (`GET /reports/valuation`) instead of summed over the whole catalog here
+export const fetchStockTotals = async () => {
+  const res = await apiFetch(`${baseUrl}/reports/valuation`)
+  if (!res.ok) throw new Error(`HTTP ${res.status}`)
+  const { warehouses: rows } = await res.json()
+  return {
+    total: rows.reduce((sum, row) => sum + (row.on_hand || 0), 0),
+    byWarehouse: new Map(
+      rows.map((row) => [row.warehouse_id, row.on_hand || 0])
+    ),
+  }
+}
+
+// `GET /dashboard/transactions`, newest first. `params` are the filters,
+// e.g. { txn_type: 'receipt' }.
+export const fetchTransactionsPage = (params = {}, cursor = null) =>
+  fetchPage('/dashboard/transactions', params, cursor)
+
+// split catalog items into flat { products, stock } lists
+export const splitCatalog = (items) => ({
+  products: items.map(({ stock: _stock, ...product }) => product),
+  stock: items.flatMap((item) => item.stock || []),
+})
+
+// live change feed (server-sent events, see app/routes/eventsManager.py);
+// calls onEvents with each committed batch and returns an unsubscribe function
+export const subscribeEvents = (onEvents, { warehouseIds = [] } = {}) => {
+  const query = new URLSearchParams()
+  warehouseIds.forEach((id) => query.append('warehouse_id', String(id)))
+  const source = new EventSource(`${baseUrl}/events/stream?${query.toString()}`)
+  source.onmessage = (message) => {
+    try {
+      onEvents(JSON.parse(message.data))
+    } catch (e) {
+      console.error('Error handling feed events:', e)
+    }
+  }
+  return () => source.close()
+}
+
 export const getProducts = async () => {
   try {
-    // backend `GET /products/` returns [products, stock]
-    const data = await safeFetch('/products/')
-    // if backend returns tuple [products, stock]
-    if (Array.isArray(data) && data.length >= 1) {
-      return { products: data[0], stock: data[1] || [] }
-    }
-    return { products: data, stock: [] }
+    // the first catalog page only
+    return splitCatalog((await fetchCatalogPage()).items)
   } catch (e) {
     return { products, stock }
   }
@@ -87,9 +190,9 @@ export const getProducts = async () => {
 
 export const getProduct = async (id) => {
   try {
-    // no dedicated single-product route in productManager; fall back to fetching all
-    const { products: ps } = await getProducts()
-    return ps.find((p) => p.id === Number(id))
+    // no dedicated single-product route in productManager; filter by id
+    const { products: ps } = splitCatalog(await fetchProductsByIds([id]))
+    return ps[0]
   } catch (e) {
     return products.find((p) => p.id === Number(id))
   }
@@ -123,17 +226,14 @@ export const getStockByWarehouse = async (warehouseId) => {
 export const getTransactions = async (filters = {}) => {
   // productManager and dashboardManager expose transaction creation and filtering.
   // Use `/dashboard/transactions` with query params when available.
-  const params = new URLSearchParams()
-  if (filters.txn_type) params.append('txn_type', filters.txn_type)
-  if (filters.status) params.append('status', filters.status)
-  if (filters.warehouse_id)
-    params.append('warehouse_id', String(filters.warehouse_id))
-  if (filters.category) params.append('category', filters.category)
-  const path = `/dashboard/transactions${
-    params.toString() ? '?' + params.toString() : ''
-  }`
+  const params = {}
+  if (filters.txn_type) params.txn_type = filters.txn_type
+  if (filters.status) params.status = filters.status
+  if (filters.warehouse_id) params.warehouse_id = String(filters.warehouse_id)
+  if (filters.category) params.category = filters.category
   try {
-    return await safeFetch(path)
+    // the newest page only
+    return (await fetchTransactionsPage(params)).items
   } catch (e) {
     // fallback to empty list (or return mock transactions array if you want)
     return transactions
@@ -244,11 +344,17 @@ export const searchProducts = async (query) => {
 }
 
 export default {
+  apiFetch,
   // Navigation
   getSidebar,
   // Dashboard
   getDashboardKpis,
   // Products & stock
+  fetchCatalogPage,
+  fetchProductsByIds,
+  fetchStockTotals,
+  fetchTransactionsPage,
+  splitCatalog,
   getProducts,
   getProduct,
   getWarehouses,
@@ -259,6 +365,8 @@ export default {
   createReceipt,
   createDeliveryOrder,
   validateTransaction,
+  // Live updates
+  subscribeEvents,
   // Ledger / users
   getStockLedger,
   getUsers,